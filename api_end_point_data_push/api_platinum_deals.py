@@ -1,12 +1,25 @@
 import os
 import re
+import sys
 import time
+import signal
+import argparse
+import socket
+import hashlib
 import datetime
+import threading
 import requests
 import pymysql
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from decimal import Decimal
 from data_clean import clean_property_tenure, clean_posted_date, normalize_property_type, is_blank, to_float_or_none, to_float_or_zero, to_jsonable, clean_bed_rooms, auction_date_clean, clean_state
+from rate_limit import TokenBucket, CircuitBreaker, backoff_delay, parse_retry_after, classify_status
+from dedupe import ClusterIndex
+from push_eligibility import RULE_COLUMNS, push_reasons
+from push_queries import (CLAIMABLE_WHERE, CHANGED_WHERE, PRIORITY_REFRESH_WHERE, priority_sql, claim_sql,
+                          refresh_ids_sql)
 import json
 
 
@@ -20,22 +33,106 @@ MYSQL_PORT = int(os.getenv("MYSQL_PORT", "3306"))
 MYSQL_USER = os.getenv("MYSQL_USER", "root")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "")
 MYSQL_DB = os.getenv("MYSQL_DB", "property_listing")
-API_URL = "https://app.propertylab.tech/api/properties/platinum-deals/calculate-market-value"
+API_URL = os.getenv("PLATINUM_DEALS_API_URL",   # a stub_api.py URL for tests and benchmarks
+                    "https://app.propertylab.tech/api/properties/platinum-deals/calculate-market-value")
 PLATINUM_DEALS_API_KEY = os.getenv("PLATINUM_DEALS_API_KEY", "").strip()
-REQUEST_DELAY = 0.5
 DEBUG_LOG_BODY_MAX = 4000  # keep logs readable
 
+# Push throughput: concurrent HTTP workers sharing one keep-alive pool, paced by a token bucket.
+# The rate starts at PUSH_RATE requests/s and adapts between PUSH_RATE_MIN and PUSH_RATE_MAX
+# (slowly up on success, halved on 429, cut by 20% on 5xx).
+PUSH_WORKERS = int(os.getenv("PUSH_WORKERS", "8"))
+PUSH_RATE = float(os.getenv("PUSH_RATE", "4"))
+PUSH_RATE_MIN = float(os.getenv("PUSH_RATE_MIN", "0.5"))
+PUSH_RATE_MAX = float(os.getenv("PUSH_RATE_MAX", "20"))
+PUSH_BURST = float(os.getenv("PUSH_BURST", "2"))
+
+# Retries (429 / 5xx / other non-validation 4xx / network errors): jittered exponential backoff, Retry-After honoured
+MAX_ATTEMPTS = int(os.getenv("PUSH_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# Circuit breaker: pause after this many consecutive failures, give up after BREAKER_MAX_TRIPS pauses
+BREAKER_THRESHOLD = int(os.getenv("PUSH_BREAKER_THRESHOLD", "10"))
+BREAKER_COOLDOWN = float(os.getenv("PUSH_BREAKER_COOLDOWN", "120"))
+BREAKER_MAX_TRIPS = int(os.getenv("PUSH_BREAKER_MAX_TRIPS", "3"))
+
+# Per-row push state (api_update_status + push_attempts / push_last_error / next_retry_at columns)
+STATUS_PENDING = 0    # not sent yet, or a transient failure waiting for next_retry_at
+STATUS_SENT = 1
+STATUS_INVALID = 2    # failed validate_payload; never sent
+STATUS_REJECTED = 3   # API answered with a validation 4xx
+STATUS_DUPLICATE = 4  # same unit as an already pushed listing (see CLUSTER_TABLE); never sent
+RETRY_BASE_SECS = int(os.getenv("PUSH_RETRY_BASE_SECS", "300"))     # 5 min, doubled per failed run
+RETRY_MAX_SECS = int(os.getenv("PUSH_RETRY_MAX_SECS", "86400"))     # at most once a day
+LAST_ERROR_MAX = 500
+
+# Pending rows are read in keyset pages of this many rows per table (bounded memory, fast first request)
+PUSH_PAGE_SIZE = int(os.getenv("PUSH_PAGE_SIZE", "500"))
+
+# Push order: pages are claimed by the stored push_priority score (see push_queries.py for the
+# score and the claim SQL), and the engine always sends the best next row across sources
+# (one peeked row per source).
+
+# Row leases (claimed_by / claimed_until, schema v8): each page is claimed with FOR UPDATE SKIP LOCKED
+# (MySQL 8.0+) and stamped with this worker's id, so any number of push processes can run side by side.
+# Leases are renewed while a page is being pushed, released at exit, and simply expire if a worker dies.
+PUSH_WORKER_ID = (os.getenv("PUSH_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}")[:64]
+PUSH_LEASE_SECS = int(os.getenv("PUSH_LEASE_SECS", "900"))
+
+# API responses (schema v9), one row per listing with the hash of the payload that produced it.
+# A pending row whose payload hashes the same as its stored response is marked sent without a POST.
+RESPONSE_TABLE = "platinum-deals-response"
+
+# Duplicate clustering (schema v10): the same unit listed on several portals / by several agents is
+# pushed once. Each valid row is matched against the canonical rows of known clusters (grid index on
+# lat/lng, same bedrooms, price and size within tolerance); a match is recorded as a duplicate and
+# skipped, otherwise the row starts a new cluster. A new cluster is only recorded once its canonical row
+# has been sent; rows matching a canonical still in flight wait for it, and are handed back to be pushed
+# themselves if it fails. The index holds sent canonicals only and is reloaded on every daemon sweep,
+# which also picks up the clusters other push workers started.
+CLUSTER_TABLE = "listing-cluster"
+PUSH_DEDUPE = os.getenv("PUSH_DEDUPE", "1") == "1"
+DEDUPE_RADIUS_M = float(os.getenv("DEDUPE_RADIUS_M", "50"))
+DEDUPE_PRICE_TOL = float(os.getenv("DEDUPE_PRICE_TOL", "0.05"))   # 5%
+DEDUPE_SIZE_TOL = float(os.getenv("DEDUPE_SIZE_TOL", "0.05"))
+
+# Re-push of sent listings whose content changed (schema v13). The scrapers' change-aware upsert
+# (UPSERT_CHANGED_ONLY=1) moves updated_at only when a re-scraped listing really changed; push_changed
+# indexes (sent AND updated_at > last_push_at). Such a row is sent again only when the REPUSH_FIELDS of
+# its new payload differ from the last sent one (material_hash in RESPONSE_TABLE); otherwise just its
+# last_push_at catches up. Runs after the pending rows on every full pass (not on daemon polls).
+PUSH_REPUSH = os.getenv("PUSH_REPUSH", "1") == "1"
+REPUSH_FIELDS = tuple(f.strip() for f in os.getenv(
+    "PUSH_REPUSH_FIELDS",
+    "price,size,property_tenure,no_of_bedroom,no_of_bathroom,no_of_carpark,property_type,"
+    "area,state,latitude,longitude,auction_date",
+).split(",") if f.strip())
+
+# Daemon mode (--daemon): poll for rows inserted since the last poll (high-water mark on the indexed
+# ingest_seq column, schema v11) every PUSH_POLL_SECS, and sweep all pending rows every PUSH_SWEEP_SECS
+# (retries that became due, re-scraped rows, rows whose insert committed out of sequence).
+PUSH_POLL_SECS = float(os.getenv("PUSH_POLL_SECS", "5"))
+PUSH_SWEEP_SECS = float(os.getenv("PUSH_SWEEP_SECS", "600"))
+
+# Status write-back is batched: flushed every PUSH_FLUSH_ROWS outcomes or PUSH_FLUSH_SECS seconds,
+# and at exit. A crash can therefore re-send at most one unflushed batch on the next run.
+PUSH_FLUSH_ROWS = int(os.getenv("PUSH_FLUSH_ROWS", "200"))
+PUSH_FLUSH_SECS = float(os.getenv("PUSH_FLUSH_SECS", "5"))
 
-# Log code
-with open("logs.txt", "w", encoding="utf-8") as f:
-    f.write(f"=== Run started at {datetime.datetime.now()} (NO DATE FILTER) ===\n")
-
-def log_status(message):
-    with open("logs.txt", "a", encoding="utf-8") as log_file:
-        log_file.write(f"{datetime.datetime.now()} - {message}\n")
 
+# Log code
+def start_log(mode):
+    with open("logs.txt", "w", encoding="utf-8") as f:
+        f.write(f"=== Run started at {datetime.datetime.now()} ({mode}, NO DATE FILTER) ===\n")
 
+_log_lock = threading.Lock()
 
+def log_status(message):
+    # Called from the worker threads too; one writer at a time keeps lines intact
+    with _log_lock:
+        with open("logs.txt", "a", encoding="utf-8") as log_file:
+            log_file.write(f"{datetime.datetime.now()} - {message}\n")
 
 
 
@@ -76,6 +173,12 @@ def validate_payload(payload):
     return (len(missing) == 0 and len(invalid) == 0, missing, invalid)
 
 
+# Push eligibility is stored at ingest (push_eligible / push_reasons, schema v12) by the scrapers'
+# db_pipeline.py, with validate_payload()'s checks on the stored columns (push_eligibility.py, shared
+# by both sides). The push job only claims push_eligible = 1 rows; --recheck-eligibility re-evaluates
+# stored rows after the rules change.
+
+
 
 
 
@@ -191,26 +294,84 @@ def _flatten_api_errors(body_text: str):
 
 
 
-def send_api_request(payload, table_label, list_id, name):
-    headers = {
+
+
+class PushStats:
+    """Live counters shared by the main thread and the workers, in total and per source label."""
+
+    FIELDS = ("to_send", "success", "fail", "skipped", "cached", "duplicate", "changed")
+
+    def __init__(self):
+        self.to_send = 0       # valid rows (will be sent)
+        self.success = 0       # successful POSTs
+        self.fail = 0          # exhausted retries (non-2xx)
+        self.skipped = 0       # skipped due to missing/invalid before POST
+        self.cached = 0        # unchanged payload, stored response reused (no POST)
+        self.duplicate = 0     # same unit as another listing's cluster (no POST)
+        self.changed = 0       # sent listings re-sent after a material change (also in to_send)
+        self.by_source = {}    # label -> {field: count}
+        self._lock = threading.Lock()
+
+    def bump(self, field: str, source: str = None):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            if source is not None:
+                counts = self.by_source.setdefault(source, dict.fromkeys(self.FIELDS, 0))
+                counts[field] += 1
+            return self.line()
+
+    def line(self) -> str:
+        return (f"Live => to_send:{self.to_send} success:{self.success} fail:{self.fail} "
+                f"skipped:{self.skipped} cached:{self.cached} duplicate:{self.duplicate} "
+                f"changed:{self.changed}")
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """One Session for all workers: keep-alive connections reused from a pool sized to the workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
         "Api-Key": PLATINUM_DEALS_API_KEY,
         "Content-Type": "application/json"
-    }
+    })
+    return session
+
+
+session = make_session(PUSH_WORKERS)
+rate_limiter = TokenBucket(PUSH_RATE, burst=PUSH_BURST, min_rate=PUSH_RATE_MIN, max_rate=PUSH_RATE_MAX)
+breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN, BREAKER_MAX_TRIPS)
+
+
+def send_api_request(payload, table_label, list_id, name):
+    """
+    Returns (outcome, detail). outcome is "sent" on 2xx, "rejected" on 400 / 422, "failed" when
+    retries ran out, "aborted" when the circuit breaker stopped the run first or the API refused
+    the key or URL (401 / 403 / 404).
+    detail is the requests Response for "sent" and the last error text otherwise.
+    """
+    last_error = None
     attempt = 1
-    while attempt <= 2:
-        time.sleep(0.5)
+    while attempt <= MAX_ATTEMPTS:
+        if not breaker.wait_until_closed():
+            return "aborted", last_error
+        rate_limiter.acquire()
+        retry_after = None
         try:
-            response = requests.post(
+            response = session.post(
                 API_URL,
-                headers=headers,
                 json=to_jsonable(payload),
                 timeout=30
             )
             status = response.status_code
-            if 200 <= status < 300:
+            kind = classify_status(status)
+            if kind == "sent":
+                rate_limiter.on_success()
+                breaker.record_success()
                 log_status(f"[{table_label}] list_id={list_id} name='{name}' API success ({status})")
                 print(f"[{table_label}] list_id={list_id} name='{name}' -> SUCCESS ({status})", flush=True)
-                return True
+                return "sent", response
             else:
                 body = (response.text or "")[:DEBUG_LOG_BODY_MAX]
                 reasons = _flatten_api_errors(body)
@@ -221,20 +382,38 @@ def send_api_request(payload, table_label, list_id, name):
                 )
                 # Console: keep it short but informative
                 first_reason = reasons[0] if reasons else f"HTTP {status}"
+                last_error = f"HTTP {status}: " + "; ".join(reasons)
                 print(
                     f"[{table_label}] list_id={list_id} name='{name}' -> FAIL attempt {attempt} ({status}) "
                     f"reason: {first_reason}",
                     flush=True
                 )
+                if kind == "rejected":
+                    # 400 / 422: the API is healthy, this payload won't pass on retry
+                    breaker.record_success()
+                    return "rejected", last_error
+                if kind == "fatal":
+                    # 401 / 403 / 404: bad key or URL; stop before every pending row fails the same way
+                    breaker.record_failure()
+                    breaker.abort()
+                    log_status(f"HTTP {status} from the API (check PLATINUM_DEALS_API_KEY / PLATINUM_DEALS_API_URL), stopping; "
+                               f"remaining rows stay pending")
+                    return "aborted", last_error
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                rate_limiter.on_throttle(retry_after, factor=0.5 if status == 429 else 0.8)
+                if breaker.record_failure():
+                    log_status(f"Circuit breaker opened after {BREAKER_THRESHOLD} consecutive failures (trip {breaker.trips})")
         except Exception as e:
             snap = _payload_snapshot(payload)
             log_status(f"[{table_label}] list_id={list_id} name='{name}' API error ({type(e).__name__}: {e}) payload={snap}")
             print(f"[{table_label}] list_id={list_id} name='{name}' -> ERROR attempt {attempt} ({type(e).__name__})", flush=True)
+            last_error = f"{type(e).__name__}: {e}"
+            if breaker.record_failure():
+                log_status(f"Circuit breaker opened after {BREAKER_THRESHOLD} consecutive failures (trip {breaker.trips})")
+        if attempt < MAX_ATTEMPTS:
+            time.sleep(max(retry_after or 0.0, backoff_delay(attempt, BACKOFF_BASE, BACKOFF_CAP)))
         attempt += 1
-    return False
-
-
-
+    return "failed", last_error
 
 
 
@@ -243,320 +422,846 @@ def send_api_request(payload, table_label, list_id, name):
 
 
 
+### Source registry: one entry per listing table, payload mappers compiled from field specs
 
+def _text(value):
+    return (value or "").strip()
 
 
-# Connect to MySQL
-connection = pymysql.connect(
-    host=MYSQL_HOST,
-    port=MYSQL_PORT,
-    user=MYSQL_USER,
-    password=MYSQL_PASSWORD,
-    database=MYSQL_DB,
-    cursorclass=pymysql.cursors.DictCursor,
-    autocommit=False,
-    charset="utf8mb4"
-)
+def _as_is(value):
+    return value
 
 
+def _state_text(value):
+    return clean_state(_text(value))
 
 
+# payload key -> (column, cleaner), in payload order; shared by every portal
+PAYLOAD_FIELDS = {
+    "property_name":   ("name", _text),
+    "listing_url":     ("url", _text),
+    "listing_date":    ("posted_date", clean_posted_date),
+    "area":            ("area", _text),
+    "state":           ("state", _text),
+    "price":           ("price", to_float_or_zero),      # default 0.0 if missing/blank
+    "no_of_bedroom":   ("bed_rooms", clean_bed_rooms),
+    "no_of_bathroom":  ("bath", to_float_or_none),
+    "no_of_carpark":   ("parking", _as_is),
+    "size":            ("built_up_size", to_float_or_none),
+    "property_tenure": ("tenure", clean_property_tenure),
+    "property_type":   ("property_type", normalize_property_type),
+    "longitude":       ("lng", to_float_or_none),
+    "latitude":        ("lat", to_float_or_none),
+}
 
 
+def compile_mapper(fields, constants):
+    """Turn a field spec into a row -> payload function (spec lookups happen once, here)."""
+    steps = tuple((key, column, clean) for key, (column, clean) in fields.items())
+    constants = tuple(constants.items())
 
+    def build_payload(row):
+        payload = {key: clean(row[column]) for key, column, clean in steps}
+        payload.update(constants)
+        return payload
 
+    return build_payload
 
 
-try:
-    cursor = connection.cursor()
+def _env_int(name):
+    value = os.getenv(name, "").strip()
+    return int(value) if value else None
 
 
-
-    ### Iproperty new listing
-
-    # NO DATE FILTER: only check api_update_status
-    iproperty_sql = """
-        SELECT
-            list_id, name, url, area, state, price, bed_rooms, bath, built_up_size,
-            posted_date, tenure, property_type, lat, lng, parking
-        FROM `iproperty-new-listing`
-        WHERE (api_update_status IS NULL OR api_update_status = 0)
-        ORDER BY list_id ASC
+class Source:
     """
-
-    # Cursor iproperty new listing
-    cursor.execute(iproperty_sql)
-    iproperty_rows = cursor.fetchall()
-
-    # Console + log summary of fetched
-    log_status(f"Fetched {len(iproperty_rows)} rows from iproperty-new-listing (no date filter).")
-
-
-
-
-
-    ### Property Guru new listing
-
-    # NO DATE FILTER: only check api_update_status
-    property_guru_sql = """
-        SELECT
-            list_id, name, url, area, state, price, bed_rooms,bath, built_up_size,
-            posted_date, tenure, property_type, lat, lng
-        FROM `property-guru-new-listing`
-        WHERE (api_update_status IS NULL OR api_update_status = 0)
-        ORDER BY list_id ASC
-    """
-
-    # Cursor property guru new listing
-    cursor.execute(property_guru_sql)
-    property_guru_rows = cursor.fetchall()
-
-    # Console + log summary of fetched
-    log_status(f"Fetched {len(property_guru_rows)} rows from property-guru-new-listing (no date filter).")
-
-
-
-
-    ### Iproperty auction listing
-
-    # NO DATE FILTER: only check api_update_status
-    iproperty_auction_sql = """
-        SELECT
-            list_id, name, url, area, state, price, bed_rooms,bath, built_up_size,
-            posted_date, tenure, property_type, lat, lng, auction_date, parking
-        FROM `iproperty-auction-listing`
-        WHERE (api_update_status IS NULL OR api_update_status = 0)
-        ORDER BY list_id ASC
+    One push source: the listing table, the columns read from it, and the compiled payload mapper.
+    `overrides` replaces/adds payload fields of PAYLOAD_FIELDS (None = always send null).
+    `quota` caps the rows POSTed per run, `max_in_flight` the requests this source may have
+    queued on the shared worker pool, `weight` is added to every row's push priority; they can be
+    set per label with PUSH_QUOTA_<LABEL>, PUSH_CONCURRENCY_<LABEL> and PUSH_WEIGHT_<LABEL>
+    (label upper-cased, '-' -> '_'); a quota or concurrency of 0 there means no limit.
     """
 
-    # Cursor iproperty auction listing
-    cursor.execute(iproperty_auction_sql)
-    iproperty_auction_rows = cursor.fetchall()
-
-    # Console + log summary of fetched
-    log_status(f"Fetched {len(iproperty_auction_rows)} rows from iproperty-auction-listing (no date filter).")
-
-
-
-
-
-    
-
-
-
+    def __init__(self, table, label, payload_type, overrides=None, quota=None, max_in_flight=None, weight=0,
+                 state_cleaned=False):
+        self.table = table
+        self.label = label
+        self.payload_type = payload_type
+        self.state_cleaned = state_cleaned   # payload `state` goes through clean_state() (push_eligibility rule)
+        env_key = label.upper().replace("-", "_")
+        # An override set in the env wins even when it is 0: quota / concurrency 0 lift the coded limit
+        env_quota = _env_int(f"PUSH_QUOTA_{env_key}")
+        if env_quota is not None:
+            quota = env_quota or None
+        env_in_flight = _env_int(f"PUSH_CONCURRENCY_{env_key}")
+        if env_in_flight is not None:
+            max_in_flight = env_in_flight
+        self.quota = quota
+        self.max_in_flight = max_in_flight or PUSH_WORKERS
+
+        fields = dict(PAYLOAD_FIELDS)
+        constants = {"type": payload_type}
+        for key, spec in (overrides or {}).items():
+            if spec is None:
+                fields.pop(key, None)
+                constants[key] = None
+            else:
+                fields[key] = spec
+        self.columns = ["list_id"] + sorted({column for column, _ in fields.values()} - {"list_id"})
+        self.build_payload = compile_mapper(fields, constants)
+        env_weight = _env_int(f"PUSH_WEIGHT_{env_key}")
+        self.weight = env_weight if env_weight is not None else weight
+        self.priority_sql = priority_sql(self.weight, has_auction_date="auction_date" in self.columns)
 
 
+SOURCES = [
+    Source("iproperty-new-listing", "iproperty", "subsale"),
+    Source("property-guru-new-listing", "prop-guru", "subsale",
+           overrides={"no_of_carpark": None}),    # guru table has no parking column
+    Source("iproperty-auction-listing", "iproperty-auction", "auction",
+           overrides={"state": ("state", _state_text),
+                      "auction_date": ("auction_date", auction_date_clean)},
+           state_cleaned=True),
+]
 
 
+def select_sources(labels=None):
+    """Registry entries for a comma-separated list of labels (PUSH_SOURCES); all when empty."""
+    labels = labels if labels is not None else os.getenv("PUSH_SOURCES", "")
+    wanted = [l.strip() for l in labels.split(",") if l.strip()]
+    if not wanted:
+        return list(SOURCES)
+    by_label = {src.label: src for src in SOURCES}
+    unknown = [l for l in wanted if l not in by_label]
+    if unknown:
+        raise ValueError(f"Unknown push source(s) {unknown}; known: {sorted(by_label)}")
+    return [by_label[l] for l in wanted]
 
-    # Live counter for monitoring
-    to_send = 0       # valid rows (will be sent)
-    success = 0       # successful POSTs
-    fail = 0          # exhausted retries (non-2xx)
-    skipped = 0       # skipped due to missing/invalid before POST
 
-    per_request_delay = REQUEST_DELAY
 
 
+def payload_hash(payload):
+    """MD5 of the payload exactly as it is POSTed (keys sorted, so field order doesn't matter)."""
+    body = json.dumps(to_jsonable(payload), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.md5(body.encode("utf-8")).hexdigest()
 
 
+def material_hash(payload):
+    """payload_hash() of the REPUSH_FIELDS only: changes to anything else don't warrant a re-push."""
+    return payload_hash({k: payload.get(k) for k in REPUSH_FIELDS})
 
 
-    # Process iproperty-new-listing rows
-    for row in iproperty_rows:
-        table_label = "iproperty"
-        list_id = row["list_id"]
-        name = (row["name"] or "").strip()
+def _find_market_value(data):
+    """First number under a key containing 'market_value', searched depth-first; None if absent."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if "market_value" in str(key).lower():
+                number = to_float_or_none(value)
+                if number is not None:
+                    return number
+        for value in data.values():
+            number = _find_market_value(value)
+            if number is not None:
+                return number
+    elif isinstance(data, list):
+        for value in data:
+            number = _find_market_value(value)
+            if number is not None:
+                return number
+    return None
+
+
+def parse_response(response):
+    """(http_status, market_value, json_text) for the response table; json_text is None for non-JSON bodies."""
+    try:
+        data = response.json()
+    except ValueError:
+        return response.status_code, None, None
+    return response.status_code, _find_market_value(data), json.dumps(data, ensure_ascii=False)
 
-        payload = {
-            "property_name":   name,
-            "listing_url":     (row["url"] or "").strip(),
-            "listing_date":    clean_posted_date(row["posted_date"]),
-            "area":            (row["area"] or "").strip(),
-            "state":           (row["state"] or "").strip(),
-            "price":           to_float_or_zero(row["price"]),      # default 0.0 if missing/blank
-            "no_of_bedroom":   clean_bed_rooms(row["bed_rooms"]),
-            "no_of_bathroom":  to_float_or_none(row["bath"]),
-            "no_of_carpark":   row["parking"],  # Add them too
-            "size":            to_float_or_none(row["built_up_size"]),
-            "property_tenure": clean_property_tenure(row["tenure"]),
-            "property_type":   normalize_property_type(row["property_type"]),
-            "longitude":       to_float_or_none(row["lng"]),
-            "latitude":        to_float_or_none(row["lat"]),
-            "type":            "subsale"
-        }
 
-        ok, missing, invalid = validate_payload(payload)
-        if not ok:
-            skipped += 1
-            msg = f"[{table_label}] list_id={list_id} name='{name}' SKIPPED missing={missing} invalid={invalid}"
-            log_status(msg)
-            print(msg, flush=True)
-            print(f"Live => to_send:{to_send} success:{success} fail:{fail} skipped:{skipped}", flush=True)
-            continue
+class StatusWriter:
+    """
+    Buffers push outcomes and writes them in one transaction per flush.
+    Successes become a single UPDATE ... WHERE list_id IN (...) per table; the other
+    outcomes carry per-row errors and are sent with executemany in the same transaction,
+    as are the API responses (upserted into RESPONSE_TABLE) and new cluster members (CLUSTER_TABLE).
+    """
 
-        to_send += 1
-        ok_post = send_api_request(payload, table_label, list_id, name)
-        if ok_post:
-            success += 1
-            cursor.execute(
-                "UPDATE `iproperty-new-listing` SET api_update_status = 1 WHERE list_id = %s",
-                (list_id,)
-            )
-            connection.commit()
+    def __init__(self, connection, max_rows=PUSH_FLUSH_ROWS, max_secs=PUSH_FLUSH_SECS):
+        self.connection = connection
+        self.max_rows = max_rows
+        self.max_secs = max_secs
+        self._sent = {}       # table -> [list_id, ...]
+        self._other = {}      # (table, outcome) -> [params, ...]
+        self._responses = []  # RESPONSE_TABLE rows
+        self._members = []    # CLUSTER_TABLE rows
+        self._count = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, table_name, list_id, outcome, error=None):
+        error = (error or "")[:LAST_ERROR_MAX] or None
+        if outcome == "sent":
+            self._sent.setdefault(table_name, []).append(list_id)
+        elif outcome in ("invalid", "rejected", "duplicate"):
+            self._other.setdefault((table_name, outcome), []).append((error, list_id))
+        elif outcome in ("cached", "released"):
+            self._other.setdefault((table_name, outcome), []).append((list_id,))
         else:
-            fail += 1
-            log_status(f"[{table_label}] list_id={list_id} name='{name}' Giving up after retries")
-
-        print(f"Live => to_send:{to_send} success:{success} fail:{fail} skipped:{skipped}", flush=True)
-        time.sleep(per_request_delay)
-
-
-
-
-
-    # Process property-guru-new-listing rows
-    for row in property_guru_rows:
-        table_label = "prop-guru"
-        list_id = row["list_id"]
-        name = (row["name"] or "").strip()
-
-        payload = {
-            "property_name":   name,
-            "listing_url":     (row["url"] or "").strip(),
-            "area":            (row["area"] or "").strip(),
-            "listing_date":    clean_posted_date(row["posted_date"]),
-            "state":           (row["state"] or "").strip(),
-            "price":           to_float_or_zero(row["price"]),      # default 0.0 if missing/blank
-            "no_of_bedroom":   clean_bed_rooms(row["bed_rooms"]),
-            "no_of_bathroom":  to_float_or_none(row["bath"]),
-            "no_of_carpark":   None,
-            "size":            to_float_or_none(row["built_up_size"]),
-            "property_tenure": clean_property_tenure(row["tenure"]),
-            "property_type":   normalize_property_type(row["property_type"]),
-            "longitude":       to_float_or_none(row["lng"]),
-            "latitude":        to_float_or_none(row["lat"]),
-            "type":            "subsale"
-        }
-
-
-        ok, missing, invalid = validate_payload(payload)
-        if not ok:
-            skipped += 1
-            msg = f"[{table_label}] list_id={list_id} name='{name}' SKIPPED missing={missing} invalid={invalid}"
-            log_status(msg)
-            print(msg, flush=True)
-            print(f"Live => to_send:{to_send} success:{success} fail:{fail} skipped:{skipped}", flush=True)
-            continue
-
-        to_send += 1
-        ok_post = send_api_request(payload, table_label, list_id, name)
-        if ok_post:
-            success += 1
-            cursor.execute(
-                "UPDATE `property-guru-new-listing` SET api_update_status = 1 WHERE list_id = %s",
-                (list_id,)
+            self._other.setdefault((table_name, outcome), []).append(
+                (RETRY_BASE_SECS, RETRY_MAX_SECS, error, list_id)
             )
-            connection.commit()
-        else:
-            fail += 1
-            log_status(f"[{table_label}] list_id={list_id} name='{name}' Giving up after retries")
-
-        print(f"Live => to_send:{to_send} success:{success} fail:{fail} skipped:{skipped}", flush=True)
-        time.sleep(per_request_delay)
-
-
-
-
-
-    # Process iproperty-auction-listing rows
-    for row in iproperty_auction_rows:
-        table_label = "iproperty-auction"
-        list_id = row["list_id"]
-        name = (row["name"] or "").strip()
-
-        payload = {
-            "property_name":   name,
-            "listing_url":     (row["url"] or "").strip(),
-            "listing_date":    clean_posted_date(row["posted_date"]),
-            "auction_date":    auction_date_clean(row["auction_date"]),
-            "area":            (row["area"] or "").strip(),
-            "state":           clean_state((row["state"] or "").strip()),
-            "price":           to_float_or_zero(row["price"]),
-            "no_of_bedroom":   clean_bed_rooms(row["bed_rooms"]),
-            "no_of_bathroom":  to_float_or_none(row["bath"]),
-            "no_of_carpark":   row["parking"],
-            "size":            to_float_or_none(row["built_up_size"]),
-            "property_tenure": clean_property_tenure(row["tenure"]),
-            "property_type":   normalize_property_type(row["property_type"]),
-            "longitude":       to_float_or_none(row["lng"]),
-            "latitude":        to_float_or_none(row["lat"]),
-            "type":            "auction"
-        }
-
-        ok, missing, invalid = validate_payload(payload)
-        if not ok:
-            skipped += 1
-            msg = f"[{table_label}] list_id={list_id} name='{name}' SKIPPED missing={missing} invalid={invalid}"
-            log_status(msg)
-            print(msg, flush=True)
-            print(f"Live => to_send:{to_send} success:{success} fail:{fail} skipped:{skipped}", flush=True)
-            continue
+        self._count += 1
+        if self._count >= self.max_rows or time.monotonic() - self._last_flush >= self.max_secs:
+            self.flush()
+
+    def add_response(self, table_name, list_id, payload_digest, response, material_digest=None):
+        """Queue the API response for a listing; written with the next flush."""
+        status, market_value, body = parse_response(response)
+        self._responses.append(
+            (table_name, list_id, payload_digest, material_digest, status, market_value, body,
+             datetime.datetime.now())
+        )
+
+    def add_cluster_member(self, table_name, list_id, canonical, features):
+        """Record which cluster (canonical (table, list_id)) a listing belongs to; written with the next flush."""
+        self._members.append((table_name, list_id) + tuple(canonical) + tuple(features))
+
+    def flush(self):
+        if not self._count:
+            self._last_flush = time.monotonic()
+            return
+        sent, other, responses, members = self._sent, self._other, self._responses, self._members
+        try:
+            with self.connection.cursor() as cur:
+                for table_name, ids in sent.items():
+                    for k in range(0, len(ids), 1000):
+                        chunk = ids[k:k + 1000]
+                        cur.execute(
+                            f"UPDATE `{table_name}` SET api_update_status = {STATUS_SENT}, last_push_at = NOW(), "
+                            f"push_attempts = push_attempts + 1, push_last_error = NULL, next_retry_at = NULL, "
+                            f"claimed_by = NULL, claimed_until = NULL "
+                            f"WHERE list_id IN ({', '.join(['%s'] * len(chunk))})",
+                            chunk
+                        )
+                for (table_name, outcome), params in other.items():
+                    cur.executemany(self._outcome_sql(table_name, outcome), params)
+                if responses:
+                    cur.executemany(
+                        f"INSERT INTO `{RESPONSE_TABLE}` "
+                        f"(source_table, list_id, payload_hash, material_hash, http_status, market_value, response, "
+                        f"received_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) "
+                        f"ON DUPLICATE KEY UPDATE payload_hash = VALUES(payload_hash), "
+                        f"material_hash = VALUES(material_hash), http_status = VALUES(http_status), "
+                        f"market_value = VALUES(market_value), response = VALUES(response), received_at = VALUES(received_at)",
+                        responses
+                    )
+                if members:
+                    cur.executemany(
+                        f"INSERT INTO `{CLUSTER_TABLE}` "
+                        f"(source_table, list_id, canonical_table, canonical_list_id, lat, lng, price, size, bedrooms) "
+                        f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                        f"ON DUPLICATE KEY UPDATE canonical_table = VALUES(canonical_table), "
+                        f"canonical_list_id = VALUES(canonical_list_id), lat = VALUES(lat), lng = VALUES(lng), "
+                        f"price = VALUES(price), size = VALUES(size), bedrooms = VALUES(bedrooms)",
+                        members
+                    )
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        log_status(f"Status flush: {sum(len(v) for v in sent.values())} sent, "
+                   f"{sum(len(v) for v in other.values())} other")
+        self._sent, self._other, self._responses, self._members, self._count = {}, {}, [], [], 0
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _outcome_sql(table_name, outcome):
+        release = "claimed_by = NULL, claimed_until = NULL"
+        if outcome == "released":
+            return f"UPDATE `{table_name}` SET {release} WHERE list_id = %s"
+        if outcome == "cached":
+            return (f"UPDATE `{table_name}` SET api_update_status = {STATUS_SENT}, last_push_at = NOW(), "
+                    f"push_last_error = NULL, next_retry_at = NULL, {release} WHERE list_id = %s")
+        if outcome == "invalid":
+            return (f"UPDATE `{table_name}` SET api_update_status = {STATUS_INVALID}, push_last_error = %s, "
+                    f"{release} WHERE list_id = %s")
+        if outcome == "duplicate":
+            return (f"UPDATE `{table_name}` SET api_update_status = {STATUS_DUPLICATE}, push_last_error = %s, "
+                    f"{release} WHERE list_id = %s")
+        if outcome == "rejected":
+            return (f"UPDATE `{table_name}` SET api_update_status = {STATUS_REJECTED}, push_attempts = push_attempts + 1, "
+                    f"push_last_error = %s, next_retry_at = NULL, {release} WHERE list_id = %s")
+        # failed: next_retry_at is assigned before push_attempts changes (MySQL applies SET left to right)
+        return (f"UPDATE `{table_name}` SET "
+                f"next_retry_at = NOW() + INTERVAL LEAST(%s * POW(2, push_attempts), %s) SECOND, "
+                f"push_attempts = push_attempts + 1, push_last_error = %s, {release} WHERE list_id = %s")
+
+
+### Push engine: keyset-paged reads per source, one shared worker pool
+
+def claim_page(connection, table_name, columns, after, limit, key=None, priority="0", where=CLAIMABLE_WHERE):
+    """
+    Claim up to `limit` rows matching `where` (pending rows by default) for this worker in one short
+    transaction, highest stored push_priority first, or in `key` order after `after` when a key is
+    given (push_priority then computed from the `priority` SQL expression). Rows another worker is
+    claiming right now are skipped (SKIP LOCKED); rows already claimed, by anyone, are filtered out
+    by claimed_until, which is also what moves a priority-ordered reader on to the next page.
+    """
+    keyset = bool(key) and after is not None
+    try:
+        with connection.cursor() as cur:
+            cur.execute(
+                claim_sql(table_name, columns, key, keyset, priority, where),
+                ([after] if keyset else []) + [limit]
+            )
+            page = cur.fetchall()
+            if page:
+                ids = [r["list_id"] for r in page]
+                cur.execute(
+                    f"UPDATE `{table_name}` SET claimed_by = %s, claimed_until = NOW() + INTERVAL %s SECOND "
+                    f"WHERE list_id IN ({', '.join(['%s'] * len(ids))})",
+                    [PUSH_WORKER_ID, PUSH_LEASE_SECS] + ids
+                )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return page
 
 
-        to_send += 1
-        ok_post = send_api_request(payload, table_label, list_id, name)
-        if ok_post:
-            success += 1
-            cursor.execute(
-                "UPDATE `iproperty-auction-listing` SET api_update_status = 1 WHERE list_id = %s",
-                (list_id,)
+def refresh_priorities(connection, src, chunk=1000):
+    """
+    Bring the stored push_priority of a source's pending rows up to date (it moves with CURDATE()),
+    one short keyset chunk at a time; only rows whose score changed are written.
+    """
+    refreshed, last_id = 0, ""
+    while True:
+        with connection.cursor() as cur:
+            cur.execute(refresh_ids_sql(src.table, PRIORITY_REFRESH_WHERE), (last_id, chunk))
+            ids = [r["list_id"] for r in cur.fetchall()]
+            if ids:
+                refreshed += cur.execute(
+                    f"UPDATE `{src.table}` SET push_priority = {src.priority_sql} "
+                    f"WHERE list_id IN ({', '.join(['%s'] * len(ids))}) "
+                    f"AND push_priority <> {src.priority_sql}",
+                    ids
+                )
+        connection.commit()
+        if len(ids) < chunk:
+            break
+        last_id = ids[-1]
+    log_status(f"[{src.label}] push priorities refreshed: {refreshed} rows changed")
+
+
+def renew_lease(connection, table_name, list_ids):
+    """Push claimed_until out again for this worker's rows of one page that are still unresolved."""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"UPDATE `{table_name}` SET claimed_until = NOW() + INTERVAL %s SECOND "
+            f"WHERE claimed_by = %s AND list_id IN ({', '.join(['%s'] * len(list_ids))})",
+            [PUSH_LEASE_SECS, PUSH_WORKER_ID] + list_ids
+        )
+    connection.commit()
+
+
+def release_leases(connection, table_names):
+    """Hand back every row this worker still holds (unpushed rows after a stop, quota or abort)."""
+    with connection.cursor() as cur:
+        for table_name in table_names:
+            cur.execute(
+                f"UPDATE `{table_name}` SET claimed_by = NULL, claimed_until = NULL WHERE claimed_by = %s",
+                (PUSH_WORKER_ID,)
             )
+    connection.commit()
+
+
+def cached_payload_hashes(connection, table_name, list_ids):
+    """list_id -> (payload_hash, material_hash) of the stored API response, for the listings that have one."""
+    if not list_ids:
+        return {}
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT list_id, payload_hash, material_hash FROM `{RESPONSE_TABLE}` "
+            f"WHERE source_table = %s AND list_id IN ({', '.join(['%s'] * len(list_ids))})",
+            [table_name] + list_ids
+        )
+        found = {r["list_id"]: (r["payload_hash"], r["material_hash"]) for r in cur.fetchall()}
+    connection.commit()
+    return found
+
+
+def cluster_memberships(connection, table_name, list_ids):
+    """list_id -> (canonical_table, canonical_list_id) for the listings already clustered."""
+    if not list_ids:
+        return {}
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT list_id, canonical_table, canonical_list_id FROM `{CLUSTER_TABLE}` "
+            f"WHERE source_table = %s AND list_id IN ({', '.join(['%s'] * len(list_ids))})",
+            [table_name] + list_ids
+        )
+        found = {r["list_id"]: (r["canonical_table"], r["canonical_list_id"]) for r in cur.fetchall()}
+    connection.commit()
+    return found
+
+
+def iter_pending_rows(connection, table_name, columns, page_size=PUSH_PAGE_SIZE, key=None, after=None,
+                      priority="0", where=CLAIMABLE_WHERE):
+    """
+    Yield pending rows of one table in priority order, claiming one LIMIT page at a time,
+    so nothing beyond a page is held in memory or leased.
+    key="ingest_seq" with `after` set to a high-water mark reads only rows inserted since, in key order;
+    where=CHANGED_WHERE reads sent rows changed since their last push instead of pending ones.
+    Each row carries `cached_payload_hash` and `sent_material_hash`, the hashes stored with its API
+    response, and `cluster_of`, the canonical (table, list_id) of its duplicate cluster (None if unknown).
+    """
+    last = after
+    fetched = 0
+    while True:
+        page = claim_page(connection, table_name, columns, last, page_size, key, priority, where)
+        # A short page only means other workers hold (or are claiming) the rest; stop when nothing is left
+        if not page:
+            break
+        claimed_at = time.monotonic()
+        fetched += len(page)
+        ids = [r["list_id"] for r in page]
+        cached = cached_payload_hashes(connection, table_name, ids)
+        # changed rows were clustered when they were first pushed
+        clustered = cluster_memberships(connection, table_name, ids) if PUSH_DEDUPE and where != CHANGED_WHERE else {}
+        for row in page:
+            row["cached_payload_hash"], row["sent_material_hash"] = cached.get(row["list_id"], (None, None))
+            row["cluster_of"] = clustered.get(row["list_id"])
+        for row in page:
+            if time.monotonic() - claimed_at > PUSH_LEASE_SECS / 2:
+                renew_lease(connection, table_name, ids)
+                claimed_at = time.monotonic()
+            yield row
+        if key:
+            last = page[-1][key]
+    if fetched or after is None:   # daemon polls that find nothing stay out of the log
+        kind = "changed" if where == CHANGED_WHERE else "pending"
+        log_status(f"Claimed {fetched} {kind} rows from {table_name} (pages of {page_size}, worker {PUSH_WORKER_ID}).")
+
+
+def recheck_eligibility(connection, sources, page_size=PUSH_PAGE_SIZE):
+    """
+    Re-evaluate push_eligible / push_reasons of every pending or invalid row with the current rules,
+    one keyset page at a time; only rows whose result changed are written. Invalid rows that pass
+    now go back to pending.
+    """
+    for src in sources:
+        cols_sql = ", ".join(f"`{c}`" for c in ["list_id"] + RULE_COLUMNS + ["push_reasons", "api_update_status"])
+        last_id, checked, changed, revived = "", 0, 0, 0
+        while True:
+            with connection.cursor() as cur:
+                cur.execute(
+                    f"SELECT {cols_sql} FROM `{src.table}` "
+                    f"WHERE api_update_status IN ({STATUS_PENDING}, {STATUS_INVALID}) "
+                    f"AND list_id > %s ORDER BY list_id ASC LIMIT %s",
+                    (last_id, page_size)
+                )
+                page = cur.fetchall()
+                updates, eligible = [], []
+                for row in page:
+                    reasons = push_reasons(row, src.state_cleaned)
+                    if reasons != row["push_reasons"]:
+                        updates.append((1 if reasons == 0 else 0, reasons, row["list_id"]))
+                    if reasons == 0 and row["api_update_status"] == STATUS_INVALID:
+                        eligible.append((row["list_id"],))
+                if updates:
+                    cur.executemany(
+                        f"UPDATE `{src.table}` SET push_eligible = %s, push_reasons = %s WHERE list_id = %s",
+                        updates
+                    )
+                if eligible:
+                    cur.executemany(
+                        f"UPDATE `{src.table}` SET api_update_status = {STATUS_PENDING}, push_last_error = NULL, "
+                        f"next_retry_at = NULL WHERE list_id = %s AND api_update_status = {STATUS_INVALID}",
+                        eligible
+                    )
             connection.commit()
-        else:
-            fail += 1
-            log_status(f"[{table_label}] list_id={list_id} name='{name}' Giving up after retries")
+            checked += len(page)
+            changed += len(updates)
+            revived += len(eligible)
+            if len(page) < page_size:
+                break
+            last_id = page[-1]["list_id"]
+        msg = (f"[{src.label}] eligibility rechecked: {checked} pending/invalid rows, {changed} changed, "
+               f"{revived} invalid rows back to pending")
+        log_status(msg)
+        print(msg, flush=True)
+
+
+def load_cluster_index(connection):
+    """ClusterIndex over the canonical rows of every known cluster that have been sent."""
+    clusters = ClusterIndex(DEDUPE_RADIUS_M, DEDUPE_PRICE_TOL, DEDUPE_SIZE_TOL)
+    with connection.cursor() as cur:
+        # canonicals live in every source's table, not only the ones pushed by this run
+        for table_name in sorted({src.table for src in SOURCES}):
+            cur.execute(
+                f"SELECT c.source_table, c.list_id, c.lat, c.lng, c.price, c.size, c.bedrooms "
+                f"FROM `{CLUSTER_TABLE}` c JOIN `{table_name}` t ON t.list_id = c.list_id "
+                f"WHERE c.source_table = %s AND c.canonical_table = c.source_table "
+                f"AND c.canonical_list_id = c.list_id AND t.api_update_status = {STATUS_SENT}",
+                (table_name,)
+            )
+            for r in cur.fetchall():
+                clusters.add((r["source_table"], r["list_id"]), float(r["lat"]), float(r["lng"]),
+                             to_float_or_none(r["price"]), to_float_or_none(r["size"]), r["bedrooms"])
+    connection.commit()
+    log_status(f"Loaded {clusters.size} listing clusters for duplicate matching.")
+    return clusters
 
-        print(f"Live => to_send:{to_send} success:{success} fail:{fail} skipped:{skipped}", flush=True)
-        time.sleep(per_request_delay)
 
+def cluster_features(payload):
+    """(lat, lng, price, size, bedrooms) of a valid payload, as matched by ClusterIndex."""
+    return payload["latitude"], payload["longitude"], payload["price"], payload["size"], payload["no_of_bedroom"]
 
 
+def assign_cluster(clusters, src, row, features):
+    """
+    Match a valid row against the clusters. Returns the canonical (table, list_id) when the row is a
+    duplicate of another listing, None when it is canonical itself (and should be pushed).
+    A new canonical goes into the index right away, so later rows match it; the caller records it
+    in CLUSTER_TABLE once it has been sent, or removes it again if it fails.
+    A stored membership only counts while its canonical is in the index (i.e. was sent).
+    """
+    key = (src.table, row["list_id"])
+    if row["cluster_of"] is not None and tuple(row["cluster_of"]) in clusters:
+        canonical = tuple(row["cluster_of"])
+        return None if canonical == key else canonical
+    canonical = clusters.match(*features)
+    if canonical is None:
+        clusters.add(key, *features)
+    return canonical
+
+
+def push_sources(connection, sources, stats, writer, clusters=None, since=None, stop=None, changed=False):
+    """
+    Push the pending rows of every source through one worker pool.
+    Each source's rows arrive in priority order; the next row sent is the highest push_priority
+    among the sources' next rows (a heap of one row per source), skipping sources that have
+    max_in_flight requests queued. A source is dropped once its quota is reached or its rows run
+    out. Results are handled here, on the calling thread, which owns the DB connection (via writer).
+    With a ClusterIndex, rows that duplicate an already clustered listing are recorded, not sent;
+    a new cluster is recorded only once its canonical row is sent.
+    With `since` (table -> ingest_seq high-water mark) only rows inserted after the mark are read,
+    and the marks are advanced in place. With changed=True the rows are sent listings whose content
+    changed since their last push; they are not re-clustered and are only re-sent when their
+    material_hash differs from the last sent payload's. Setting `stop` ends the pass after the in-flight requests.
+    At most 2 * PUSH_WORKERS requests are in flight or queued at any time, so rows are only
+    read from the database as fast as the workers drain them.
+    """
+    def mark_duplicate(src, list_id, name, canonical, features):
+        log_status(f"[{src.label}] list_id={list_id} name='{name}' duplicate of {canonical[0]}:{canonical[1]}")
+        writer.add_cluster_member(src.table, list_id, canonical, features)
+        writer.add(src.table, list_id, "duplicate", f"duplicate of {canonical[0]}:{canonical[1]}")
+        print(stats.bump("duplicate", src.label), flush=True)
+
+    def settle_cluster(src, list_id, features, sent):
+        """A new canonical was sent (or not): record its cluster, or drop it and hand back the rows that matched it."""
+        key = (src.table, list_id)
+        waiting = unconfirmed.pop(key, None)
+        if waiting is None:
+            return
+        if sent:
+            writer.add_cluster_member(src.table, list_id, key, features)
+            for args in waiting:
+                mark_duplicate(*args[:3], key, args[3])
+        else:
+            clusters.remove(key)
+            for dup_src, dup_id, _, _ in waiting:
+                writer.add(dup_src.table, dup_id, "released")   # claimable again, to be pushed in its place
+
+    def handle_done(fut):
+        src, list_id, name, digest, material, features = in_flight.pop(fut)
+        busy[src.label] -= 1
+        outcome, detail = fut.result()
+        settle_cluster(src, list_id, features, outcome == "sent")
+        if outcome == "aborted":
+            return  # never sent; stays pending for the next run
+        if outcome == "sent":
+            writer.add_response(src.table, list_id, digest, detail, material)
+            writer.add(src.table, list_id, outcome)
+            line = stats.bump("success", src.label)
+        else:
+            writer.add(src.table, list_id, outcome, detail)
+            log_status(f"[{src.label}] list_id={list_id} name='{name}' Giving up ({outcome}): {detail}")
+            line = stats.bump("fail", src.label)
+        print(line, flush=True)
+
+    if changed:
+        # in list_id order off idx_push_changed; priority only orders rows within the claimed pages
+        rows = {src.label: iter_pending_rows(connection, src.table, src.columns, key="list_id", after="",
+                                             priority=src.priority_sql, where=CHANGED_WHERE)
+                for src in sources}
+    elif since is None:
+        rows = {src.label: iter_pending_rows(connection, src.table, src.columns, priority=src.priority_sql)
+                for src in sources}
+    else:
+        rows = {src.label: iter_pending_rows(connection, src.table, src.columns + ["ingest_seq"],
+                                             key="ingest_seq", after=since[src.table], priority=src.priority_sql)
+                for src in sources}
+    heads = {}   # label -> next row of that source, not yet sent
+    busy = {src.label: 0 for src in sources}
+    submitted = {src.label: 0 for src in sources}
+    active = list(sources)
+    in_flight = {}
+    unconfirmed = {}   # (table, list_id) of a new canonical in flight -> rows that matched it meanwhile
+
+    with ThreadPoolExecutor(max_workers=PUSH_WORKERS, thread_name_prefix="push") as pool:
+        while active:
+            if breaker.aborted:
+                log_status(f"Circuit breaker tripped {breaker.trips} times, stopping; remaining rows stay pending")
+                print("ABORTED by circuit breaker", flush=True)
+                break
+            if stop is not None and stop.is_set():
+                log_status("Stop requested; remaining rows stay pending")
+                break
+
+            ready = []
+            for src in list(active):
+                if src.quota is not None and submitted[src.label] >= src.quota:
+                    log_status(f"[{src.label}] quota of {src.quota} rows reached; the rest stay pending")
+                    active.remove(src)
+                    continue
+                if src.label not in heads:
+                    heads[src.label] = next(rows[src.label], None)
+                if heads[src.label] is None:
+                    active.remove(src)
+                    continue
+                if busy[src.label] < src.max_in_flight:
+                    ready.append(src)
+            if not active:
+                break
+            if not ready or len(in_flight) >= 2 * PUSH_WORKERS:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    handle_done(fut)
+                continue
+
+            src = max(ready, key=lambda s: heads[s.label]["push_priority"])
+            row = heads.pop(src.label)
+            if since is not None:
+                since[src.table] = max(since[src.table], row["ingest_seq"])
+
+            list_id = row["list_id"]
+            name = (row["name"] or "").strip()
+            payload = src.build_payload(row)
+
+            ok, missing, invalid = validate_payload(payload)
+            if not ok:
+                msg = f"[{src.label}] list_id={list_id} name='{name}' SKIPPED missing={missing} invalid={invalid}"
+                log_status(msg)
+                print(msg, flush=True)
+                writer.add(src.table, list_id, "invalid", f"missing={missing} invalid={invalid}")
+                print(stats.bump("skipped", src.label), flush=True)
+                continue
+
+            material = material_hash(payload)
+            if changed and material == row["sent_material_hash"]:
+                log_status(f"[{src.label}] list_id={list_id} name='{name}' changed, but not in REPUSH_FIELDS; not re-sent")
+                writer.add(src.table, list_id, "cached")
+                print(stats.bump("cached", src.label), flush=True)
+                continue
+
+            features = None
+            if clusters is not None and not changed:
+                features = cluster_features(payload)
+                canonical = assign_cluster(clusters, src, row, features)
+                if canonical in unconfirmed:
+                    unconfirmed[canonical].append((src, list_id, name, features))
+                    continue
+                if canonical is not None:
+                    mark_duplicate(src, list_id, name, canonical, features)
+                    continue
+                unconfirmed[(src.table, list_id)] = []
+
+            digest = payload_hash(payload)
+            if digest == row["cached_payload_hash"]:
+                log_status(f"[{src.label}] list_id={list_id} name='{name}' unchanged payload, stored response reused")
+                writer.add(src.table, list_id, "cached")
+                settle_cluster(src, list_id, features, True)
+                print(stats.bump("cached", src.label), flush=True)
+                continue
+
+            stats.bump("to_send", src.label)
+            if changed:
+                stats.bump("changed", src.label)
+            fut = pool.submit(send_api_request, payload, src.label, list_id, name)
+            in_flight[fut] = (src, list_id, name, digest, material, features)
+            busy[src.label] += 1
+            submitted[src.label] += 1
+
+        for fut in list(in_flight):
+            fut.result()
+            handle_done(fut)
+
+
+
+
+
+
+
+
+
+
+
+
+### Entry points: one batch pass (cron) or a long-running daemon
+
+stop_event = threading.Event()
+
+
+def _request_stop(signum, frame):
+    log_status(f"Signal {signum} received; finishing in-flight requests before exit")
+    print("Stopping after in-flight requests...", flush=True)
+    stop_event.set()
 
 
+def connect():
+    return pymysql.connect(
+        host=MYSQL_HOST,
+        port=MYSQL_PORT,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database=MYSQL_DB,
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=False,
+        charset="utf8mb4"
+    )
 
 
+def run_pass(connection, sources, stats, clusters, since=None):
+    """
+    Push what is pending now, then re-push sent rows that changed materially (PUSH_REPUSH).
+    A full pass first refreshes the stored push priorities; with `since`, only what was inserted
+    after the marks is pushed.
+    """
+    writer = StatusWriter(connection)
+    if since is None:
+        for src in sources:
+            refresh_priorities(connection, src)
+    try:
+        push_sources(connection, sources, stats, writer, clusters, since=since, stop=stop_event)
+        if PUSH_REPUSH and since is None:
+            push_sources(connection, sources, stats, writer, stop=stop_event, changed=True)
+    finally:
+        # Whatever was pushed before an error (or a stop) is still recorded, the rest handed back
+        writer.flush()
+        release_leases(connection, [src.table for src in sources])
+
+
+def high_water_marks(connection, sources):
+    """table -> current MAX(ingest_seq); rows inserted later are picked up by the daemon's polls."""
+    marks = {}
+    with connection.cursor() as cur:
+        for src in sources:
+            cur.execute(f"SELECT COALESCE(MAX(ingest_seq), 0) AS seq FROM `{src.table}`")
+            marks[src.table] = cur.fetchone()["seq"]
+    connection.commit()
+    return marks
+
+
+def run_daemon(connection, sources, stats, clusters, poll_secs=PUSH_POLL_SECS, sweep_secs=PUSH_SWEEP_SECS):
+    """
+    Keep the DB connection, HTTP session and cluster index warm and push new rows within
+    poll_secs of their insert; the cluster index is reloaded on every sweep. Runs until SIGTERM / SIGINT.
+    """
+    since = high_water_marks(connection, sources)
+    next_sweep = 0.0
+    log_status(f"Daemon started: poll every {poll_secs}s, full sweep every {sweep_secs}s, marks={since}")
+    while not stop_event.is_set():
+        connection.ping(reconnect=True)
+        if breaker.aborted:
+            log_status(f"Circuit breaker aborted the pass; waiting {BREAKER_COOLDOWN}s before trying again")
+            stop_event.wait(BREAKER_COOLDOWN)
+            breaker.reset()
+            continue
+        if time.monotonic() >= next_sweep:
+            if clusters is not None:
+                clusters = load_cluster_index(connection)   # clusters other workers started since
+            run_pass(connection, sources, stats, clusters)
+            next_sweep = time.monotonic() + sweep_secs
+        else:
+            run_pass(connection, sources, stats, clusters, since=since)
+        stop_event.wait(poll_secs)
 
 
-    # Final console summary
+def print_summary(stats):
     print("="*60, flush=True)
     print("SUMMARY (no date filter)", flush=True)
-    print(f"  Valid (to_send): {to_send}", flush=True)
-    print(f"  Success:         {success}", flush=True)
-    print(f"  Fail:            {fail}", flush=True)
-    print(f"  Skipped:         {skipped}", flush=True)
+    print(f"  Valid (to_send): {stats.to_send}", flush=True)
+    print(f"  Success:         {stats.success}", flush=True)
+    print(f"  Fail:            {stats.fail}", flush=True)
+    print(f"  Skipped:         {stats.skipped}", flush=True)
+    print(f"  Cached:          {stats.cached}", flush=True)
+    print(f"  Duplicate:       {stats.duplicate}", flush=True)
+    print(f"  Changed:         {stats.changed}", flush=True)
+    for label, counts in stats.by_source.items():
+        print(f"  [{label}] " + " ".join(f"{k}:{v}" for k, v in counts.items()), flush=True)
     print("="*60, flush=True)
 
-    log_status("Run completed.")
-
-
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push pending listings to the Platinum Deals API.")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and push new rows within seconds (stop with SIGTERM)")
+    parser.add_argument("--poll-secs", type=float, default=PUSH_POLL_SECS)
+    parser.add_argument("--sweep-secs", type=float, default=PUSH_SWEEP_SECS)
+    parser.add_argument("--sources", default=None,
+                        help="comma-separated source labels (default: PUSH_SOURCES, or all)")
+    parser.add_argument("--recheck-eligibility", action="store_true",
+                        help="re-evaluate push_eligible of pending rows with the current rules, then exit")
+    args = parser.parse_args(argv)
 
+    start_log("recheck" if args.recheck_eligibility else "daemon" if args.daemon else "batch")
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
 
+    connection = connect()
+    try:
+        ### Sources to push (--sources / PUSH_SOURCES=iproperty,prop-guru,... or all)
+        sources = select_sources(args.sources)
+        if args.recheck_eligibility:
+            recheck_eligibility(connection, sources)
+            return 0
+        log_status(f"Pushing sources: {[src.label for src in sources]}")
+
+        # Known duplicate clusters, matched against incrementally as new rows come in
+        clusters = load_cluster_index(connection) if PUSH_DEDUPE else None
+
+        # Live counter for monitoring
+        stats = PushStats()
+
+        # Rows of all sources are POSTed concurrently as they are read, paced by the token bucket
+        if args.daemon:
+            run_daemon(connection, sources, stats, clusters, args.poll_secs, args.sweep_secs)
+        else:
+            run_pass(connection, sources, stats, clusters)
 
+        # Final console summary
+        print_summary(stats)
+        log_status("Run completed.")
 
+    # Cleanup finally block with error handling
+    except Exception as e:
+        log_status(f"FATAL ERROR: {type(e).__name__}: {e}")
+        print(f"\nFATAL ERROR: {type(e).__name__}: {e}", flush=True)
+        try:
+            connection.rollback()
+        except Exception:
+            pass
+        return 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return 0
 
 
-# Cleanup finally block with error handling
-except Exception as e:
-    log_status(f"FATAL ERROR: {type(e).__name__}: {e}")
-    print(f"\nFATAL ERROR: {type(e).__name__}: {e}", flush=True)
-    try:
-        connection.rollback()
-    except Exception:
-        pass
-finally:
-    try:
-        connection.close()
-    except Exception:
-        pass
+if __name__ == "__main__":
+    sys.exit(main())
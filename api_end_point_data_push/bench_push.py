@@ -0,0 +1,265 @@
+# bench_push.py
+#
+# End-to-end throughput benchmark of the push job against the local stub API (stub_api.py).
+# Seeds a scratch MySQL database with N synthetic pending rows, runs one api_platinum_deals.py
+# pass over them and reports rows/s, latency percentiles of the HTTP requests and of whole rows
+# (all attempts, backoff and rate limiting included) and the DB cost of claiming rows and writing
+# their status back. Run it before and after a change to the push engine.
+#
+#   python bench_push.py --rows 20000
+#   python bench_push.py --rows 5000 --workers 16 --rate 200 --latency lognormal:0.15:0.5 --throttle 20:2
+#
+# The scratch database (--db, default property_listing_bench) is created and migrated with
+# database_schema/schema_manager.py, and its listing tables are emptied on every run.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "database_schema"))
+
+from dotenv import load_dotenv
+
+import stub_api
+
+
+load_dotenv()
+
+BENCH_DB = "property_listing_bench"
+SEED_CHUNK = 1000
+
+AREAS = ["Mont Kiara", "Cheras", "Petaling Jaya", "Subang Jaya", "Shah Alam", "Puchong", "Johor Bahru"]
+STATES = ["Kuala Lumpur", "Selangor", "Johor", "Penang"]
+TYPES = ["Condominium", "Apartment", "Serviced Residence", "Flat"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+class Timer:
+    """Accumulated wall time and call count of a wrapped function (thread-safe)."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples.append(time.perf_counter() - start)
+        return timed
+
+    @property
+    def total(self):
+        return sum(self.samples)
+
+
+# =========================
+# Seeding
+# =========================
+def synthetic_row(table, n, today):
+    """One pending listing; coordinates are spread out so duplicate clustering rarely matches."""
+    price = round(random.uniform(150_000, 2_500_000), -3)
+    size = round(random.uniform(450, 3_000))
+    row = {
+        "list_id": f"bench-{n:08d}",
+        "name": f"Bench Residence {n}",
+        "url": f"https://example.com/listing/{table}/{n}",
+        "area": random.choice(AREAS),
+        "state": random.choice(STATES),
+        "price": price,
+        "bed_rooms": str(random.randint(1, 5)),
+        "built_up_size": size,
+        "posted_date": today - datetime.timedelta(days=random.randint(0, 60)),
+        "tenure": random.choice(["Freehold", "Leasehold"]),
+        "property_type": random.choice(TYPES),
+        "lat": round(random.uniform(1.3, 6.5), 7),
+        "lng": round(random.uniform(100.2, 104.2), 7),
+        "bath": random.randint(1, 4),
+        "website_name": "bench",
+        "data_scraping_date": today,
+        "api_update_status": 0,
+        "push_eligible": 1,
+        "push_reasons": 0,
+    }
+    if table == "iproperty-auction-listing":
+        row["auction_date"] = today + datetime.timedelta(days=random.randint(-5, 60))
+    if table != "property-guru-new-listing":
+        row["parking"] = random.randint(0, 3)
+    return row
+
+
+def seed(connection, tables, rows):
+    """Empty the bench tables and insert `rows` pending listings spread over them; returns seconds taken."""
+    from schema_manager import RESPONSE_TABLE, CLUSTER_TABLE
+    start = time.perf_counter()
+    today = datetime.date.today()
+    with connection.cursor() as cur:
+        for table in tables + [RESPONSE_TABLE, CLUSTER_TABLE]:
+            cur.execute(f"TRUNCATE TABLE `{table}`")
+        for i, table in enumerate(tables):
+            share = rows // len(tables) + (1 if i < rows % len(tables) else 0)
+            batch = [synthetic_row(table, i * rows + n, today) for n in range(share)]
+            if not batch:
+                continue
+            columns = list(batch[0])
+            sql = (f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in columns)}) "
+                   f"VALUES ({', '.join(['%s'] * len(columns))})")
+            for k in range(0, len(batch), SEED_CHUNK):
+                cur.executemany(sql, [tuple(r[c] for c in columns) for r in batch[k:k + SEED_CHUNK]])
+    connection.commit()
+    return time.perf_counter() - start
+
+
+def prepare_database(db):
+    """Create the scratch database if needed and bring its schema up to date."""
+    import pymysql
+    import schema_manager
+    server = pymysql.connect(host=schema_manager.MYSQL_HOST, port=schema_manager.MYSQL_PORT,
+                             user=schema_manager.MYSQL_USER, password=schema_manager.MYSQL_PASSWORD,
+                             charset="utf8mb4", autocommit=True)
+    try:
+        with server.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS `{db}` DEFAULT CHARACTER SET utf8mb4")
+    finally:
+        server.close()
+    connection = schema_manager.connect()
+    try:
+        schema_manager.migrate(connection)
+    finally:
+        connection.close()
+
+
+# =========================
+# Report
+# =========================
+def report(stats, elapsed, rows, http_timer, row_timer, claim_timer, flush_timer, stub_counts, seed_secs):
+    resolved = stats.success + stats.fail + stats.skipped + stats.cached + stats.duplicate
+    latencies = http_timer.samples     # one per HTTP attempt
+    row_latencies = row_timer.samples  # one per row sent, from first attempt to final outcome
+    result = {
+        "rows": rows,
+        "resolved": resolved,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(resolved / elapsed, 1) if elapsed else 0.0,
+        "requests": len(latencies),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "latency_max_ms": round(max(latencies, default=0.0) * 1000, 1),
+        "rows_sent": len(row_latencies),
+        "row_latency_p50_ms": round(percentile(row_latencies, 50) * 1000, 1),
+        "row_latency_p99_ms": round(percentile(row_latencies, 99) * 1000, 1),
+        "row_latency_max_ms": round(max(row_latencies, default=0.0) * 1000, 1),
+        "claim_s": round(claim_timer.total, 3),
+        "claim_pages": len(claim_timer.samples),
+        "writeback_s": round(flush_timer.total, 3),
+        "writeback_flushes": len(flush_timer.samples),
+        "writeback_us_per_row": round(flush_timer.total / resolved * 1e6, 1) if resolved else 0.0,
+        "seed_s": round(seed_secs, 3),
+        "outcomes": {f: getattr(stats, f) for f in stats.FIELDS},
+        "api_status_counts": stub_counts,
+    }
+    return result
+
+
+def print_report(result):
+    print("=" * 60, flush=True)
+    print(f"  Rows resolved:   {result['resolved']} / {result['rows']} in {result['elapsed_s']}s "
+          f"({result['rows_per_s']} rows/s)", flush=True)
+    print(f"  API requests:    {result['requests']}  p50 {result['latency_p50_ms']} ms  "
+          f"p99 {result['latency_p99_ms']} ms  max {result['latency_max_ms']} ms", flush=True)
+    print(f"  Rows sent:       {result['rows_sent']}  p50 {result['row_latency_p50_ms']} ms  "
+          f"p99 {result['row_latency_p99_ms']} ms  max {result['row_latency_max_ms']} ms "
+          f"(all attempts, backoff and rate limiting)", flush=True)
+    print(f"  DB claim:        {result['claim_s']}s over {result['claim_pages']} pages", flush=True)
+    print(f"  DB write-back:   {result['writeback_s']}s over {result['writeback_flushes']} flushes "
+          f"({result['writeback_us_per_row']} us/row)", flush=True)
+    print(f"  Outcomes:        {result['outcomes']}", flush=True)
+    print(f"  Stub responses:  {result['api_status_counts']}", flush=True)
+    print("=" * 60, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark api_platinum_deals.py against the local stub API.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--db", default=BENCH_DB, help=f"scratch database, emptied on every run (default {BENCH_DB})")
+    parser.add_argument("--sources", default="", help="comma-separated source labels (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="PUSH_WORKERS")
+    parser.add_argument("--rate", type=float, default=1000.0, help="PUSH_RATE and PUSH_RATE_MAX (requests/s)")
+    parser.add_argument("--dedupe", action="store_true", help="keep duplicate clustering on (PUSH_DEDUPE)")
+    parser.add_argument("--latency", default="lognormal:0.1:0.5", help="stub latency spec, see stub_api.py")
+    parser.add_argument("--reject-rate", type=float, default=0.01, help="share of requests the stub rejects (422)")
+    parser.add_argument("--throttle", type=stub_api.parse_window, default=None, help="stub 429 windows EVERY:FOR")
+    parser.add_argument("--outage", type=stub_api.parse_window, default=None, help="stub 503 windows EVERY:FOR")
+    parser.add_argument("--api-url", default=None, help="use an already running stub instead of an in-process one")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the result as one JSON line")
+    parser.add_argument("--force", action="store_true", help="allow --db to be the configured MYSQL_DB")
+    args = parser.parse_args(argv)
+
+    if args.db == os.getenv("MYSQL_DB") and not args.force:
+        parser.error(f"--db {args.db} is the configured MYSQL_DB; the benchmark empties its tables (use --force)")
+    random.seed(args.seed)
+
+    config = None
+    api_url = args.api_url
+    if api_url is None:
+        config = stub_api.StubConfig(args.latency, args.reject_rate, args.throttle, args.outage)
+        _, api_url = stub_api.start_in_thread(config)
+
+    # api_platinum_deals and schema_manager read their settings from the environment at import
+    os.environ["MYSQL_DB"] = args.db
+    os.environ["PLATINUM_DEALS_API_URL"] = api_url
+    os.environ["PUSH_RATE"] = os.environ["PUSH_RATE_MAX"] = os.environ["PUSH_BURST"] = str(args.rate)
+    os.environ["PUSH_DEDUPE"] = "1" if args.dedupe else "0"
+    if args.workers:
+        os.environ["PUSH_WORKERS"] = str(args.workers)
+    prepare_database(args.db)
+    import api_platinum_deals as apd
+
+    sources = apd.select_sources(args.sources)
+    connection = apd.connect()
+    try:
+        seed_secs = seed(connection, [src.table for src in sources], args.rows)
+        print(f"Seeded {args.rows} pending rows into {args.db} in {seed_secs:.2f}s; pushing to {api_url}", flush=True)
+
+        http_timer, row_timer, claim_timer, flush_timer = Timer(), Timer(), Timer(), Timer()
+        apd.session.post = http_timer.wrap(apd.session.post)   # the HTTP call of each attempt
+        apd.send_api_request = row_timer.wrap(apd.send_api_request)
+        apd.claim_page = claim_timer.wrap(apd.claim_page)
+        apd.StatusWriter.flush = flush_timer.wrap(apd.StatusWriter.flush)
+
+        apd.start_log("bench")
+        stats = apd.PushStats()
+        clusters = apd.load_cluster_index(connection) if apd.PUSH_DEDUPE else None
+        start = time.perf_counter()
+        apd.run_pass(connection, sources, stats, clusters)
+        elapsed = time.perf_counter() - start
+    finally:
+        connection.close()
+
+    result = report(stats, elapsed, args.rows, http_timer, row_timer, claim_timer, flush_timer,
+                    dict(config.counts) if config else None, seed_secs)
+    if args.json:
+        print(json.dumps(result), flush=True)
+    else:
+        print_report(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
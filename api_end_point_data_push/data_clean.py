@@ -22,7 +22,12 @@ def clean_property_tenure(value):
 
 def clean_posted_date(text) -> str:
     """Convert '24 Sep 2025' → '2025-09-24'. If it fails, return today's date."""
+    # DATE columns come back from pymysql as datetime.date
+    if isinstance(text, datetime.date):
+        return text.isoformat()
     s = str(text).strip()
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", s):
+        return s
     s = re.sub(r",", "", s)
     s = re.sub(r"(\d{1,2})(st|nd|rd|th)\b", r"\1", s, flags=re.I)
     s = re.sub(r"[-/]+", " ", s)
@@ -0,0 +1,80 @@
+import math
+
+
+
+# ── Grid index of cluster representatives (one canonical listing per physical unit)
+METERS_PER_DEGREE = 111_320.0
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6_371_000.0 * math.asin(math.sqrt(a))
+
+
+def _close(a, b, tol):
+    """a and b within `tol` (a fraction) of the larger one."""
+    return abs(a - b) <= tol * max(abs(a), abs(b))
+
+
+class ClusterIndex:
+    """
+    In-memory index of canonical listings bucketed into lat/lng grid cells of about `radius_m`.
+    A listing matches a canonical one when it lies within radius_m, has the same bedroom count,
+    and its price and built-up size are within price_tol / size_tol (fractions) of it.
+    Only the cells around the probe are scanned, so a lookup costs the same for 1k or 1M clusters.
+    """
+
+    def __init__(self, radius_m=50.0, price_tol=0.05, size_tol=0.05):
+        self.radius_m = radius_m
+        self.price_tol = price_tol
+        self.size_tol = size_tol
+        self.cell_deg = radius_m / METERS_PER_DEGREE
+        self.size = 0
+        self._cells = {}   # (lat cell, lng cell) -> [(key, lat, lng, price, size, bedrooms), ...]
+        self._keys = {}    # key -> its cell
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add(self, key, lat, lng, price, size, bedrooms):
+        cell = self._cell(lat, lng)
+        self._cells.setdefault(cell, []).append((key, lat, lng, price, size, bedrooms))
+        self._keys[key] = cell
+        self.size += 1
+
+    def remove(self, key):
+        """Drop a canonical listing again (it was never pushed); unknown keys are ignored."""
+        cell = self._keys.pop(key, None)
+        if cell is None:
+            return
+        self._cells[cell] = [entry for entry in self._cells[cell] if entry[0] != key]
+        if not self._cells[cell]:
+            del self._cells[cell]
+        self.size -= 1
+
+    def match(self, lat, lng, price, size, bedrooms):
+        """Key of the nearest matching canonical listing, or None."""
+        if not price or not size or price <= 0 or size <= 0:
+            return None   # "price on request" / unknown size can't be told apart from other units
+        ci, cj = self._cell(lat, lng)
+        # a degree of longitude shrinks with latitude, so the radius can span more lng cells
+        lng_span = math.ceil(1 / max(math.cos(math.radians(lat)), 0.01))
+        best, best_d = None, None
+        for i in range(ci - 1, ci + 2):
+            for j in range(cj - lng_span, cj + lng_span + 1):
+                for key, lat2, lng2, price2, size2, bedrooms2 in self._cells.get((i, j), ()):
+                    if bedrooms2 != bedrooms:
+                        continue
+                    if not _close(price, price2, self.price_tol) or not _close(size, size2, self.size_tol):
+                        continue
+                    d = distance_m(lat, lng, lat2, lng2)
+                    if d <= self.radius_m and (best_d is None or d < best_d):
+                        best, best_d = key, d
+        return best
@@ -0,0 +1,103 @@
+import re
+from decimal import Decimal
+
+
+
+# ── Push eligibility rules, shared by the scrapers' db_pipeline.py (at ingest) and api_platinum_deals.py
+# (--recheck-eligibility). They are validate_payload()'s checks evaluated on the stored columns:
+# push_reasons is a bitmask of the failed checks and push_eligible = (push_reasons == 0).
+PUSH_REASON_BITS = {
+    "property_name": 1 << 0,
+    "listing_url": 1 << 1,
+    "area": 1 << 2,
+    "state": 1 << 3,
+    "price": 1 << 4,
+    "no_of_bedroom": 1 << 5,
+    "size": 1 << 6,
+    "property_type": 1 << 7,
+    "longitude": 1 << 8,
+    "latitude": 1 << 9,
+    "type": 1 << 10,
+    "listing_url_format": 1 << 11,
+    "latitude_range": 1 << 12,
+    "longitude_range": 1 << 13,
+}
+
+# Stored columns the rules read
+RULE_COLUMNS = ["name", "url", "area", "state", "bed_rooms", "built_up_size", "lat", "lng"]
+
+
+def reasons_mask(names):
+    """Bitmask of the given missing-field / invalid-code names."""
+    reasons = 0
+    for name in names:
+        reasons |= PUSH_REASON_BITS[name]
+    return reasons
+
+
+def _text(v):
+    return str(v).strip() if v is not None else ""
+
+
+def to_float_or_none(v):
+    """Same parsing as the push payload's (data_clean.to_float_or_none): blank or unparseable -> None."""
+    if isinstance(v, Decimal):
+        return float(v)
+    try:
+        s = _text(v)
+        return float(s) if s else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _bedrooms_ok(v):
+    # clean_bed_rooms() on the stored VARCHAR: "3+1" sums, else the first number; 1..5 or the special 100
+    s = _text(v)
+    nums = re.findall(r"\d+", s)
+    if not nums:
+        return False
+    n = sum(int(x) for x in nums) if "+" in s else int(nums[0])
+    return n == 100 or 1 <= n <= 5
+
+
+def _state_ok(v, state_cleaned):
+    # clean_state() for auction payloads: a bare "WP" / "Wilayah Persekutuan" counts as missing
+    s = _text(v)
+    if state_cleaned:
+        s = re.sub(r"\b(w\.?p\.?|wilayah\s+persekutuan)\b", "", s, flags=re.I)
+        s = re.sub(r"[-_/.,\s]+", "", s)
+    return bool(s)
+
+
+def push_reasons(row, state_cleaned=False):
+    """
+    Failed-check bitmask (0 = eligible) of a listing row or scraped item keyed by column name.
+    state_cleaned: the table's push payloads run `state` through clean_state() (auction).
+    """
+    failed = []
+    if not _text(row.get("name")):
+        failed.append("property_name")
+    url = _text(row.get("url"))
+    if not url:
+        failed.append("listing_url")
+    elif not (url.startswith("http://") or url.startswith("https://")):
+        failed.append("listing_url_format")
+    if not _text(row.get("area")):
+        failed.append("area")
+    if not _state_ok(row.get("state"), state_cleaned):
+        failed.append("state")
+    if not _bedrooms_ok(row.get("bed_rooms")):
+        failed.append("no_of_bedroom")
+    if to_float_or_none(row.get("built_up_size")) is None:
+        failed.append("size")
+    lat = to_float_or_none(row.get("lat"))
+    lng = to_float_or_none(row.get("lng"))
+    if lat is None:
+        failed.append("latitude")
+    elif not -90 <= lat <= 90:
+        failed.append("latitude_range")
+    if lng is None:
+        failed.append("longitude")
+    elif not -180 <= lng <= 180:
+        failed.append("longitude_range")
+    return reasons_mask(failed)
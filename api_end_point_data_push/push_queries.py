@@ -0,0 +1,63 @@
+import os
+
+
+
+# ── Row selection of the push job, shared with database_schema/schema_manager.py's `explain`,
+# so the plans checked there are the ones api_platinum_deals.py runs.
+PENDING_WHERE = "api_update_status = 0 AND (next_retry_at IS NULL OR next_retry_at <= NOW())"
+# Pending rows nobody holds a lease on (claimed_by / claimed_until, schema v8)
+CLAIMABLE_WHERE = f"push_eligible = 1 AND {PENDING_WHERE} AND (claimed_until IS NULL OR claimed_until < NOW())"
+# Sent rows whose content changed since their last push (push_changed, schema v13)
+CHANGED_WHERE = ("push_eligible = 1 AND push_changed = 1 AND (next_retry_at IS NULL OR next_retry_at <= NOW()) "
+                 "AND (claimed_until IS NULL OR claimed_until < NOW())")
+
+# Push order: score = the source's weight (PUSH_WEIGHT_<LABEL>) + PRIORITY_AUCTION_WEIGHT per day an
+# upcoming auction is closer than PRIORITY_AUCTION_DAYS + PRIORITY_RECENCY_WEIGHT per day posted_date
+# is newer than PRIORITY_RECENCY_DAYS. With the defaults an auction next week (230) goes before a
+# listing posted today (30). The score depends on CURDATE(), so it is stored in push_priority
+# (schema v17) and refreshed at the start of every full pass rather than computed by the claim.
+PRIORITY_AUCTION_DAYS = int(os.getenv("PUSH_PRIORITY_AUCTION_DAYS", "30"))
+PRIORITY_AUCTION_WEIGHT = int(os.getenv("PUSH_PRIORITY_AUCTION_WEIGHT", "10"))
+PRIORITY_RECENCY_DAYS = int(os.getenv("PUSH_PRIORITY_RECENCY_DAYS", "30"))
+PRIORITY_RECENCY_WEIGHT = int(os.getenv("PUSH_PRIORITY_RECENCY_WEIGHT", "1"))
+
+# Rows whose stored push_priority is kept current, walked in list_id order on idx_push_eligible.
+# Changed rows are claimed in list_id order (idx_push_changed) and only ordered within a page.
+PRIORITY_REFRESH_WHERE = "push_eligible = 1 AND api_update_status = 0"
+
+
+def priority_sql(weight, has_auction_date):
+    """SQL expression for a row's push priority (higher goes first)."""
+    terms = [
+        str(int(weight)),
+        f"GREATEST(0, {PRIORITY_RECENCY_DAYS} - COALESCE(DATEDIFF(CURDATE(), posted_date), "
+        f"{PRIORITY_RECENCY_DAYS})) * {PRIORITY_RECENCY_WEIGHT}",
+    ]
+    if has_auction_date:
+        terms.append(
+            f"CASE WHEN auction_date >= CURDATE() THEN GREATEST(0, {PRIORITY_AUCTION_DAYS} - "
+            f"DATEDIFF(auction_date, CURDATE())) * {PRIORITY_AUCTION_WEIGHT} ELSE 0 END"
+        )
+    return " + ".join(terms)
+
+
+def claim_sql(table_name, columns, key=None, keyset=False, priority="0", where=CLAIMABLE_WHERE):
+    """
+    SELECT ... FOR UPDATE SKIP LOCKED for one claimed page; parameters are ([after] if keyset) + [limit].
+    Without a key, rows come highest stored push_priority first, straight off idx_push_priority
+    (schema v17), so only the page's rows are read and locked. With a key (ingest_seq, or list_id
+    for changed rows), rows come in key order (after the mark when keyset) and their priority is
+    computed from `priority`.
+    """
+    cols_sql = ", ".join(f"`{c}`" for c in columns)
+    if not key:
+        return (f"SELECT {cols_sql}, push_priority FROM `{table_name}` WHERE {where} "
+                f"ORDER BY push_priority DESC, list_id ASC LIMIT %s FOR UPDATE SKIP LOCKED")
+    after_sql = f"AND `{key}` > %s " if keyset else ""
+    return (f"SELECT {cols_sql}, ({priority}) AS push_priority FROM `{table_name}` WHERE {where} {after_sql}"
+            f"ORDER BY `{key}` ASC LIMIT %s FOR UPDATE SKIP LOCKED")
+
+
+def refresh_ids_sql(table_name, where):
+    """Next keyset chunk of list_ids whose push_priority is refreshed; parameters are (after list_id, limit)."""
+    return f"SELECT list_id FROM `{table_name}` WHERE {where} AND list_id > %s ORDER BY list_id ASC LIMIT %s"
@@ -0,0 +1,174 @@
+import time
+import random
+import datetime
+import threading
+from email.utils import parsedate_to_datetime
+
+
+
+# ── Adaptive token bucket shared by all push workers
+class TokenBucket:
+    """
+    Token bucket starting at `rate` tokens/s (up to `burst` saved up).
+    AIMD adaptation: every success adds `step` to the rate (up to max_rate), a throttle
+    multiplies it by `factor` (down to min_rate). Cuts happen at most once per `cut_interval`
+    seconds, so a burst of concurrent 429s counts as one signal.
+    A Retry-After from the server pauses every worker until it has passed.
+    """
+
+    def __init__(self, rate, burst=1.0, min_rate=0.2, max_rate=None, step=0.1, cut_interval=1.0):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate) if max_rate else self.rate
+        self.step = step
+        self.cut_interval = cut_interval
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._last_cut = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_for = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    wait_for = (1.0 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def on_throttle(self, retry_after=None, factor=0.5):
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now - self._last_cut < self.cut_interval:
+                return
+            self._last_cut = now
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * factor)
+            self._tokens = min(self._tokens, 0.0)
+
+
+
+
+# ── Circuit breaker: pause everybody after N consecutive failures
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; workers then wait `cooldown` seconds
+    before trying again. After `max_trips` pauses, the next opening aborts the run (rows stay pending).
+    """
+
+    def __init__(self, threshold=10, cooldown=120.0, max_trips=3):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.failures = 0
+        self.trips = 0
+        self.aborted = False
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self):
+        """Returns True when this failure opened the circuit."""
+        with self._lock:
+            if self.aborted:
+                return False
+            self.failures += 1
+            if self.failures < self.threshold or time.monotonic() < self._open_until:
+                return False
+            self.trips += 1
+            self.failures = self.threshold - 1  # half-open: one more failure re-opens
+            if self.trips > self.max_trips:
+                self.aborted = True
+            else:
+                self._open_until = time.monotonic() + self.cooldown
+            return True
+
+    def reset(self):
+        """Close the circuit and forget past trips (the daemon does this after a cooldown)."""
+        with self._lock:
+            self.failures = 0
+            self.trips = 0
+            self.aborted = False
+            self._open_until = 0.0
+
+    def abort(self):
+        """Stop the run now: every request would fail the same way (bad API key or URL)."""
+        with self._lock:
+            self.aborted = True
+
+    def wait_until_closed(self):
+        """Block while open. Returns False once the run has been aborted."""
+        while True:
+            with self._lock:
+                if self.aborted:
+                    return False
+                wait_for = self._open_until - time.monotonic()
+            if wait_for <= 0:
+                return True
+            time.sleep(min(wait_for, 5.0))
+
+
+
+
+# ── Retry helpers
+REJECTED_STATUSES = {400, 422}        # the payload itself is invalid: retrying it won't help
+FATAL_STATUSES = {401, 403, 404}      # bad API key or URL: every request would fail, so stop the run
+
+
+def classify_status(status):
+    """
+    What a push does with an HTTP status: "sent" (2xx), "rejected" (invalid payload, final),
+    "fatal" (stop the run, rows stay pending) or "retry" (429, 5xx and every other 4xx, e.g. 408 / 413).
+    """
+    if 200 <= status < 300:
+        return "sent"
+    if status in REJECTED_STATUSES:
+        return "rejected"
+    if status in FATAL_STATUSES:
+        return "fatal"
+    return "retry"
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^(attempt-1)))."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def parse_retry_after(value):
+    """Retry-After header -> seconds (float) or None. Accepts delta-seconds or an HTTP date."""
+    if value is None:
+        return None
+    s = str(value).strip()
+    if not s:
+        return None
+    try:
+        return max(0.0, float(s))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(s)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
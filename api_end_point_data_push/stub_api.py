@@ -0,0 +1,226 @@
+# stub_api.py
+#
+# Local stand-in for the Platinum Deals calculate-market-value endpoint, so api_platinum_deals.py
+# can be tested and benchmarked without sending real listings to app.propertylab.tech.
+#
+#   python stub_api.py --port 8799
+#   python stub_api.py --latency lognormal:0.2:0.6 --reject-rate 0.02 --throttle 300:15 --outage 900:60
+#
+# Then point the push job at it:
+#
+#   PLATINUM_DEALS_API_URL=http://127.0.0.1:8799/api/properties/platinum-deals/calculate-market-value \
+#       python api_platinum_deals.py
+#
+# Latency specs: fixed:S | uniform:LO:HI | exp:MEAN | lognormal:MEDIAN:SIGMA (seconds).
+# Payloads the real API refuses (missing fields, bedrooms outside 1..5, bad coordinates) get a 422
+# in the API's error shape ({"message": ..., "errors": {field: [msg, ...]}}), as does a random
+# --reject-rate share of the valid ones. --throttle EVERY:FOR answers 429 (with Retry-After) for FOR
+# seconds out of every EVERY, --outage EVERY:FOR answers 503 the same way. GET /stats returns counters.
+
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+ENDPOINT = "/api/properties/platinum-deals/calculate-market-value"
+
+REQUIRED = ["property_name", "listing_url", "area", "state", "price", "no_of_bedroom",
+            "size", "property_type", "longitude", "latitude", "type"]
+
+
+# =========================
+# Config
+# =========================
+def parse_latency(spec):
+    """'lognormal:0.2:0.6' -> function returning a delay in seconds."""
+    kind, *args = spec.split(":")
+    try:
+        args = [float(a) for a in args]
+        if kind == "fixed" and len(args) == 1:
+            return lambda: args[0]
+        if kind == "uniform" and len(args) == 2:
+            return lambda: random.uniform(args[0], args[1])
+        if kind == "exp" and len(args) == 1:
+            return lambda: random.expovariate(1.0 / args[0]) if args[0] > 0 else 0.0
+        if kind == "lognormal" and len(args) == 2:
+            return lambda: random.lognormvariate(math.log(args[0]), args[1])
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"bad latency spec {spec!r}")
+
+
+def parse_window(spec):
+    """'300:15' -> (every, duration) seconds; '' -> None."""
+    if not spec:
+        return None
+    try:
+        every, duration = (float(x) for x in spec.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad window spec {spec!r}, expected EVERY:FOR")
+    return every, duration
+
+
+class StubConfig:
+    def __init__(self, latency="fixed:0.05", reject_rate=0.0, throttle=None, outage=None, api_key=None):
+        self.latency = parse_latency(latency) if isinstance(latency, str) else latency
+        self.reject_rate = reject_rate
+        self.throttle = throttle   # (every, duration) or None
+        self.outage = outage
+        self.api_key = api_key
+        self.started = time.monotonic()
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def count(self, status):
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def in_window(self, window):
+        """Seconds left in the current window, 0 when outside. Windows start every `every` s, after the first one."""
+        if not window:
+            return 0.0
+        every, duration = window
+        t = (time.monotonic() - self.started) % every
+        return max(0.0, duration - t) if time.monotonic() - self.started >= every else 0.0
+
+
+# =========================
+# API behaviour
+# =========================
+def validation_errors(payload):
+    """field -> [messages], like the real API's validation (empty when the payload passes)."""
+    errors = {}
+    for field in REQUIRED:
+        value = payload.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            errors[field] = [f"The {field.replace('_', ' ')} field is required."]
+    br = payload.get("no_of_bedroom")
+    if "no_of_bedroom" not in errors and not (isinstance(br, int) and 1 <= br <= 5):
+        errors["no_of_bedroom"] = ["The no of bedroom must be between 1 and 5."]
+    lat, lng = payload.get("latitude"), payload.get("longitude")
+    if isinstance(lat, (int, float)) and not -90 <= lat <= 90:
+        errors["latitude"] = ["The latitude must be between -90 and 90."]
+    if isinstance(lng, (int, float)) and not -180 <= lng <= 180:
+        errors["longitude"] = ["The longitude must be between -180 and 180."]
+    url = payload.get("listing_url")
+    if isinstance(url, str) and url and not url.startswith(("http://", "https://")):
+        errors["listing_url"] = ["The listing url format is invalid."]
+    return errors
+
+
+def market_value_body(payload):
+    price = float(payload.get("price") or 0)
+    value = round(price * random.uniform(0.85, 1.15), 2)
+    return {
+        "status": "success",
+        "data": {
+            "market_value": value,
+            "below_market_value": value > price,
+            "price_per_sqft": round(value / float(payload["size"]), 2) if payload.get("size") else None,
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real server
+    config = None                   # StubConfig, set by make_server()
+
+    def _reply(self, status, body, headers=None):
+        out = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(out)
+        self.config.count(status)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, {"counts": self.config.counts, "uptime": time.monotonic() - self.config.started})
+        else:
+            self._reply(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        cfg = self.config
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.split("?")[0] != ENDPOINT:
+            return self._reply(404, {"message": "Not Found"})
+        time.sleep(max(0.0, cfg.latency()))
+
+        if cfg.api_key is not None and self.headers.get("Api-Key") != cfg.api_key:
+            return self._reply(401, {"message": "Unauthenticated."})
+        left = cfg.in_window(cfg.outage)
+        if left:
+            return self._reply(503, {"message": "Service Unavailable"})
+        left = cfg.in_window(cfg.throttle)
+        if left:
+            return self._reply(429, {"message": "Too Many Attempts."}, {"Retry-After": str(math.ceil(left))})
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, {"message": "Malformed JSON body."})
+
+        errors = validation_errors(payload)
+        if not errors and random.random() < cfg.reject_rate:
+            errors = {"property_type": ["The selected property type is invalid."]}
+        if errors:
+            return self._reply(422, {"message": "The given data was invalid.", "errors": errors})
+        self._reply(200, market_value_body(payload))
+
+    def log_message(self, format, *args):
+        pass   # one line per request would dominate a benchmark
+
+
+def make_server(config, host="127.0.0.1", port=0):
+    """ThreadingHTTPServer bound to (host, port); port 0 picks a free one (see server.server_port)."""
+    handler = type("BoundStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(config, host="127.0.0.1", port=0):
+    """Serve in a background thread; returns (server, endpoint URL)."""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, name="stub-api", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}{ENDPOINT}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Platinum Deals API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency", type=parse_latency, default="fixed:0.05",
+                        help="fixed:S | uniform:LO:HI | exp:MEAN | lognormal:MEDIAN:SIGMA (seconds)")
+    parser.add_argument("--reject-rate", type=float, default=0.0,
+                        help="share of valid payloads answered with a 422 anyway")
+    parser.add_argument("--throttle", type=parse_window, default=None, help="EVERY:FOR seconds of 429s")
+    parser.add_argument("--outage", type=parse_window, default=None, help="EVERY:FOR seconds of 503s")
+    parser.add_argument("--api-key", default=None, help="require this Api-Key header (401 otherwise)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    config = StubConfig(args.latency, args.reject_rate, args.throttle, args.outage, args.api_key)
+    server = make_server(config, args.host, args.port)
+    print(f"Stub Platinum Deals API on http://{args.host}:{server.server_port}{ENDPOINT}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(config.counts), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,681 @@
+# schema_manager.py
+#
+# Versioned DDL for the three listing tables.
+#
+#   python database_schema/schema_manager.py migrate   # apply pending migrations
+#   python database_schema/schema_manager.py status    # list applied / pending versions
+#   python database_schema/schema_manager.py explain   # EXPLAIN the consumer queries
+
+import os
+import sys
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+import pymysql
+from dotenv import load_dotenv, find_dotenv
+
+# The push job's claim SQL, so `explain` checks the statements it really runs
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api_end_point_data_push"))
+from push_queries import CHANGED_WHERE, PRIORITY_REFRESH_WHERE, priority_sql, claim_sql, refresh_ids_sql
+
+
+# =========================
+# Logging
+# =========================
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+)
+log = logging.getLogger("schema")
+
+
+# =========================
+# Load .env robustly (systemd-safe)
+# =========================
+dotenv_path = find_dotenv()
+if not dotenv_path:
+    dotenv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(dotenv_path, override=False)
+
+
+# =========================
+# Config
+# =========================
+MYSQL_HOST = os.getenv("MYSQL_HOST", "127.0.0.1")
+MYSQL_PORT = int(os.getenv("MYSQL_PORT", "3306"))
+MYSQL_USER = os.getenv("MYSQL_USER", "root")
+MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "")
+MYSQL_DB = os.getenv("MYSQL_DB", "property_listing")
+
+MIGRATIONS_TABLE = "schema_migrations"
+DESCRIPTION_TABLE = "listing-description"  # shared by all listing tables, see db_pipeline.py
+RESPONSE_TABLE = "platinum-deals-response"  # written by api_platinum_deals.py
+CLUSTER_TABLE = "listing-cluster"            # duplicate units across tables, see api_platinum_deals.py
+SYNC_STATE_TABLE = "sheet-sync-state"        # written by google_sheet_update.py
+ROW_INDEX_TABLE = "sheet-row-index"          # written by google_sheet_update.py
+
+
+# =========================
+# Table definitions
+# =========================
+# Column name -> MySQL type. Order follows COLUMNS in each scraper's db_pipeline.py.
+_BASE_COLUMNS = [
+    ("list_id", "VARCHAR(64) NOT NULL"),
+    ("name", "VARCHAR(255) NULL"),
+    ("url", "VARCHAR(1024) NULL"),
+    ("area", "VARCHAR(255) NULL"),
+    ("state", "VARCHAR(64) NULL"),
+    ("price", "DECIMAL(14,2) NULL"),
+    ("bed_rooms", "VARCHAR(16) NULL"),
+    ("built_up_size", "DECIMAL(12,2) NULL"),
+    ("posted_date", "DATE NULL"),
+    ("tenure", "VARCHAR(32) NULL"),
+    ("furnished_status", "VARCHAR(64) NULL"),
+    ("property_type", "VARCHAR(64) NULL"),
+    ("land_title", "VARCHAR(64) NULL"),
+    ("property_title_type", "VARCHAR(64) NULL"),
+    ("bumi_lot", "VARCHAR(64) NULL"),
+    ("built_up_price", "DECIMAL(12,2) NULL"),
+    ("occupancy", "VARCHAR(64) NULL"),
+    ("unit_type", "VARCHAR(64) NULL"),
+    ("lat", "DECIMAL(10,7) NULL"),
+    ("lng", "DECIMAL(10,7) NULL"),
+    ("description", "TEXT NULL"),
+    ("new_project", "TINYINT(1) NULL"),
+    ("auction", "TINYINT(1) NULL"),
+    ("below_market_value", "TINYINT(1) NULL"),
+    ("urgent", "TINYINT(1) NULL"),
+    ("agent_name", "VARCHAR(255) NULL"),
+    ("agency_name", "VARCHAR(255) NULL"),
+    ("website_name", "VARCHAR(64) NULL"),
+    ("data_scraping_date", "DATE NULL"),
+    ("api_update_status", "TINYINT NOT NULL DEFAULT 0"),
+    ("agent_profile_url", "VARCHAR(1024) NULL"),
+    ("parking", "DECIMAL(5,1) NULL"),
+    ("bath", "DECIMAL(5,1) NULL"),
+]
+
+# property-guru does not scrape land_title / unit_type / parking
+_GURU_SKIP = {"land_title", "unit_type", "parking"}
+
+TABLES = {
+    "iproperty-new-listing": list(_BASE_COLUMNS),
+    "iproperty-auction-listing": _BASE_COLUMNS + [("auction_date", "DATE NULL")],
+    "property-guru-new-listing": [c for c in _BASE_COLUMNS if c[0] not in _GURU_SKIP],
+}
+
+# Secondary indexes (name -> columns) every listing table should carry
+INDEXES = {
+    "idx_push_pending": ("api_update_status", "list_id"),   # api_platinum_deals.py fetch
+    "idx_data_scraping_date": ("data_scraping_date",),      # google_sheet_update.py daily sync
+}
+
+
+# =========================
+# Introspection helpers
+# =========================
+def _column_type(cur, table: str, column: str):
+    """Return information_schema DATA_TYPE (lowercase) for a column, or None if it doesn't exist."""
+    cur.execute(
+        """
+        SELECT DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """,
+        (table, column),
+    )
+    row = cur.fetchone()
+    return row["DATA_TYPE"].lower() if row else None
+
+
+def _column_is_nullable(cur, table: str, column: str) -> bool:
+    cur.execute(
+        """
+        SELECT IS_NULLABLE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """,
+        (table, column),
+    )
+    row = cur.fetchone()
+    return bool(row) and row["IS_NULLABLE"] == "YES"
+
+
+def _index_exists(cur, table: str, index: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+        """,
+        (table, index),
+    )
+    return cur.fetchone() is not None
+
+
+def _table_exists(cur, table: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (table,),
+    )
+    return cur.fetchone() is not None
+
+
+def _column_def(table: str, column: str) -> str:
+    return dict(TABLES[table])[column]
+
+
+# =========================
+# Migrations
+# =========================
+# Each migration is (version, name, fn(cur, table)) and runs once per database, for every table.
+# Steps inspect information_schema first, so they are no-ops on tables created by v1 and
+# only do work on tables that predate this module.
+
+def m001_create_tables(cur, table):
+    cols = ",\n    ".join(f"`{c}` {t}" for c, t in TABLES[table])
+    idx = ",\n    ".join(
+        f"KEY `{name}` (" + ", ".join(f"`{c}`" for c in cols_) + ")" for name, cols_ in INDEXES.items()
+    )
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{table}` (
+    {cols},
+    PRIMARY KEY (`list_id`),
+    {idx}
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+def m002_column_types(cur, table):
+    # posted_date used to be stored as '15 Sep 2025' text (no query args, so '%' needs no escaping).
+    # Anything else ('Posted today', ...) can't be converted and is set to NULL first, so the strict
+    # sql_mode can't abort the UPDATE half-way on it; the conversion itself runs with a relaxed
+    # sql_mode, which turns impossible dates ('31 Feb 2025') into NULL instead of an error.
+    if _column_type(cur, table, "posted_date") not in (None, "date"):
+        unparseable = (
+            f"`posted_date` IS NOT NULL AND `posted_date` NOT REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' "
+            f"AND `posted_date` NOT REGEXP '^[0-9]{{1,2}} [A-Za-z]{{3}} [0-9]{{4}}$'"
+        )
+        cur.execute(f"SELECT COUNT(*) AS n FROM `{table}` WHERE {unparseable}")
+        n = cur.fetchone()["n"]
+        if n:
+            log.warning(f"`{table}`: {n} posted_date values are not dates; setting them to NULL")
+            cur.execute(f"UPDATE `{table}` SET `posted_date` = NULL WHERE {unparseable}")
+        cur.execute("SET @schema_sql_mode = @@SESSION.sql_mode, SESSION sql_mode = ''")
+        try:
+            cur.execute(
+                f"""
+                UPDATE `{table}`
+                SET `posted_date` = DATE_FORMAT(STR_TO_DATE(`posted_date`, '%e %b %Y'), '%Y-%m-%d')
+                WHERE `posted_date` REGEXP '^[0-9]{{1,2}} [A-Za-z]{{3}} [0-9]{{4}}$'
+                """
+            )
+        finally:
+            cur.execute("SET SESSION sql_mode = @schema_sql_mode")
+        cur.execute(f"ALTER TABLE `{table}` MODIFY `posted_date` {_column_def(table, 'posted_date')}")
+
+    if _column_type(cur, table, "data_scraping_date") not in (None, "date"):
+        cur.execute(
+            f"ALTER TABLE `{table}` MODIFY `data_scraping_date` {_column_def(table, 'data_scraping_date')}"
+        )
+
+    if _column_type(cur, table, "price") not in (None, "decimal"):
+        cur.execute(f"ALTER TABLE `{table}` MODIFY `price` {_column_def(table, 'price')}")
+
+    # NOT NULL lets the push job filter on `api_update_status = 0` (one index range, no OR)
+    if _column_is_nullable(cur, table, "api_update_status"):
+        cur.execute(f"UPDATE `{table}` SET `api_update_status` = 0 WHERE `api_update_status` IS NULL")
+        cur.execute(
+            f"ALTER TABLE `{table}` MODIFY `api_update_status` {_column_def(table, 'api_update_status')}"
+        )
+
+
+def m003_primary_key(cur, table):
+    if _index_exists(cur, table, "PRIMARY"):
+        return
+    cur.execute(
+        f"SELECT COUNT(*) AS n FROM (SELECT `list_id` FROM `{table}` GROUP BY `list_id` HAVING COUNT(*) > 1) d"
+    )
+    dupes = cur.fetchone()["n"]
+    if dupes:
+        raise RuntimeError(
+            f"`{table}` has {dupes} duplicated list_id values; remove them before adding the primary key"
+        )
+    cur.execute(f"DELETE FROM `{table}` WHERE `list_id` IS NULL OR `list_id` = ''")
+    cur.execute(
+        f"ALTER TABLE `{table}` MODIFY `list_id` {_column_def(table, 'list_id')}, ADD PRIMARY KEY (`list_id`)"
+    )
+
+
+def m004_indexes(cur, table):
+    missing = [(n, c) for n, c in INDEXES.items() if not _index_exists(cur, table, n)]
+    if missing:
+        adds = ", ".join(
+            f"ADD INDEX `{n}` (" + ", ".join(f"`{c}`" for c in cols) + ")" for n, cols in missing
+        )
+        cur.execute(f"ALTER TABLE `{table}` {adds}")
+
+
+def m005_change_tracking(cur, table):
+    # Used by UPSERT_CHANGED_ONLY=1 in db_pipeline.py
+    adds = []
+    if _column_type(cur, table, "content_hash") is None:
+        adds.append("ADD COLUMN `content_hash` CHAR(32) NULL")
+    if _column_type(cur, table, "last_seen") is None:
+        adds.append("ADD COLUMN `last_seen` DATETIME NULL")
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+
+
+def m006_description_store(cur, table):
+    # body uses MySQL's COMPRESS() format; read it back with UNCOMPRESS(body)
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{DESCRIPTION_TABLE}` (
+            `description_hash` CHAR(32) NOT NULL PRIMARY KEY,
+            `body` MEDIUMBLOB NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """
+    )
+    if _column_type(cur, table, "description_hash") is None:
+        cur.execute(f"ALTER TABLE `{table}` ADD COLUMN `description_hash` CHAR(32) NULL AFTER `lng`")
+    if _column_type(cur, table, "description") is not None:
+        cur.execute(
+            f"""
+            INSERT IGNORE INTO `{DESCRIPTION_TABLE}` (`description_hash`, `body`)
+            SELECT MD5(`description`), COMPRESS(`description`) FROM `{table}` WHERE `description` IS NOT NULL
+            """
+        )
+        cur.execute(f"UPDATE `{table}` SET `description_hash` = MD5(`description`) WHERE `description` IS NOT NULL")
+        cur.execute(f"ALTER TABLE `{table}` DROP COLUMN `description`")
+
+
+def m007_push_state(cur, table):
+    # Used by api_platinum_deals.py: api_update_status 0=pending 1=sent 2=invalid 3=rejected
+    adds = []
+    if _column_type(cur, table, "push_attempts") is None:
+        adds.append("ADD COLUMN `push_attempts` SMALLINT NOT NULL DEFAULT 0")
+    if _column_type(cur, table, "push_last_error") is None:
+        adds.append("ADD COLUMN `push_last_error` VARCHAR(500) NULL")
+    if _column_type(cur, table, "next_retry_at") is None:
+        adds.append("ADD COLUMN `next_retry_at` DATETIME NULL")
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+
+
+def m008_push_leases(cur, table):
+    # Row leases so several api_platinum_deals.py workers can drain the backlog without double-posting
+    adds = []
+    if _column_type(cur, table, "claimed_by") is None:
+        adds.append("ADD COLUMN `claimed_by` VARCHAR(64) NULL")
+    if _column_type(cur, table, "claimed_until") is None:
+        adds.append("ADD COLUMN `claimed_until` DATETIME NULL")
+    if not _index_exists(cur, table, "idx_claimed_by"):
+        adds.append("ADD INDEX `idx_claimed_by` (`claimed_by`)")   # lease release at worker exit
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+
+
+def m009_response_store(cur, table):
+    # One row per pushed listing; payload_hash lets the push job skip unchanged payloads
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{RESPONSE_TABLE}` (
+            `source_table` VARCHAR(64) NOT NULL,
+            `list_id` VARCHAR(64) NOT NULL,
+            `payload_hash` CHAR(32) NOT NULL,
+            `http_status` SMALLINT NOT NULL,
+            `market_value` DECIMAL(14,2) NULL,
+            `response` JSON NULL,
+            `received_at` DATETIME NOT NULL,
+            PRIMARY KEY (`source_table`, `list_id`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+def m010_listing_clusters(cur, table):
+    # canonical_* points at the cluster's pushed listing (itself for canonical rows);
+    # duplicates get api_update_status = 4 in their listing table
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{CLUSTER_TABLE}` (
+            `source_table` VARCHAR(64) NOT NULL,
+            `list_id` VARCHAR(64) NOT NULL,
+            `canonical_table` VARCHAR(64) NOT NULL,
+            `canonical_list_id` VARCHAR(64) NOT NULL,
+            `lat` DECIMAL(10,7) NOT NULL,
+            `lng` DECIMAL(10,7) NOT NULL,
+            `price` DECIMAL(14,2) NULL,
+            `size` DECIMAL(12,2) NULL,
+            `bedrooms` TINYINT NULL,
+            PRIMARY KEY (`source_table`, `list_id`),
+            KEY `idx_canonical` (`canonical_table`, `canonical_list_id`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+def m011_ingest_seq(cur, table):
+    # Insert order for the push daemon's high-water mark (list_id is a string key, not monotonic)
+    if _column_type(cur, table, "ingest_seq") is None:
+        cur.execute(
+            f"ALTER TABLE `{table}` ADD COLUMN `ingest_seq` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT, "
+            f"ADD UNIQUE KEY `idx_ingest_seq` (`ingest_seq`)"
+        )
+
+
+def m012_push_eligibility(cur, table):
+    # Written by the scrapers at ingest; existing rows start eligible until
+    # `api_platinum_deals.py --recheck-eligibility` has evaluated them
+    adds = []
+    if _column_type(cur, table, "push_eligible") is None:
+        adds.append("ADD COLUMN `push_eligible` TINYINT(1) NOT NULL DEFAULT 1")
+    if _column_type(cur, table, "push_reasons") is None:
+        adds.append("ADD COLUMN `push_reasons` SMALLINT UNSIGNED NOT NULL DEFAULT 0")
+    if not _index_exists(cur, table, "idx_push_eligible"):
+        adds.append("ADD INDEX `idx_push_eligible` (`push_eligible`, `api_update_status`, `list_id`)")
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+
+
+def m013_change_repush(cur, table):
+    # updated_at moves when the scrapers' change-aware upsert (UPSERT_CHANGED_ONLY=1) sees new content,
+    # last_push_at when the push job sends the row; push_changed is the indexed form of
+    # (sent AND updated_at > last_push_at), the rows api_platinum_deals.py considers re-pushing
+    adds = []
+    if _column_type(cur, table, "updated_at") is None:
+        adds.append("ADD COLUMN `updated_at` DATETIME NULL DEFAULT CURRENT_TIMESTAMP")
+    if _column_type(cur, table, "last_push_at") is None:
+        adds.append("ADD COLUMN `last_push_at` DATETIME NULL")
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+    # Rows sent before v13 count as pushed as of now, so only later changes re-push them
+    cur.execute(
+        f"UPDATE `{table}` SET `last_push_at` = `updated_at` "
+        f"WHERE `api_update_status` = 1 AND `last_push_at` IS NULL"
+    )
+    if _column_type(cur, table, "push_changed") is None:
+        cur.execute(
+            f"ALTER TABLE `{table}` ADD COLUMN `push_changed` TINYINT(1) "
+            f"AS (`api_update_status` = 1 AND `updated_at` > `last_push_at`) VIRTUAL, "
+            f"ADD INDEX `idx_push_changed` (`push_changed`, `list_id`)"
+        )
+    # Hash of the valuation fields of the last sent payload, next to its full payload_hash
+    if _column_type(cur, RESPONSE_TABLE, "material_hash") is None:
+        cur.execute(f"ALTER TABLE `{RESPONSE_TABLE}` ADD COLUMN `material_hash` CHAR(32) NULL AFTER `payload_hash`")
+
+
+def m014_sheet_sync_state(cur, table):
+    # One row per sheet tab: ingest_seq high-water mark of the rows appended so far and the last row written
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{SYNC_STATE_TABLE}` (
+            `spreadsheet_id` VARCHAR(128) NOT NULL,
+            `sheet_name` VARCHAR(100) NOT NULL,
+            `source_table` VARCHAR(64) NOT NULL,
+            `last_seq` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+            `last_row` INT UNSIGNED NOT NULL DEFAULT 1,
+            `reconciled_at` DATETIME NULL,
+            `updated_at` DATETIME NOT NULL,
+            PRIMARY KEY (`spreadsheet_id`, `sheet_name`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+
+
+def m015_sheet_row_index(cur, table):
+    # list_id -> sheet row of every listing on a tab, with a hash of the values last written there,
+    # so google_sheet_update.py can rewrite changed rows in place
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{ROW_INDEX_TABLE}` (
+            `spreadsheet_id` VARCHAR(128) NOT NULL,
+            `sheet_name` VARCHAR(100) NOT NULL,
+            `list_id` VARCHAR(64) NOT NULL,
+            `row_num` INT UNSIGNED NOT NULL,
+            `values_hash` CHAR(32) NULL,
+            PRIMARY KEY (`spreadsheet_id`, `sheet_name`, `list_id`),
+            KEY `idx_row_num` (`spreadsheet_id`, `sheet_name`, `row_num`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+    )
+    if _column_type(cur, SYNC_STATE_TABLE, "changed_at") is None:
+        cur.execute(f"ALTER TABLE `{SYNC_STATE_TABLE}` ADD COLUMN `changed_at` DATETIME NULL AFTER `last_row`")
+    # Changed-row scan: updated_at > mark OR last_push_at > mark (index merge of the two)
+    adds = []
+    if not _index_exists(cur, table, "idx_updated_at"):
+        adds.append("ADD INDEX `idx_updated_at` (`updated_at`)")
+    if not _index_exists(cur, table, "idx_last_push_at"):
+        adds.append("ADD INDEX `idx_last_push_at` (`last_push_at`)")
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+
+
+def m016_sheet_backfill_state(cur, table):
+    # google_sheet_update.py --from/--to: range being backfilled into each tab and its keyset cursor
+    # (data_scraping_date, list_id), so an interrupted backfill resumes after the last row written.
+    # The scan itself uses idx_data_scraping_date, which InnoDB extends with the list_id primary key.
+    adds = []
+    for column, definition in [
+        ("backfill_from", "DATE NULL"),
+        ("backfill_to", "DATE NULL"),
+        ("backfill_date", "DATE NULL"),
+        ("backfill_list_id", "VARCHAR(64) NULL"),
+        ("backfill_done_at", "DATETIME NULL"),
+    ]:
+        if _column_type(cur, SYNC_STATE_TABLE, column) is None:
+            adds.append(f"ADD COLUMN `{column}` {definition}")
+    if adds:
+        cur.execute(f"ALTER TABLE `{SYNC_STATE_TABLE}` " + ", ".join(adds))
+
+
+def m017_push_priority(cur, table):
+    # Stored push priority (api_platinum_deals.py refreshes it every full pass; it moves with CURDATE(),
+    # so it can't be a generated column). The claim reads this index in order and stops after one page
+    # instead of sorting every pending row under FOR UPDATE; push_priority is DESC in the index so that
+    # ORDER BY push_priority DESC, list_id ASC needs no filesort (MySQL 8.0 descending index).
+    adds = []
+    if _column_type(cur, table, "push_priority") is None:
+        adds.append("ADD COLUMN `push_priority` INT NOT NULL DEFAULT 0")
+    if not _index_exists(cur, table, "idx_push_priority"):
+        adds.append(
+            "ADD INDEX `idx_push_priority` (`api_update_status`, `push_eligible`, `push_priority` DESC, `list_id`)"
+        )
+    if adds:
+        cur.execute(f"ALTER TABLE `{table}` " + ", ".join(adds))
+
+
+def m018_sheet_archive_state(cur, table):
+    # google_sheet_update.py moving rows to ARCHIVE_SPREADSHEET_ID: the archive tab's last row in use and the
+    # move in progress (rows 2..archive_pending+1 of the tab, archive_copied of them written so far), so the
+    # archive is written at explicit rows and a move interrupted before its delete is finished, not repeated
+    adds = []
+    for column, definition in [
+        ("archive_spreadsheet_id", "VARCHAR(128) NULL"),
+        ("archive_row", "INT UNSIGNED NULL"),
+        ("archive_pending", "INT UNSIGNED NOT NULL DEFAULT 0"),
+        ("archive_copied", "INT UNSIGNED NOT NULL DEFAULT 0"),
+    ]:
+        if _column_type(cur, SYNC_STATE_TABLE, column) is None:
+            adds.append(f"ADD COLUMN `{column}` {definition}")
+    if adds:
+        cur.execute(f"ALTER TABLE `{SYNC_STATE_TABLE}` " + ", ".join(adds))
+
+
+MIGRATIONS = [
+    (1, "create listing tables", m001_create_tables),
+    (2, "typed posted_date / data_scraping_date / price, NOT NULL api_update_status", m002_column_types),
+    (3, "primary key on list_id", m003_primary_key),
+    (4, "indexes for push and sheet queries", m004_indexes),
+    (5, "content_hash / last_seen for change-aware upserts", m005_change_tracking),
+    (6, "move description to compressed, content-addressed listing-description", m006_description_store),
+    (7, "per-row push state: attempts, last error, next retry", m007_push_state),
+    (8, "push row leases: claimed_by / claimed_until", m008_push_leases),
+    (9, "platinum-deals-response: stored API responses", m009_response_store),
+    (10, "listing-cluster: cross-portal duplicate units", m010_listing_clusters),
+    (11, "ingest_seq insert order for the push daemon", m011_ingest_seq),
+    (12, "push_eligible / push_reasons computed at ingest", m012_push_eligibility),
+    (13, "updated_at / last_push_at / push_changed for re-pushing changed listings", m013_change_repush),
+    (14, "sheet-sync-state: incremental Google Sheet sync marks", m014_sheet_sync_state),
+    (15, "sheet-row-index: in-place Google Sheet updates of changed listings", m015_sheet_row_index),
+    (16, "sheet-sync-state: resumable --from/--to backfill cursor", m016_sheet_backfill_state),
+    (17, "stored push_priority + claim index", m017_push_priority),
+    (18, "sheet-sync-state: resumable moves to the archive spreadsheet", m018_sheet_archive_state),
+]
+
+
+# =========================
+# Consumer queries (kept in sync with the scripts that run them)
+# =========================
+def consumer_queries():
+    """(label, sql, params) for the hot read paths of the push and sheet jobs."""
+    today = datetime.now().date()
+    queries = []
+    for table, columns in TABLES.items():
+        priority = priority_sql(0, has_auction_date=any(c == "auction_date" for c, _ in columns))
+        queries.append((f"push pending: {table}", claim_sql(table, ["list_id"]), (500,)))
+        queries.append((
+            f"push daemon poll: {table}",
+            claim_sql(table, ["list_id"], key="ingest_seq", keyset=True, priority=priority),
+            (0, 500),
+        ))
+        queries.append((
+            f"push changed: {table}",
+            claim_sql(table, ["list_id"], key="list_id", keyset=True, priority=priority, where=CHANGED_WHERE),
+            ("", 500),
+        ))
+        queries.append((f"push priority refresh: {table}", refresh_ids_sql(table, PRIORITY_REFRESH_WHERE), ("", 1000)))
+        queries.append((
+            f"sheet incremental: {table}",
+            f"SELECT * FROM `{table}` WHERE `ingest_seq` > %s AND `data_scraping_date` >= %s "
+            f"ORDER BY `ingest_seq` ASC",
+            (0, today - timedelta(days=7)),
+        ))
+        queries.append((
+            f"sheet changed: {table}",
+            f"SELECT t.list_id, x.row_num, x.values_hash FROM `{table}` t "
+            f"JOIN `{ROW_INDEX_TABLE}` x ON x.spreadsheet_id = %s AND x.sheet_name = %s AND x.list_id = t.list_id "
+            f"WHERE t.updated_at > %s OR t.last_push_at > %s",
+            ("", table, today, today),
+        ))
+        queries.append((
+            f"sheet backfill: {table}",
+            f"SELECT list_id FROM `{table}` WHERE `data_scraping_date` >= %s AND `data_scraping_date` < %s "
+            f"AND (`data_scraping_date` > %s OR (`data_scraping_date` = %s AND list_id > %s)) "
+            f"ORDER BY `data_scraping_date` ASC, list_id ASC LIMIT %s",
+            (today - timedelta(days=30), today, today - timedelta(days=30), today - timedelta(days=30), "", 2000),
+        ))
+        queries.append((
+            f"sheet daily: {table}",
+            f"SELECT * FROM `{table}` WHERE `data_scraping_date` >= %s AND `data_scraping_date` < %s",
+            (today, today + timedelta(days=1)),
+        ))
+    return queries
+
+
+# =========================
+# Commands
+# =========================
+def connect():
+    return pymysql.connect(
+        host=MYSQL_HOST,
+        port=MYSQL_PORT,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database=MYSQL_DB,
+        charset="utf8mb4",
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True,  # DDL commits implicitly anyway
+    )
+
+
+def _ensure_migrations_table(cur):
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS `{MIGRATIONS_TABLE}` (
+            `version` INT NOT NULL PRIMARY KEY,
+            `name` VARCHAR(255) NOT NULL,
+            `applied_at` DATETIME NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """
+    )
+
+
+def applied_versions(cur) -> set:
+    _ensure_migrations_table(cur)
+    cur.execute(f"SELECT version FROM `{MIGRATIONS_TABLE}`")
+    return {r["version"] for r in cur.fetchall()}
+
+
+def migrate(connection):
+    with connection.cursor() as cur:
+        done = applied_versions(cur)
+        pending = [m for m in MIGRATIONS if m[0] not in done]
+        if not pending:
+            log.info("Schema is up to date.")
+            return
+        for version, name, fn in pending:
+            log.info(f"Applying v{version}: {name}")
+            for table in TABLES:
+                if version > 1 and not _table_exists(cur, table):
+                    continue
+                fn(cur, table)
+            cur.execute(
+                f"INSERT INTO `{MIGRATIONS_TABLE}` (version, name, applied_at) VALUES (%s, %s, NOW())",
+                (version, name),
+            )
+            log.info(f"v{version} applied.")
+
+
+def status(connection):
+    with connection.cursor() as cur:
+        done = applied_versions(cur)
+    for version, name, _ in MIGRATIONS:
+        mark = "applied" if version in done else "PENDING"
+        print(f"v{version:<3} {mark:<8} {name}")
+
+
+def explain(connection):
+    """Print EXPLAIN output for each consumer query; flags full scans (type=ALL)."""
+    with connection.cursor() as cur:
+        for label, sql, params in consumer_queries():
+            try:
+                cur.execute("EXPLAIN " + sql, params)
+                plan = cur.fetchall()
+            except Exception as e:
+                print(f"{label}\n  EXPLAIN failed: {type(e).__name__}: {e}")
+                continue
+            print(label)
+            for p in plan:
+                warn = "  <-- full table scan" if p.get("type") == "ALL" else ""
+                print(
+                    f"  table={p.get('table')} type={p.get('type')} key={p.get('key')} "
+                    f"rows={p.get('rows')} extra={p.get('Extra')}{warn}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create, migrate and inspect the listing tables.")
+    parser.add_argument("command", choices=["migrate", "status", "explain"])
+    args = parser.parse_args()
+
+    try:
+        connection = connect()
+        log.info(f"Connected to MySQL {MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}")
+    except Exception:
+        log.exception("Failed to connect to MySQL")
+        sys.exit(1)
+
+    try:
+        {"migrate": migrate, "status": status, "explain": explain}[args.command](connection)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
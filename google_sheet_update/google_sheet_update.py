@@ -2,12 +2,18 @@
 
 import os
 import sys
+import json
+import time
+import hashlib
+import random
 import logging
+import argparse
 from decimal import Decimal
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
 
 import pymysql
+from pymysql.constants import FIELD_TYPE
 from dotenv import load_dotenv, find_dotenv
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
@@ -54,18 +60,63 @@ TABLES = {
     "property-guru-new-listing": "property-guru-new-listing",
 }
 
+# Listing rows keep only `description_hash`; the (compressed) text lives here
+DESCRIPTION_TABLE = "listing-description"
+
+# Platinum Deals API responses written by api_platinum_deals.py (one row per pushed listing)
+RESPONSE_TABLE = "platinum-deals-response"
+
 # Column in MySQL that stores the scraping timestamp/date
-DATE_COLUMN = "data_scraping_date"  # uses DATE() on this column in the WHERE clause
+DATE_COLUMN = "data_scraping_date"  # filtered with a half-open range so its index can be used
 
-# Timezone-aware "today" (Asia/Dhaka)
-dhaka_today = datetime.now(ZoneInfo("Asia/Dhaka")).date()
-dhaka_today_str = dhaka_today.strftime("%Y-%m-%d")
+# Incremental sync: per tab, SYNC_STATE_TABLE records the high-water mark of the rows appended so far
+# on the indexed insert-order column (schema v11) and the last sheet row written (schema v14). A run
+# appends the rows inserted after the mark, scraped at most SYNC_MAX_AGE_DAYS ago (bulk backfills of old
+# listings stay off the sheet), without reading the sheet. A tab without state, or every tab with
+# --reconcile, falls back to reading its whole list_id column and appending today's missing rows.
+# ingest_seq values are taken at insert but become visible at commit, so a row can show up below a mark
+# that was already taken: each run re-scans SHEET_SEQ_LOOKBACK seqs below the mark, and the row index
+# anti-join leaves out the ones already on the tab.
+SYNC_STATE_TABLE = "sheet-sync-state"
+SEQ_COLUMN = "ingest_seq"
+SYNC_MAX_AGE_DAYS = int(os.getenv("SHEET_SYNC_MAX_AGE_DAYS", "7"))
+SHEET_SEQ_LOOKBACK = int(os.getenv("SHEET_SEQ_LOOKBACK", "5000"))
 
-# dhaka_today_str = "2025-09-28"
+# In-place updates: ROW_INDEX_TABLE maps each list_id on a tab to its sheet row, with a hash of the
+# values written there (schema v15). Rows of the index whose listing moved `updated_at` (content
+# changed) or `last_push_at` (pushed, new market_value) since the tab's changed_at mark are re-read,
+# and the ones whose sheet values differ are rewritten in place. The scan starts
+# SHEET_CHANGE_LOOKBACK_SECS before the mark, for transactions still open when it was taken.
+# Listings moved off a tab (archived, rolled over) keep their entry with row_num 0, so they are not
+# appended again. --reconcile rebuilds a tab's live entries from its list_id column.
+ROW_INDEX_TABLE = "sheet-row-index"
+SHEET_CHANGE_LOOKBACK_SECS = int(os.getenv("SHEET_CHANGE_LOOKBACK_SECS", "300"))
 
+# Sheets API usage per run: one metadata read, one batchGet for all header rows (plus one for the
+# list_id columns of tabs being reconciled), at most one grid resize, and the rows of all tabs written
+# with values().batchUpdate in requests of at most SHEETS_MAX_REQUEST_BYTES (Google recommends <= 2 MB).
+# 429 and 5xx answers are retried with jittered exponential backoff.
+SHEETS_MAX_REQUEST_BYTES = int(os.getenv("SHEETS_MAX_REQUEST_BYTES", "2000000"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "6"))
+SHEETS_BACKOFF_BASE = 2.0
+SHEETS_BACKOFF_CAP = 64.0
+SHEETS_ROW_SLACK = 1000   # rows added beyond what a write needs when a tab's grid is grown
 
+# Capacity: Google Sheets caps a spreadsheet at 10M cells (rows x columns of every tab's grid, whatever the tab).
+# Rows leave the live spreadsheet by moving to the same-named tab of ARCHIVE_SPREADSHEET_ID, SHEET_ARCHIVE_CHUNK
+# rows per request, written at explicit rows of the archive (schema v18) so a retried or resumed move never
+# duplicates them. With --archive-days N (or SHEET_ARCHIVE_DAYS) the leading rows of listings scraped more than
+# N days ago are moved; a tab whose grid reaches SHEET_TAB_MAX_CELLS has all its rows moved (rolled over), and
+# so do the biggest tabs while the whole spreadsheet is at SHEET_SPREADSHEET_MAX_CELLS.
+SHEET_TAB_MAX_CELLS = int(os.getenv("SHEET_TAB_MAX_CELLS", "2000000"))
+SHEET_SPREADSHEET_MAX_CELLS = int(os.getenv("SHEET_SPREADSHEET_MAX_CELLS", "9000000"))
+ARCHIVE_SPREADSHEET_ID = os.getenv("ARCHIVE_SPREADSHEET_ID", "")
+SHEET_ARCHIVE_DAYS = int(os.getenv("SHEET_ARCHIVE_DAYS", "0"))
+SHEET_ARCHIVE_CHUNK = int(os.getenv("SHEET_ARCHIVE_CHUNK", "5000"))
 
-log.info(f"Using Asia/Dhaka current date: {dhaka_today_str}")
+# Backfill (--from/--to): rows of a date range in keyset chunks of SHEET_BACKFILL_CHUNK, ordered by
+# (data_scraping_date, list_id); the cursor is stored per tab after every chunk (schema v16)
+SHEET_BACKFILL_CHUNK = int(os.getenv("SHEET_BACKFILL_CHUNK", "2000"))
 
 
 
@@ -104,13 +155,69 @@ def normalize_header_name(h: str) -> str:
     return h.strip().lower().replace(" ", "_")
 
 
-def get_sheet_headers(svc, sheet_name: str):
-    """Fetch header row (row 1). Return list of header strings or [] if missing."""
-    res = svc.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=f"{sheet_name}!1:1"
-    ).execute()
-    values = res.get("values", [])
-    headers = values[0] if values else []
+def dhaka_today() -> date:
+    """Timezone-aware "today" (Asia/Dhaka), read when a run starts."""
+    return datetime.now(ZoneInfo("Asia/Dhaka")).date()
+
+
+def parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad date {value!r}, expected YYYY-MM-DD")
+
+
+def a1(sheet_name: str, ref: str) -> str:
+    """A1 range on a tab, quoted so any tab name works: 'my tab'!A1:C9."""
+    return "'" + sheet_name.replace("'", "''") + "'!" + ref
+
+
+def sheets_call(request, what: str):
+    """Execute a Sheets API request, retrying 429 / 5xx with full-jitter exponential backoff."""
+    for attempt in range(1, SHEETS_MAX_RETRIES + 1):
+        try:
+            return request.execute()
+        except HttpError as e:
+            status = int(getattr(getattr(e, "resp", None), "status", 0) or 0)
+            retryable = status == 429 or status >= 500
+            if not retryable or attempt == SHEETS_MAX_RETRIES:
+                raise
+            delay = random.uniform(0, min(SHEETS_BACKOFF_CAP, SHEETS_BACKOFF_BASE * 2 ** (attempt - 1)))
+            log.warning(f"{what}: HTTP {status}, retry {attempt}/{SHEETS_MAX_RETRIES - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def get_sheet_properties(svc, spreadsheet_id: str = SPREADSHEET_ID) -> dict:
+    """title -> {sheetId, rows, cols} for every tab of the spreadsheet (one metadata read)."""
+    res = sheets_call(
+        svc.spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            fields="sheets.properties(sheetId,title,gridProperties(rowCount,columnCount))",
+        ),
+        "read spreadsheet metadata",
+    )
+    props = {}
+    for sheet in res.get("sheets", []):
+        p = sheet["properties"]
+        grid = p.get("gridProperties", {})
+        props[p["title"]] = {"sheetId": p["sheetId"], "rows": grid.get("rowCount", 0), "cols": grid.get("columnCount", 0)}
+    return props
+
+
+def get_all_headers(svc, sheet_names: list) -> dict:
+    """Header row (row 1) of several tabs in one batchGet: title -> list of header strings ([] if missing)."""
+    if not sheet_names:
+        return {}
+    res = sheets_call(
+        svc.spreadsheets().values().batchGet(
+            spreadsheetId=SPREADSHEET_ID, ranges=[a1(name, "1:1") for name in sheet_names]
+        ),
+        "read header rows",
+    )
+    headers = {}
+    for name, vr in zip(sheet_names, res.get("valueRanges", [])):
+        values = vr.get("values", [])
+        headers[name] = values[0] if values else []
     return headers
 
 
@@ -123,19 +230,13 @@ def find_list_id_col_index(headers: list) -> int:
         return 0  # fallback to first column if not found
 
 
-def get_existing_ids(svc, sheet_name: str, list_id_col_idx: int) -> set:
-    """Read entire list_id column (skip header) and return a set of string IDs."""
-    col_letter = col_index_to_letter(list_id_col_idx)
-    rng = f"{sheet_name}!{col_letter}:{col_letter}"
-    res = svc.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=rng
-    ).execute()
-    rows = res.get("values", [])
+def _ids_from_column(rows: list):
+    """({string ID: sheet row}, number of the last row) from a list_id column read, header included."""
     if not rows:
-        return set()
+        return {}, 1
 
     # Skip header (row 1). Subsequent rows may be shorter lists (Sheets API quirk)
-    existing = set()
+    existing = {}
     for i, row in enumerate(rows, start=1):
         if i == 1:
             continue  # header
@@ -146,31 +247,877 @@ def get_existing_ids(svc, sheet_name: str, list_id_col_idx: int) -> set:
             continue
         s = str(cell).strip()
         if s:
-            existing.add(s)
-    return existing
-
-
-def row_to_sheet_values(row: dict, headers: list) -> list:
-    """Map a DB row dict into a list matching the sheet's header order."""
-    values = []
-    for h in headers:
-        key = h  # assume DB keys match sheet header names
-        # Try exact header key first
-        v = row.get(key)
-        if v is None:
-            # Try normalized matching (very light heuristic)
-            # e.g., 'list_id' header vs 'list_id' key is fine; or 'List ID' header vs 'list_id' key
-            norm_key = normalize_header_name(key)
-            # Try a direct hit on normalized keys of the dict
-            v = next((row[k] for k in row.keys() if normalize_header_name(k) == norm_key), None)
-        values.append(normalize_value(v))
-    return values
+            existing.setdefault(s, i)   # a list_id on several rows: the first one is kept up to date
+    return existing, len(rows)
+
+
+def get_existing_ids(svc, list_id_cols: dict) -> dict:
+    """Read the entire list_id column of several tabs ({title: column index}) in one batchGet.
+    Returns title -> ({string ID: sheet row}, number of the last row)."""
+    if not list_id_cols:
+        return {}
+    names = list(list_id_cols)
+    ranges = []
+    for name in names:
+        col_letter = col_index_to_letter(list_id_cols[name])
+        ranges.append(a1(name, f"{col_letter}:{col_letter}"))
+    res = sheets_call(
+        svc.spreadsheets().values().batchGet(spreadsheetId=SPREADSHEET_ID, ranges=ranges),
+        "read list_id columns",
+    )
+    return {name: _ids_from_column(vr.get("values", [])) for name, vr in zip(names, res.get("valueRanges", []))}
+
+
+# Cell converters by MySQL column type, picked once per query from the cursor description
+# (normalize_value for the types not listed, or when the driver reports none)
+def _cell_float(v):
+    return "" if v is None else float(v)
+
+
+def _cell_datetime(v):
+    return "" if v is None else v.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _cell_date(v):
+    return "" if v is None else v.strftime("%Y-%m-%d")
+
+
+def _cell_plain(v):
+    return "" if v is None else v
+
+
+CELL_CONVERTERS = {
+    FIELD_TYPE.DECIMAL: _cell_float,
+    FIELD_TYPE.NEWDECIMAL: _cell_float,
+    FIELD_TYPE.DATETIME: _cell_datetime,
+    FIELD_TYPE.TIMESTAMP: _cell_datetime,
+    FIELD_TYPE.DATE: _cell_date,
+    FIELD_TYPE.TINY: _cell_plain,
+    FIELD_TYPE.SHORT: _cell_plain,
+    FIELD_TYPE.LONG: _cell_plain,
+    FIELD_TYPE.LONGLONG: _cell_plain,
+    FIELD_TYPE.INT24: _cell_plain,
+    FIELD_TYPE.DOUBLE: _cell_plain,
+    FIELD_TYPE.FLOAT: _cell_plain,
+    FIELD_TYPE.VARCHAR: _cell_plain,
+    FIELD_TYPE.VAR_STRING: _cell_plain,
+    FIELD_TYPE.STRING: _cell_plain,
+}
+
+
+def table_columns(connection, table: str) -> list:
+    """Column names of `table`, in table order (from an empty result, so nothing is read)."""
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT * FROM `{table}` LIMIT 0")
+        return [d[0] for d in cur.description]
+
+
+class Projection:
+    """
+    A tab's header row resolved once against its source table: the SELECT list (only the columns the
+    sheet shows, plus list_id, ingest_seq and the scraping date) and, per sheet column, the position of its value in the
+    result tuple. Headers match a DB column exactly or after normalize_header_name; `description` and
+    `market_value` come from joined tables; anything else stays an empty cell.
+    """
+
+    def __init__(self, table: str, headers: list, columns: list):
+        # Description text and the API market value are only joined in when the sheet has those columns.
+        joined = {
+            "description": ("CONVERT(UNCOMPRESS(d.`body`) USING utf8mb4)",
+                            f"LEFT JOIN `{DESCRIPTION_TABLE}` d ON d.`description_hash` = t.`description_hash`"),
+            "market_value": ("r.`market_value`",
+                             f"LEFT JOIN `{RESPONSE_TABLE}` r ON r.`source_table` = '{table}' AND r.`list_id` = t.`list_id`"),
+        }
+        by_norm = {}
+        for c in columns:
+            by_norm.setdefault(normalize_header_name(c), c)
+
+        self.select = ["t.`list_id`", f"t.`{SEQ_COLUMN}`", f"t.`{DATE_COLUMN}`"]   # positions 0, 1, 2
+        self.joins = []
+        self.headers = headers
+        self.unmatched = []
+        exprs = {e: i for i, e in enumerate(self.select)}   # SELECT expression -> position in the result tuple
+        self.positions = []
+        for h in headers:
+            norm = normalize_header_name(h)
+            if norm in joined:
+                expr, join = joined[norm]
+                if join not in self.joins:
+                    self.joins.append(join)
+            else:
+                col = h if h in columns else by_norm.get(norm)
+                if col is None:
+                    self.unmatched.append(h)
+                    self.positions.append(None)
+                    continue
+                expr = f"t.`{col}`"
+            if expr not in exprs:
+                exprs[expr] = len(self.select)
+                self.select.append(expr)
+            self.positions.append(exprs[expr])
+        self.cells = None
+
+    def compile(self, description):
+        """Bind a converter to each sheet column from the result's column types."""
+        types = [d[1] for d in description] if description else [None] * len(self.select)
+        blank = (0, lambda v: "")
+        self.cells = [blank if p is None else (p, CELL_CONVERTERS.get(types[p], normalize_value))
+                      for p in self.positions]
+
+    def row_values(self, row: tuple) -> list:
+        """A result tuple as the tab's row, in header order."""
+        return [conv(row[p]) for p, conv in self.cells]
+
+
+def load_sync_state(connection, sheet_name: str):
+    """The tab's sync state row (last_seq, last_row, ...) or None if it was never synced incrementally."""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT * FROM `{SYNC_STATE_TABLE}` WHERE `spreadsheet_id` = %s AND `sheet_name` = %s",
+            (SPREADSHEET_ID, sheet_name),
+        )
+        return cur.fetchone()
+
+
+def save_sync_state(connection, sheet_name: str, table: str, last_seq: int, last_row: int,
+                    changed_at, reconciled: bool):
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO `{SYNC_STATE_TABLE}`
+                (`spreadsheet_id`, `sheet_name`, `source_table`, `last_seq`, `last_row`, `changed_at`,
+                 `reconciled_at`, `updated_at`)
+            VALUES (%s, %s, %s, %s, %s, %s, IF(%s, NOW(), NULL), NOW())
+            ON DUPLICATE KEY UPDATE `source_table` = VALUES(`source_table`), `last_seq` = VALUES(`last_seq`),
+                `last_row` = VALUES(`last_row`), `changed_at` = VALUES(`changed_at`),
+                `reconciled_at` = IFNULL(VALUES(`reconciled_at`), `reconciled_at`), `updated_at` = NOW()
+            """,
+            (SPREADSHEET_ID, sheet_name, table, last_seq, last_row, changed_at, reconciled),
+        )
+    connection.commit()
+
+
+def save_backfill_state(connection, sheet_name: str, last_row: int, date_from: date, date_to: date,
+                        after, done: bool = False):
+    """Store a tab's backfill range, its (data_scraping_date, list_id) cursor and the last sheet row written."""
+    after_date, after_id = after if after is not None else (None, None)
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            UPDATE `{SYNC_STATE_TABLE}`
+            SET `last_row` = %s, `backfill_from` = %s, `backfill_to` = %s, `backfill_date` = %s,
+                `backfill_list_id` = %s, `backfill_done_at` = IF(%s, NOW(), NULL), `updated_at` = NOW()
+            WHERE `spreadsheet_id` = %s AND `sheet_name` = %s
+            """,
+            (last_row, date_from, date_to, after_date, after_id, done, SPREADSHEET_ID, sheet_name),
+        )
+    connection.commit()
+
+
+def db_now(connection):
+    with connection.cursor() as cur:
+        cur.execute("SELECT NOW() AS now")
+        return cur.fetchone()["now"]
+
+
+def has_row_index(connection, sheet_name: str) -> bool:
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT 1 FROM `{ROW_INDEX_TABLE}` WHERE `spreadsheet_id` = %s AND `sheet_name` = %s "
+            f"AND `row_num` > 0 LIMIT 1",
+            (SPREADSHEET_ID, sheet_name),
+        )
+        return cur.fetchone() is not None
+
+
+def save_row_index(connection, sheet_name: str, entries: list):
+    """Upsert (list_id, row_num, values_hash) entries of a tab's row index."""
+    with connection.cursor() as cur:
+        cur.executemany(
+            f"""
+            INSERT INTO `{ROW_INDEX_TABLE}` (`spreadsheet_id`, `sheet_name`, `list_id`, `row_num`, `values_hash`)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE `row_num` = VALUES(`row_num`), `values_hash` = VALUES(`values_hash`)
+            """,
+            [(SPREADSHEET_ID, sheet_name, lid, row_num, h) for lid, row_num, h in entries],
+        )
+    connection.commit()
+
+
+def rebuild_row_index(connection, sheet_name: str, ids: dict):
+    """
+    Replace a tab's live row index with the list_id -> row map just read from the sheet (values unknown).
+    Entries of listings moved off the tab (row_num 0) stay.
+    """
+    with connection.cursor() as cur:
+        cur.execute(
+            f"DELETE FROM `{ROW_INDEX_TABLE}` WHERE `spreadsheet_id` = %s AND `sheet_name` = %s AND `row_num` > 0",
+            (SPREADSHEET_ID, sheet_name),
+        )
+    entries = [(lid, row_num, None) for lid, row_num in ids.items()]
+    for i in range(0, len(entries), 5000):
+        save_row_index(connection, sheet_name, entries[i:i + 5000])
+    connection.commit()
+    log.info(f"'{sheet_name}': row index rebuilt ({len(entries)} list_ids)")
+
+
+def save_archive_state(connection, sheet_name: str, archive_row, pending: int, copied: int):
+    """Store the archive tab's last row in use and the move in progress (rows 2..pending+1, `copied` written)."""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            UPDATE `{SYNC_STATE_TABLE}`
+            SET `archive_spreadsheet_id` = %s, `archive_row` = %s, `archive_pending` = %s, `archive_copied` = %s,
+                `updated_at` = NOW()
+            WHERE `spreadsheet_id` = %s AND `sheet_name` = %s
+            """,
+            (ARCHIVE_SPREADSHEET_ID, archive_row, pending, copied, SPREADSHEET_ID, sheet_name),
+        )
+    connection.commit()
+
+
+def finish_archive(connection, sheet_name: str, removed: int, last_row: int, archive_row: int):
+    """
+    Rows 2..removed+1 were deleted from the tab: in one transaction, set their row index entries to row_num 0,
+    move the rest up, lower last_row and close the move (the archive tab now ends at archive_row).
+    """
+    with connection.cursor() as cur:
+        cur.execute(
+            f"UPDATE `{ROW_INDEX_TABLE}` SET `row_num` = IF(`row_num` <= %s, 0, `row_num` - %s) "
+            f"WHERE `spreadsheet_id` = %s AND `sheet_name` = %s AND `row_num` > 0",
+            (removed + 1, removed, SPREADSHEET_ID, sheet_name),
+        )
+        cur.execute(
+            f"""
+            UPDATE `{SYNC_STATE_TABLE}`
+            SET `last_row` = %s, `archive_spreadsheet_id` = %s, `archive_row` = %s, `archive_pending` = 0,
+                `archive_copied` = 0, `updated_at` = NOW()
+            WHERE `spreadsheet_id` = %s AND `sheet_name` = %s
+            """,
+            (last_row, ARCHIVE_SPREADSHEET_ID, archive_row, SPREADSHEET_ID, sheet_name),
+        )
+    connection.commit()
+
+
+def indexed_row_after(connection, sheet_name: str, row_num: int):
+    """(list_id, row_num) of the first indexed listing on the tab at or after `row_num`, else of the last one."""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT `list_id`, `row_num` FROM `{ROW_INDEX_TABLE}` WHERE `spreadsheet_id` = %s AND `sheet_name` = %s "
+            f"AND `row_num` >= %s ORDER BY `row_num` ASC LIMIT 1",
+            (SPREADSHEET_ID, sheet_name, row_num),
+        )
+        row = cur.fetchone()
+        if row is None:
+            cur.execute(
+                f"SELECT `list_id`, `row_num` FROM `{ROW_INDEX_TABLE}` WHERE `spreadsheet_id` = %s "
+                f"AND `sheet_name` = %s AND `row_num` > 0 ORDER BY `row_num` DESC LIMIT 1",
+                (SPREADSHEET_ID, sheet_name),
+            )
+            row = cur.fetchone()
+    return (row["list_id"], row["row_num"]) if row else None
+
+
+def first_recent_row(connection, table: str, sheet_name: str, cutoff: date):
+    """Sheet row of the first listing on the tab scraped on or after `cutoff` (None if there is none)."""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT MIN(x.`row_num`) AS row_num
+            FROM `{ROW_INDEX_TABLE}` x
+            JOIN `{table}` t ON t.`list_id` = x.`list_id`
+            WHERE x.`spreadsheet_id` = %s AND x.`sheet_name` = %s AND x.`row_num` > 0
+                AND t.`{DATE_COLUMN}` >= %s
+            """,
+            (SPREADSHEET_ID, sheet_name, cutoff),
+        )
+        row = cur.fetchone()
+    connection.commit()
+    return row["row_num"] if row else None
+
+
+def values_hash(values: list) -> str:
+    return hashlib.md5(json.dumps(values, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def max_seq(connection, table: str) -> int:
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX(`{SEQ_COLUMN}`), 0) AS seq FROM `{table}`")
+        return cur.fetchone()["seq"]
+
+
+def _not_on_tab(sheet_name: str):
+    """JOIN clause and params that, with `x.list_id IS NULL`, drop listings already in the tab's row index."""
+    return (f"LEFT JOIN `{ROW_INDEX_TABLE}` x "
+            f"ON x.`spreadsheet_id` = %s AND x.`sheet_name` = %s AND x.`list_id` = t.`list_id`",
+            (SPREADSHEET_ID, sheet_name))
+
+
+def fetch_new_rows(connection, table: str, sheet_name: str, projection: Projection, state, today: date):
+    """
+    Rows of `table` to add to the tab (as result tuples, see Projection) and the tab's new mark: rows
+    inserted after state["last_seq"] (scanning from SHEET_SEQ_LOOKBACK below it), or, when reconciling
+    (state None), today's rows. Listings already in the tab's row index are left out.
+    """
+    reconciling = state is None
+
+    if reconciling:
+        # Rows for Dhaka 'today' ([today, tomorrow) instead of DATE(col) = today, which can't use an index).
+        # The new mark is the table's MAX(ingest_seq) read before this query (or the newest row it returns).
+        where = f"t.`{DATE_COLUMN}` >= %s AND t.`{DATE_COLUMN}` < %s"
+        params = (today, today + timedelta(days=1))
+        what = f"for {today}"
+    else:
+        # One range scan on the unique ingest_seq index, from below the mark for late commits
+        since = max(0, state["last_seq"] - SHEET_SEQ_LOOKBACK)
+        where = f"t.`{SEQ_COLUMN}` > %s AND t.`{DATE_COLUMN}` >= %s"
+        params = (since, today - timedelta(days=SYNC_MAX_AGE_DAYS))
+        what = f"after {SEQ_COLUMN} {since} (mark {state['last_seq']})"
+
+    join, join_params = _not_on_tab(sheet_name)
+    q = f"""
+        SELECT {", ".join(projection.select)}
+        FROM `{table}` t
+        {join}
+        {" ".join(projection.joins)}
+        WHERE {where} AND x.`list_id` IS NULL
+        ORDER BY t.`{SEQ_COLUMN}` ASC
+    """
+    mark = max_seq(connection, table) if reconciling else state["last_seq"]
+    with connection.cursor(pymysql.cursors.Cursor) as cur:
+        cur.execute(q, join_params + params)
+        projection.compile(cur.description)
+        rows = cur.fetchall()
+    connection.commit()   # end the read snapshot, so the next run's reads see new rows
+    log.info(f"MySQL rows fetched from `{table}` {what}: {len(rows)}")
+
+    if rows:
+        mark = max(mark, max(r[1] for r in rows))
+    elif reconciling:
+        log.info(f"No new DB rows for {today} in `{table}`.")
+    return list(rows), mark
+
+
+def fetch_backfill_chunk(connection, table: str, sheet_name: str, projection: Projection,
+                         date_from: date, date_to: date, after) -> list:
+    """
+    Next SHEET_BACKFILL_CHUNK rows of `table` scraped in [date_from, date_to] and not on the tab yet,
+    ordered by (data_scraping_date, list_id) and starting after the `after` cursor (None: from the start).
+    """
+    # Half-open date range and an expanded row comparison, both range conditions on idx_data_scraping_date
+    where = f"t.`{DATE_COLUMN}` >= %s AND t.`{DATE_COLUMN}` < %s"
+    params = (date_from, date_to + timedelta(days=1))
+    if after is not None:
+        where += f" AND (t.`{DATE_COLUMN}` > %s OR (t.`{DATE_COLUMN}` = %s AND t.`list_id` > %s))"
+        params += (after[0], after[0], after[1])
+    join, join_params = _not_on_tab(sheet_name)
+    q = f"""
+        SELECT {", ".join(projection.select)}
+        FROM `{table}` t
+        {join}
+        {" ".join(projection.joins)}
+        WHERE {where} AND x.`list_id` IS NULL
+        ORDER BY t.`{DATE_COLUMN}` ASC, t.`list_id` ASC
+        LIMIT %s
+    """
+    with connection.cursor(pymysql.cursors.Cursor) as cur:
+        cur.execute(q, join_params + params + (SHEET_BACKFILL_CHUNK,))
+        projection.compile(cur.description)
+        rows = cur.fetchall()
+    connection.commit()
+    return list(rows)
+
+
+def fetch_changed_rows(connection, table: str, sheet_name: str, projection: Projection, since) -> list:
+    """
+    Listings already on the tab (in its row index) that changed since `since` and whose sheet values
+    differ from the ones last written: (row_num, list_id, values, hash), in row order.
+    """
+    n = len(projection.select)
+    q = f"""
+        SELECT {", ".join(projection.select)}, x.`row_num`, x.`values_hash`
+        FROM `{table}` t
+        JOIN `{ROW_INDEX_TABLE}` x
+            ON x.`spreadsheet_id` = %s AND x.`sheet_name` = %s AND x.`list_id` = t.`list_id` AND x.`row_num` > 0
+        {" ".join(projection.joins)}
+        WHERE t.`updated_at` > %s OR t.`last_push_at` > %s
+        ORDER BY x.`row_num` ASC
+    """
+    since = since - timedelta(seconds=SHEET_CHANGE_LOOKBACK_SECS)
+    with connection.cursor(pymysql.cursors.Cursor) as cur:
+        cur.execute(q, (SPREADSHEET_ID, sheet_name, since, since))
+        projection.compile(cur.description)
+        rows = cur.fetchall()
+    connection.commit()
+
+    changed = []
+    for r in rows:
+        values = projection.row_values(r)
+        h = values_hash(values)
+        if h != r[n + 1]:
+            changed.append((r[n], str(r[0]).strip(), values, h))
+    log.info(f"'{sheet_name}': {len(rows)} listings changed since {since}, {len(changed)} with new sheet values")
+    return changed
+
+
+class TabWrite:
+    """
+    Rows to write to one tab: changed rows rewritten in place, then new rows below its last_row,
+    and the sync state to store once all are written.
+    """
+
+    def __init__(self, sheet_name, table, reconciling, last_row, mark, since, changed_at, backfill=None):
+        self.sheet_name = sheet_name
+        self.table = table
+        self.reconciling = reconciling
+        self.last_row = last_row     # last sheet row in use; new rows go below it
+        self.mark = mark             # last_seq once every row is written
+        self.since = since           # changed_at mark the updates were read from (None: not scanned)
+        self.changed_at = changed_at # changed_at once every row is written
+        self.backfill = backfill     # (date_from, date_to) of a --from/--to run, else None
+        self.updates = []            # (row_num, list_id, values, hash), ascending row_num
+        self.new = []                # (list_id, key, values, hash); key is the ingest_seq (incremental mode:
+                                     # ascending) or, when backfilling, the (date, list_id) cursor
+        self.updated = 0
+        self.written = 0
+
+    def checkpoint(self, connection):
+        """Store the tab's progress after a chunk was written, so the next run picks up after it."""
+        done = self.updated == len(self.updates) and self.written == len(self.new)
+        last_row = self.last_row + self.written
+        if self.backfill is not None:
+            if self.written:
+                save_backfill_state(connection, self.sheet_name, last_row, *self.backfill, self.new[self.written - 1][1])
+        elif done:
+            save_sync_state(connection, self.sheet_name, self.table, self.mark, last_row,
+                            self.changed_at, self.reconciling)
+        elif self.written and not self.reconciling:
+            # incremental rows come in ingest_seq order, so a partly written tab can keep its progress;
+            # the next run scans from SHEET_SEQ_LOOKBACK below it, which also catches late commits
+            save_sync_state(connection, self.sheet_name, self.table, self.new[self.written - 1][1],
+                            last_row, self.since, False)
+
+    def rows(self):
+        """(row_num, list_id, values, hash, index into self.new or None) of every row to write."""
+        for row_num, lid, values, h in self.updates:
+            yield row_num, lid, values, h, None
+        for i, (lid, _, values, h) in enumerate(self.new):
+            yield self.last_row + 1 + i, lid, values, h, i
+
+
+def chunk_writes(writes: list, max_bytes: int) -> list:
+    """
+    Split the rows of all tabs into values().batchUpdate payloads of at most ~max_bytes of JSON.
+    Each chunk is a list of (TabWrite, row) pieces, row as yielded by TabWrite.rows().
+    """
+    chunks, chunk, size = [], [], 0
+    for w in writes:
+        for row in w.rows():
+            row_bytes = len(json.dumps(row[2], ensure_ascii=False, default=str)) + 1
+            if chunk and size + row_bytes > max_bytes:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append((w, row))
+            size += row_bytes
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def chunk_ranges(chunk: list) -> list:
+    """The pieces of a chunk merged into one range per run of consecutive rows of a tab."""
+    ranges = []
+    for w, (row_num, _, values, _, _) in chunk:
+        if ranges and ranges[-1][0] is w and ranges[-1][1] + len(ranges[-1][2]) == row_num:
+            ranges[-1][2].append(values)
+        else:
+            ranges.append((w, row_num, [values]))
+    data = []
+    for w, first, values in ranges:
+        ref = f"A{first}:{col_index_to_letter(max(len(v) for v in values) - 1)}{first + len(values) - 1}"
+        data.append({"range": a1(w.sheet_name, ref), "values": values})
+    return data
+
+
+def ensure_grid_rows(svc, props: dict, writes: list):
+    """Grow every tab whose grid is too short for its new rows, all in one spreadsheets().batchUpdate."""
+    requests = []
+    for w in writes:
+        p = props[w.sheet_name]
+        needed = w.last_row + len(w.new)
+        if needed > p["rows"]:
+            add = needed - p["rows"] + SHEETS_ROW_SLACK
+            requests.append({"appendDimension": {"sheetId": p["sheetId"], "dimension": "ROWS", "length": add}})
+            p["rows"] += add
+    if requests:
+        sheets_call(
+            svc.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={"requests": requests}),
+            f"grow {len(requests)} tab(s)",
+        )
+
+
+def write_rows(svc, connection, writes: list):
+    """
+    Write the changed and new rows of all tabs, one values().batchUpdate per chunk. After each chunk
+    the row index and the sync state of the tabs it touched move forward, so a failure part-way only
+    leaves the unwritten rows for the next run.
+    """
+    chunks = chunk_writes(writes, SHEETS_MAX_REQUEST_BYTES)
+    for n, chunk in enumerate(chunks, start=1):
+        sheets_call(
+            svc.spreadsheets().values().batchUpdate(
+                spreadsheetId=SPREADSHEET_ID, body={"valueInputOption": "RAW", "data": chunk_ranges(chunk)}
+            ),
+            f"write chunk {n}/{len(chunks)}",
+        )
+        touched = {}
+        for w, (row_num, lid, _, h, new_i) in chunk:
+            touched.setdefault(w.sheet_name, (w, []))[1].append((lid, row_num, h))
+            if new_i is None:
+                w.updated += 1
+            else:
+                w.written = new_i + 1
+        for w, entries in touched.values():
+            save_row_index(connection, w.sheet_name, entries)
+            w.checkpoint(connection)
+        log.info(f"Chunk {n}/{len(chunks)}: " + ", ".join(
+            f"{len(entries)} rows to '{name}'" for name, (_, entries) in touched.items()))
+
+
+def backfill_tab(svc, connection, props: dict, table: str, sheet_name: str, projection: Projection,
+                 state, date_from: date, date_to: date):
+    """
+    Append the rows of [date_from, date_to] missing from the tab, one chunk at a time (read, write,
+    checkpoint), resuming from the stored cursor when the same range was interrupted before.
+    """
+    same_range = state["backfill_from"] == date_from and state["backfill_to"] == date_to
+    if same_range and state["backfill_done_at"] is not None:
+        log.info(f"'{sheet_name}': {date_from}..{date_to} already backfilled at {state['backfill_done_at']}.")
+        return
+    after = None
+    if same_range and state["backfill_date"] is not None:
+        after = (state["backfill_date"], state["backfill_list_id"])
+        log.info(f"'{sheet_name}': resuming backfill after {after[0]} / {after[1]}")
+    else:
+        save_backfill_state(connection, sheet_name, state["last_row"], date_from, date_to, None)
+
+    last_row, total = state["last_row"], 0
+    while True:
+        rows = fetch_backfill_chunk(connection, table, sheet_name, projection, date_from, date_to, after)
+        if not rows:
+            break
+        w = TabWrite(sheet_name, table, False, last_row, state["last_seq"], state["changed_at"],
+                     state["changed_at"], backfill=(date_from, date_to))
+        for r in rows:
+            values = projection.row_values(r)
+            lid = str(r[0]).strip()
+            w.new.append((lid, (r[2], r[0]), values, values_hash(values)))
+        ensure_grid_rows(svc, props, [w])
+        write_rows(svc, connection, [w])
+        last_row += w.written
+        total += w.written
+        after = w.new[-1][1]
+        log.info(f"'{sheet_name}': backfilled {total} rows, up to {after[0]} / {after[1]}")
+        if len(rows) < SHEET_BACKFILL_CHUNK:
+            break
+    save_backfill_state(connection, sheet_name, last_row, date_from, date_to, after, done=True)
+    log.info(f"'{sheet_name}': backfill {date_from}..{date_to} done, {total} rows added.")
+
+
+def backfill(svc, connection, props: dict, all_headers: dict, states: dict, existing: dict,
+             date_from: date, date_to: date):
+    """--from/--to: backfill each tab in turn. Tabs reconciled just now start their sync marks here."""
+    for table, sheet_name in TABLES.items():
+        if sheet_name not in states:
+            continue
+        state = states[sheet_name]
+        if state is None:
+            if sheet_name not in existing:
+                continue
+            save_sync_state(connection, sheet_name, table, max_seq(connection, table), existing[sheet_name][1],
+                            db_now(connection), True)
+            state = load_sync_state(connection, sheet_name)
+        try:
+            projection = Projection(table, all_headers[sheet_name], table_columns(connection, table))
+            backfill_tab(svc, connection, props, table, sheet_name, projection, state, date_from, date_to)
+        except HttpError:
+            log.exception(f"'{sheet_name}': backfill write failed; run it again to resume.")
+        except Exception:
+            log.exception(f"'{sheet_name}': backfill of `{table}` failed; run it again to resume.")
+
+
+def write_header(svc, spreadsheet_id: str, sheet_name: str, headers: list):
+    sheets_call(
+        svc.spreadsheets().values().update(
+            spreadsheetId=spreadsheet_id, range=a1(sheet_name, "A1"), valueInputOption="RAW", body={"values": [headers]}
+        ),
+        f"write header of '{sheet_name}'",
+    )
+
+
+def spreadsheet_cells(props: dict) -> int:
+    """Cells of every tab's grid, which is what counts toward a spreadsheet's 10M-cell limit."""
+    return sum(p["rows"] * p["cols"] for p in props.values())
+
+
+def archive_tab_end(svc, archive_props: dict, sheet_name: str, headers: list) -> int:
+    """
+    Last row in use on the tab's archive tab, which is added with the tab's header if missing. Read only
+    when the sync state has no archive_row for this archive spreadsheet yet; moves carry it on after that.
+    """
+    if sheet_name not in archive_props:
+        cols = max(len(headers), 1)
+        res = sheets_call(
+            svc.spreadsheets().batchUpdate(spreadsheetId=ARCHIVE_SPREADSHEET_ID, body={"requests": [
+                {"addSheet": {"properties": {"title": sheet_name, "gridProperties": {
+                    "rowCount": SHEETS_ROW_SLACK, "columnCount": cols}}}},
+            ]}),
+            f"add archive tab '{sheet_name}'",
+        )
+        new_id = res["replies"][0]["addSheet"]["properties"]["sheetId"]
+        archive_props[sheet_name] = {"sheetId": new_id, "rows": SHEETS_ROW_SLACK, "cols": cols}
+        write_header(svc, ARCHIVE_SPREADSHEET_ID, sheet_name, headers)
+        return 1
+    res = sheets_call(
+        svc.spreadsheets().values().get(spreadsheetId=ARCHIVE_SPREADSHEET_ID, range=a1(sheet_name, "A:A")),
+        f"read archive tab '{sheet_name}' length",
+    )
+    return max(len(res.get("values", [])), 1)
+
+
+def ensure_archive_grid(svc, archive_props: dict, sheet_name: str, rows: int, cols: int):
+    """Grow the archive tab's grid to at least rows x cols, so explicit-range writes fit."""
+    p = archive_props[sheet_name]
+    requests = []
+    if rows > p["rows"]:
+        add = rows - p["rows"] + SHEETS_ROW_SLACK
+        requests.append({"appendDimension": {"sheetId": p["sheetId"], "dimension": "ROWS", "length": add}})
+        p["rows"] += add
+    if cols > p["cols"]:
+        requests.append({"appendDimension": {"sheetId": p["sheetId"], "dimension": "COLUMNS", "length": cols - p["cols"]}})
+        p["cols"] = cols
+    if requests:
+        sheets_call(
+            svc.spreadsheets().batchUpdate(spreadsheetId=ARCHIVE_SPREADSHEET_ID, body={"requests": requests}),
+            f"grow archive tab '{sheet_name}'",
+        )
+
+
+def archived_rows_deleted(svc, connection, props: dict, sheet_name: str, headers: list, removed: int):
+    """
+    Whether rows 2..removed+1 of an interrupted move were already deleted from the tab (the run stopped
+    between the deleteDimension and finish_archive). The first indexed listing after them (else the last
+    one) is looked for at its indexed row and `removed` rows above it: True / False, None if at neither.
+    """
+    probe = indexed_row_after(connection, sheet_name, removed + 2)
+    if probe is None:
+        return True   # no listing the sync knows of is on the tab, so there is nothing to delete twice
+    lid, row_num = probe
+    col = col_index_to_letter(find_list_id_col_index(headers))
+    rows = [r for r in (row_num, row_num - removed) if 2 <= r <= props[sheet_name]["rows"]]
+    res = sheets_call(
+        svc.spreadsheets().values().batchGet(spreadsheetId=SPREADSHEET_ID, ranges=[a1(sheet_name, f"{col}{r}") for r in rows]),
+        f"check archived rows of '{sheet_name}'",
+    )
+    found = {}
+    for r, vr in zip(rows, res.get("valueRanges", [])):
+        values = vr.get("values", [])
+        found[r] = str(values[0][0]).strip() if values and values[0] else ""
+    if found.get(row_num) == lid:
+        return False
+    if row_num <= removed + 1 or found.get(row_num - removed) == lid:
+        return True   # the probe was among the moved rows, or has moved up by `removed`
+    return None
+
+
+def move_to_archive(svc, connection, props: dict, archive_props: dict, sheet_name: str, headers: list,
+                    state, removed: int):
+    """
+    Move rows 2..removed+1 of the tab to the end of the same-named tab of the archive spreadsheet: copy them
+    in chunks to explicit rows there, checkpointing after each, then delete them here in one deleteDimension
+    and move the row index up. A move left pending by an earlier run is finished instead: the copy resumes
+    at its checkpoint, into the same archive rows, and the delete is skipped if it already happened.
+    Returns the tab's updated sync state.
+    """
+    same_archive = state["archive_spreadsheet_id"] == ARCHIVE_SPREADSHEET_ID
+    archive_row = state["archive_row"] if same_archive else None
+    copied = 0
+    if state["archive_pending"]:
+        removed = state["archive_pending"]
+        deleted = archived_rows_deleted(svc, connection, props, sheet_name, headers, removed)
+        if deleted is None:
+            log.error(f"'{sheet_name}': can't tell whether the {removed} rows being archived were deleted; "
+                      f"move dropped. Check the tab and run --reconcile.")
+            save_archive_state(connection, sheet_name, archive_row, 0, 0)
+            return dict(state, archive_spreadsheet_id=ARCHIVE_SPREADSHEET_ID, archive_row=archive_row,
+                        archive_pending=0, archive_copied=0)
+        if deleted:
+            log.info(f"'{sheet_name}': the {removed} archived rows were already deleted; recording the move.")
+            return _archived(connection, sheet_name, state, removed,
+                             archive_row + removed if archive_row is not None else None)
+        if same_archive:
+            copied = state["archive_copied"]
+            log.info(f"'{sheet_name}': resuming the move of {removed} rows to the archive after {copied} rows.")
+    if archive_row is None or sheet_name not in archive_props:
+        archive_row, copied = archive_tab_end(svc, archive_props, sheet_name, headers), 0
+    if not copied:
+        save_archive_state(connection, sheet_name, archive_row, removed, 0)
+
+    cols = max(props[sheet_name]["cols"], len(headers), 1)
+    end_col = col_index_to_letter(cols - 1)
+    ensure_archive_grid(svc, archive_props, sheet_name, archive_row + removed, cols)
+    for first in range(2 + copied, removed + 2, SHEET_ARCHIVE_CHUNK):
+        end = min(first + SHEET_ARCHIVE_CHUNK - 1, removed + 1)
+        # the cells' values, not their display text, so RAW writes numbers and dates back as they are
+        res = sheets_call(
+            svc.spreadsheets().values().get(
+                spreadsheetId=SPREADSHEET_ID, range=a1(sheet_name, f"A{first}:{end_col}{end}"),
+                valueRenderOption="UNFORMATTED_VALUE", dateTimeRenderOption="SERIAL_NUMBER",
+            ),
+            f"read '{sheet_name}' rows {first}-{end}",
+        )
+        values = res.get("values", [])
+        # keep blank rows, and blank out every column, so the archive rows match the rows removed here
+        values += [[]] * (end - first + 1 - len(values))
+        to = archive_row + first - 1
+        sheets_call(
+            svc.spreadsheets().values().update(
+                spreadsheetId=ARCHIVE_SPREADSHEET_ID, range=a1(sheet_name, f"A{to}:{end_col}{to + end - first}"),
+                valueInputOption="RAW", body={"values": [v + [""] * (cols - len(v)) for v in values]},
+            ),
+            f"archive '{sheet_name}' rows {first}-{end}",
+        )
+        save_archive_state(connection, sheet_name, archive_row, removed, end - 1)
+
+    sheets_call(
+        svc.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={"requests": [
+            {"deleteDimension": {"range": {"sheetId": props[sheet_name]["sheetId"], "dimension": "ROWS",
+                                           "startIndex": 1, "endIndex": removed + 1}}},
+        ]}),
+        f"delete archived rows of '{sheet_name}'",
+    )
+    props[sheet_name]["rows"] -= removed
+    return _archived(connection, sheet_name, state, removed, archive_row + removed)
+
+
+def _archived(connection, sheet_name: str, state, removed: int, archive_row):
+    finish_archive(connection, sheet_name, removed, state["last_row"] - removed, archive_row)
+    return dict(state, last_row=state["last_row"] - removed, archive_spreadsheet_id=ARCHIVE_SPREADSHEET_ID,
+                archive_row=archive_row, archive_pending=0, archive_copied=0)
+
+
+def archive_old_rows(svc, connection, props: dict, archive_props: dict, table: str, sheet_name: str,
+                     headers: list, state, cutoff: date):
+    """Move the tab's leading rows of listings scraped before `cutoff` to the archive spreadsheet."""
+    first_kept = first_recent_row(connection, table, sheet_name, cutoff)
+    removed = ((first_kept - 1) if first_kept else state["last_row"]) - 1   # rows 2..removed+1
+    if removed <= 0:
+        return state
+    state = move_to_archive(svc, connection, props, archive_props, sheet_name, headers, state, removed)
+    log.info(f"'{sheet_name}': moved {removed} rows scraped before {cutoff} to the archive spreadsheet.")
+    return state
+
+
+def roll_over_tab(svc, connection, props: dict, archive_props: dict, sheet_name: str, headers: list, state,
+                  reason: str):
+    """Move every row of the tab to the archive spreadsheet, leaving the header; the sync marks carry on."""
+    removed = state["last_row"] - 1
+    state = move_to_archive(svc, connection, props, archive_props, sheet_name, headers, state, removed)
+    log.info(f"'{sheet_name}': {reason}; all {removed} rows moved to the archive spreadsheet.")
+    return state
+
+
+def manage_capacity(svc, connection, props: dict, all_headers: dict, states: dict, archive_days: int, today: date):
+    """
+    Before any rows are written: finish moves to the archive an earlier run left pending, archive old rows
+    (--archive-days) and roll over tabs at SHEET_TAB_MAX_CELLS, then roll over the biggest tabs while the
+    spreadsheet is at SHEET_SPREADSHEET_MAX_CELLS. Tabs reconciling this run are left as they are.
+    """
+    archive_props = get_sheet_properties(svc, ARCHIVE_SPREADSHEET_ID) if ARCHIVE_SPREADSHEET_ID else None
+    failed = set()
+    for table, sheet_name in TABLES.items():
+        state = states.get(sheet_name)
+        if state is None:
+            continue   # reconciling this run; its row index is rebuilt first
+        headers = all_headers[sheet_name]
+        p = props[sheet_name]
+        log.info(f"'{sheet_name}': {state['last_row']} rows used, grid {p['rows']} x {p['cols']} = "
+                 f"{p['rows'] * p['cols']} cells ({100.0 * p['rows'] * p['cols'] / SHEET_TAB_MAX_CELLS:.0f}% "
+                 f"of SHEET_TAB_MAX_CELLS)")
+        full = p["rows"] * p["cols"] >= SHEET_TAB_MAX_CELLS and state["last_row"] > 1
+        if archive_props is None:
+            if full or state["archive_pending"]:
+                log.warning(f"'{sheet_name}': rows need moving to the archive, but ARCHIVE_SPREADSHEET_ID is not set.")
+            continue
+        try:
+            if state["archive_pending"]:
+                state = move_to_archive(svc, connection, props, archive_props, sheet_name, headers, state,
+                                        state["archive_pending"])
+            if archive_days:
+                state = archive_old_rows(svc, connection, props, archive_props, table, sheet_name, headers,
+                                         state, today - timedelta(days=archive_days))
+            if p["rows"] * p["cols"] >= SHEET_TAB_MAX_CELLS and state["last_row"] > 1:
+                state = roll_over_tab(svc, connection, props, archive_props, sheet_name, headers, state,
+                                      "grid reached SHEET_TAB_MAX_CELLS")
+        except HttpError:
+            log.exception(f"'{sheet_name}': moving rows to the archive failed; the next run resumes it.")
+            failed.add(sheet_name)
+        states[sheet_name] = state
+
+    # The 10M-cell limit counts every tab of the spreadsheet, so the total decides too: biggest synced tab first
+    total = spreadsheet_cells(props)
+    log.info(f"Spreadsheet: {total} cells in {len(props)} tabs "
+             f"({100.0 * total / SHEET_SPREADSHEET_MAX_CELLS:.0f}% of SHEET_SPREADSHEET_MAX_CELLS)")
+    while total >= SHEET_SPREADSHEET_MAX_CELLS:
+        candidates = [(props[name]["rows"] * props[name]["cols"], name) for name, state in states.items()
+                      if state is not None and state["last_row"] > 1 and name not in failed]
+        if archive_props is None or not candidates:
+            log.warning(f"Spreadsheet is at {total} cells and no synced tab can be rolled over"
+                        + ("" if archive_props is not None else " (ARCHIVE_SPREADSHEET_ID is not set)") + ".")
+            break
+        _, sheet_name = max(candidates)
+        try:
+            states[sheet_name] = roll_over_tab(svc, connection, props, archive_props, sheet_name,
+                                               all_headers[sheet_name], states[sheet_name],
+                                               "spreadsheet reached SHEET_SPREADSHEET_MAX_CELLS")
+        except HttpError:
+            log.exception(f"'{sheet_name}': moving rows to the archive failed; the next run resumes it.")
+            failed.add(sheet_name)
+        total = spreadsheet_cells(props)
+    if archive_props is not None:
+        archive_total = spreadsheet_cells(archive_props)
+        log.info(f"Archive spreadsheet: {archive_total} cells "
+                 f"({100.0 * archive_total / SHEET_SPREADSHEET_MAX_CELLS:.0f}% of SHEET_SPREADSHEET_MAX_CELLS)")
+        if archive_total >= SHEET_SPREADSHEET_MAX_CELLS:
+            log.warning("The archive spreadsheet is full; point ARCHIVE_SPREADSHEET_ID at a new one.")
 
 
 # =========================
 # Main
 # =========================
 def main():
+    parser = argparse.ArgumentParser(description="Append new listings to the Google Sheet tabs and update changed ones.")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="read each tab's list_id column, rebuild its row index and append today's missing rows, "
+                             "then reset the sync marks")
+    parser.add_argument("--from", dest="date_from", type=parse_date, default=None,
+                        help="backfill: append the rows scraped from this date (YYYY-MM-DD) that are not on the tabs yet")
+    parser.add_argument("--to", dest="date_to", type=parse_date, default=None,
+                        help="last date of the backfill range (default: today)")
+    parser.add_argument("--archive-days", type=int, default=SHEET_ARCHIVE_DAYS,
+                        help="move rows of listings scraped more than N days ago to ARCHIVE_SPREADSHEET_ID (0: off)")
+    args = parser.parse_args()
+    if args.archive_days and not ARCHIVE_SPREADSHEET_ID:
+        parser.error("--archive-days needs ARCHIVE_SPREADSHEET_ID")
+    today = dhaka_today()
+    if args.date_to is not None and args.date_from is None:
+        parser.error("--to needs --from")
+    if args.date_from is not None:
+        args.date_to = args.date_to or today
+        if args.date_from > args.date_to:
+            parser.error("--from is after --to")
+    log.info(f"Using Asia/Dhaka current date: {today}")
+
     # Connect to MySQL
     try:
         connection = pymysql.connect(
@@ -199,105 +1146,110 @@ def main():
         log.exception("Failed to authenticate with Google Sheets API")
         sys.exit(1)
 
-
-
-    # Process each table/sheet
-    for table, sheet_name in TABLES.items():
-        log.info(f"--- Processing table '{table}' -> sheet '{sheet_name}' ---")
-
-        # Fetch sheet headers
+    try:
+        # Tab metadata and every header row: two reads for all tabs
         try:
-            headers = get_sheet_headers(service, sheet_name)
+            props = get_sheet_properties(service)
+            names = [name for name in TABLES.values() if name in props]
+            for name in TABLES.values():
+                if name not in props:
+                    log.warning(f"Sheet '{name}' does not exist. Skipping.")
+            all_headers = get_all_headers(service, names)
+        except HttpError:
+            log.exception("Error reading sheet metadata / headers")
+            sys.exit(1)
+
+        # Incremental by default (rows inserted after the tab's mark, no sheet read); tabs without
+        # state or without a row index (or all with --reconcile) have their list_id columns read,
+        # in one batchGet, and their row index rebuilt
+        states, reconcile_cols = {}, {}
+        for table, sheet_name in TABLES.items():
+            headers = all_headers.get(sheet_name)
             if not headers:
-                log.warning(f"Sheet '{sheet_name}' has no header row (row 1). Skipping.")
+                if sheet_name in all_headers:
+                    log.warning(f"Sheet '{sheet_name}' has no header row (row 1). Skipping.")
                 continue
-            log.info(f"Sheet '{sheet_name}' headers: {headers}")
-        except HttpError as e:
-            log.exception(f"Error reading headers from sheet '{sheet_name}'")
-            continue
-
-
-
-        # Find list_id column from headers
-        list_id_col_idx = find_list_id_col_index(headers)
-        log.info(f"Detected 'list_id' column at index {list_id_col_idx} (A=0).")
-
-        # Read existing IDs for dedupe
+            state = None if args.reconcile else load_sync_state(connection, sheet_name)
+            if state is not None and state["last_row"] > 1 and not has_row_index(connection, sheet_name):
+                log.info(f"'{sheet_name}': no row index yet; reconciling")
+                state = None
+            states[sheet_name] = state
+            if state is None:
+                reconcile_cols[sheet_name] = find_list_id_col_index(headers)
         try:
-            existing_ids = get_existing_ids(service, sheet_name, list_id_col_idx)
-            log.info(f"Existing IDs on sheet '{sheet_name}': {len(existing_ids)}")
+            existing = get_existing_ids(service, reconcile_cols)
         except HttpError:
-            log.exception(f"Failed to read existing list IDs from sheet '{sheet_name}'.")
-            continue
-
+            log.exception("Failed to read existing list IDs; reconciling tabs skipped.")
+            existing = {}
+        for sheet_name, (ids, _) in existing.items():
+            rebuild_row_index(connection, sheet_name, ids)
 
-        # Query rows for Dhaka 'today' using DATE() filter
-        rows = []
-        q = f"""
-            SELECT *
-            FROM `{table}`
-            WHERE DATE(`{DATE_COLUMN}`) = %s
-        """
+        # Keep the live tabs small: archive old rows, roll over full tabs
         try:
-            with connection.cursor() as cur:
-                cur.execute(q, (dhaka_today_str,))
-                rows = cur.fetchall()
-            log.info(f"MySQL rows fetched for {dhaka_today_str}: {len(rows)}")
-        except Exception:
-            log.exception(f"Query failed for table `{table}` on date {dhaka_today_str}. "
-                          f"Check column `{DATE_COLUMN}` exists and types are correct.")
-            continue
+            manage_capacity(service, connection, props, all_headers, states, args.archive_days, today)
+        except HttpError:
+            log.exception("Failed to read the archive spreadsheet; capacity management skipped.")
 
-        if not rows:
-            log.warning(f"No DB rows found for {dhaka_today_str} in `{table}`. "
-                        f"(Timezone? Column `{DATE_COLUMN}`?)")
-            continue
+        if args.date_from is not None:
+            backfill(service, connection, props, all_headers, states, existing, args.date_from, args.date_to)
+            return
 
-        # Filter new (not already on sheet)
-        # We expect 'list_id' key in the DB row dict. We'll compare as strings.
-        new_rows = []
-        missing_list_id_count = 0
-        for r in rows:
-            if "list_id" not in r:
-                missing_list_id_count += 1
+        # Rows to write, per tab
+        writes = []
+        for table, sheet_name in TABLES.items():
+            if sheet_name not in states:
                 continue
-            lid = str(r["list_id"]).strip()
-            if lid and lid not in existing_ids:
-                new_rows.append(r)
-
-        log.info(f"Rows with missing 'list_id': {missing_list_id_count}")
-        log.info(f"New rows to append (deduped): {len(new_rows)}")
-
-        if not new_rows:
-            log.info(f"No new data to add to {sheet_name}.")
-            continue
+            state = states[sheet_name]
+            if state is None and sheet_name not in existing:
+                continue
+            headers = all_headers[sheet_name]
+            last_row = existing[sheet_name][1] if state is None else state["last_row"]
+            since = state["changed_at"] if state is not None else None
+            try:
+                # Header row -> SELECT list and cell converters, once per tab
+                projection = Projection(table, headers, table_columns(connection, table))
+                if projection.unmatched:
+                    log.info(f"'{sheet_name}': no DB column for {projection.unmatched}; left empty")
+                changed_at = db_now(connection)   # next changed-row scan starts here
+                new_rows, mark = fetch_new_rows(connection, table, sheet_name, projection, state, today)
+                # Rewritten in place; tabs just reconciled (row index without values) start scanning from now
+                changed = [] if since is None else fetch_changed_rows(connection, table, sheet_name, projection, since)
+            except Exception:
+                log.exception(f"Query failed for table `{table}`. Check columns `{DATE_COLUMN}` / `{SEQ_COLUMN}` / "
+                              f"`updated_at` / `last_push_at` exist and types are correct.")
+                continue
+            log.info(f"'{sheet_name}': {len(new_rows)} new rows after row {last_row}, {len(changed)} changed rows")
+            if not new_rows and not changed:
+                save_sync_state(connection, sheet_name, table, mark, last_row, changed_at, state is None)
+                continue
+            w = TabWrite(sheet_name, table, state is None, last_row, mark, since, changed_at)
+            w.updates = changed
+            # Map rows into sheet's header order and convert values
+            for r in new_rows:
+                values = projection.row_values(r)
+                w.new.append((str(r[0]).strip(), r[1], values, values_hash(values)))
+            writes.append(w)
 
-        # Map rows into sheet's header order and convert values
-        values_matrix = [row_to_sheet_values(r, headers) for r in new_rows]
-
-        # Append
-        try:
-            body = {"values": values_matrix}
-            result = service.spreadsheets().values().append(
-                spreadsheetId=SPREADSHEET_ID,
-                range=f"{sheet_name}!A1",
-                valueInputOption="RAW",
-                insertDataOption="INSERT_ROWS",
-                body=body,
-            ).execute()
-            updates = result.get("updates", {})
-            updated_rows = updates.get("updatedRows", 0)
-            log.info(f"Appended {updated_rows} rows to '{sheet_name}'.")
-        except HttpError:
-            log.exception(f"Failed to append to sheet '{sheet_name}'.")
-            continue
+        # One grid resize and as few batchUpdate writes as the request size allows, for all tabs
+        if writes:
+            try:
+                ensure_grid_rows(service, props, writes)
+                write_rows(service, connection, writes)
+            except HttpError:
+                log.exception("Failed to write rows; unwritten rows are retried by the next run.")
+            for w in writes:
+                log.info(f"'{w.sheet_name}': updated {w.updated}/{len(w.updates)} changed rows, "
+                         f"wrote {w.written}/{len(w.new)} new rows.")
+        else:
+            log.info("No new data to add.")
 
     # Close DB
-    try:
-        connection.close()
-        log.info("MySQL connection closed.")
-    except Exception:
-        log.warning("Failed to close MySQL connection cleanly.")
+    finally:
+        try:
+            connection.close()
+            log.info("MySQL connection closed.")
+        except Exception:
+            log.warning("Failed to close MySQL connection cleanly.")
 
 
 if __name__ == "__main__":
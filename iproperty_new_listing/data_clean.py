@@ -1,5 +1,6 @@
 from __future__ import annotations
 import re
+from datetime import datetime
 from typing import Optional, Tuple
 from urllib.parse import urlparse, unquote
 
@@ -188,7 +189,7 @@ def clean_posted_date(text):
         if not s:
             return None
 
-        # match like "28 Sep 2025" or "5 September 2023" (optional trailing '.')
+        # match like "28 Sep 2025" or "5 September 2023" (optional trailing '.') -> "2025-09-28"
         m = re.search(r'(\d{1,2})\s+([A-Za-z]{3,9}\.?)\s+(\d{4})', s)
         if not m:
             return None
@@ -196,7 +197,7 @@ def clean_posted_date(text):
         day, mon_raw, year = m.groups()
         mon = mon_raw.rstrip('.') 
         mon = mon[:3].title()
-        return f"{int(day)} {mon} {year}"
+        return datetime.strptime(f"{int(day)} {mon} {year}", "%d %b %Y").date().isoformat()
     except Exception:
         return None
 
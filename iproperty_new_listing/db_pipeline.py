@@ -1,11 +1,23 @@
 import os
+import sys
+import json
 import time
+import zlib
+import struct
+import hashlib
 import logging
-from typing import List, Any, Tuple
+import tempfile
+import threading
+from typing import List, Any, Tuple, Iterable, Dict, Optional
 from twisted.enterprise import adbapi
+from twisted.internet import defer, threads
 import pymysql
 import pymysql.cursors
 
+# The push eligibility rules are shared with the push job; appended so this scraper's own modules win
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api_end_point_data_push"))
+from push_eligibility import push_reasons
+
 
 # --------------------------------------------------------------------------------------
 # ENV (loaded by run.py via dotenv)
@@ -19,12 +31,15 @@ MYSQL_CHARSET = "utf8mb4"
 
 
 TABLE_NAME = "iproperty-new-listing"
+# True when push payloads of this table run `state` through clean_state() (auction only; see push_eligibility.py)
+PUSH_STATE_CLEANED = False
 
 # Batch behavior
 BATCH_SIZE = 50
 FLUSH_SECS = 300
 
 UPSERT_LAST_WINS = bool(int(os.getenv("UPSERT_LAST_WINS", "0")))
+UPSERT_CHANGED_ONLY = bool(int(os.getenv("UPSERT_CHANGED_ONLY", "0")))  # takes precedence over UPSERT_LAST_WINS
 
 # DB thread pool sizing
 POOL_MIN = 2
@@ -36,10 +51,11 @@ COLUMNS: List[str] = [
     "list_id", "name", "url", "area", "state", "price", "bed_rooms", "built_up_size",
     "posted_date", "tenure", "furnished_status", "property_type", "land_title",
     "property_title_type", "bumi_lot", "built_up_price", "occupancy", "unit_type",
-    "lat", "lng", "description", "new_project", "auction", "below_market_value",
+    "lat", "lng", "description_hash", "new_project", "auction", "below_market_value",
     "urgent", "agent_name", "agency_name", "website_name", "data_scraping_date",
 
     "api_update_status", "agent_profile_url", "parking", "bath",
+    "push_eligible", "push_reasons",
 ]
 
 
@@ -58,7 +74,41 @@ _update_sql = ", ".join(f"`{c}`=VALUES(`{c}`)" for c in _update_cols)
 INSERT_SQL_IGNORE = f"INSERT IGNORE INTO `{TABLE_NAME}` ({_cols_sql}) VALUES ({_placeholders})"
 INSERT_SQL_UPSERT = f"{_insert_head} ON DUPLICATE KEY UPDATE {_update_sql}"
 
-INSERT_SQL = INSERT_SQL_UPSERT if UPSERT_LAST_WINS else INSERT_SQL_IGNORE
+# Change-aware upsert: every row carries a hash of its content. Existing rows keep their
+# columns unless the hash differs, so re-scraping an unchanged listing only bumps `last_seen`.
+# Columns in FIRST_SEEN_COLUMNS always keep the original row's value and are not hashed.
+# Needs `content_hash` CHAR(32) and `last_seen` DATETIME columns (schema v5) and `updated_at` (v13).
+FIRST_SEEN_COLUMNS = ("data_scraping_date", "posted_date", "api_update_status")
+_hash_idx = [i for i, c in enumerate(COLUMNS) if c != "list_id" and c not in FIRST_SEEN_COLUMNS]
+_changed_cols = [c for c in _update_cols if c not in FIRST_SEEN_COLUMNS]
+_changed_sql = ", ".join(
+    f"`{c}`=IF(`content_hash` <=> VALUES(`content_hash`), `{c}`, VALUES(`{c}`))" for c in _changed_cols
+)
+# `updated_at` (schema v13, DEFAULT CURRENT_TIMESTAMP on insert) moves only when the content did; the
+# push job re-pushes sent rows with updated_at > last_push_at. It uses the server clock (NOW()), the
+# same one last_push_at is written with.
+_touch_sql = "`updated_at`=IF(`content_hash` <=> VALUES(`content_hash`), `updated_at`, NOW())"
+# `content_hash` must be assigned after the IF() comparisons above (MySQL applies them left to right).
+# last_seen is bound as a parameter (not NOW()) so pymysql's executemany still sends one multi-row INSERT.
+INSERT_SQL_CHANGED = (
+    f"INSERT INTO `{TABLE_NAME}` ({_cols_sql}, `content_hash`, `last_seen`) "
+    f"VALUES ({_placeholders}, %s, %s) "
+    f"ON DUPLICATE KEY UPDATE {_changed_sql}, {_touch_sql}, "
+    f"`content_hash`=VALUES(`content_hash`), `last_seen`=VALUES(`last_seen`)"
+)
+
+if UPSERT_CHANGED_ONLY:
+    INSERT_SQL = INSERT_SQL_CHANGED
+else:
+    INSERT_SQL = INSERT_SQL_UPSERT if UPSERT_LAST_WINS else INSERT_SQL_IGNORE
+
+
+# Descriptions are stored once per distinct text in a table shared by all three scrapers,
+# keyed by MD5 and compressed; listing rows only carry `description_hash`.
+DESCRIPTION_TABLE = "listing-description"
+DESCRIPTION_INSERT_SQL = (
+    f"INSERT IGNORE INTO `{DESCRIPTION_TABLE}` (`description_hash`, `body`) VALUES (%s, %s)"
+)
 
 
 # --------------------------------------------------------------------------------------
@@ -70,33 +120,90 @@ def _boolish_to_int(v: Any) -> Any:
         return 1 if v else 0
     return v
 
+def _description_hash(text: Optional[str]) -> Optional[str]:
+    # Same value as MySQL's MD5(description), so old rows can be migrated in SQL
+    if text is None:
+        return None
+    return hashlib.md5(str(text).encode("utf-8")).hexdigest()
+
+def _pack_description(text: str) -> bytes:
+    # MySQL COMPRESS() layout (4-byte little-endian length + zlib), readable with UNCOMPRESS(body)
+    raw = str(text).encode("utf-8")
+    if not raw:
+        return b""
+    return struct.pack("<I", len(raw)) + zlib.compress(raw)
+
+def unpack_description(body: Optional[bytes]) -> Optional[str]:
+    if body is None:
+        return None
+    if not body:
+        return ""
+    return zlib.decompress(body[4:]).decode("utf-8")
+
+# --------------------------------------------------------------------------------------
+# Push eligibility
+# --------------------------------------------------------------------------------------
+# validate_payload()'s checks, evaluated once when the row is written with the rules shared with
+# the push job (api_end_point_data_push/push_eligibility.py). push_reasons is a bitmask of the
+# failed checks and push_eligible = (push_reasons == 0); the push job only reads push_eligible = 1
+# rows. After a rule change re-evaluate stored rows with
+# `python api_platinum_deals.py --recheck-eligibility`.
+
+
 def _row_from_item(item: dict) -> Tuple[Any, ...]:
-    # Build tuple in the exact order of COLUMNS; missing keys -> None
-    row = tuple(_boolish_to_int(item.get(k)) for k in COLUMNS)
+    # Build tuple in the exact order of COLUMNS; missing keys -> None.
+    # The description text goes to DESCRIPTION_TABLE; the row only keeps its hash.
+    reasons = push_reasons(item, PUSH_STATE_CLEANED)
+    computed = {
+        "description_hash": _description_hash(item.get("description")),
+        "push_eligible": 1 if reasons == 0 else 0,
+        "push_reasons": reasons,
+    }
+    row = tuple(
+        computed[k] if k in computed else _boolish_to_int(item.get(k))
+        for k in COLUMNS
+    )
     return row
 
+def _content_hash(row: Tuple[Any, ...]) -> str:
+    # MD5 over the hashed columns; None is kept distinct from ""
+    parts = ["\\N" if row[i] is None else str(row[i]) for i in _hash_idx]
+    return hashlib.md5("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def _row_with_hash(item: dict) -> Tuple[Any, ...]:
+    # COLUMNS order + trailing content_hash and last_seen, matching INSERT_SQL_CHANGED
+    row = _row_from_item(item)
+    return row + (_content_hash(row), time.strftime("%Y-%m-%d %H:%M:%S"))
+
+_build_row = _row_with_hash if UPSERT_CHANGED_ONLY else _row_from_item
+
+# Column order of the tuples produced by _build_row
+ROW_COLUMNS: List[str] = COLUMNS + ["content_hash", "last_seen"] if UPSERT_CHANGED_ONLY else list(COLUMNS)
+_desc_idx = ROW_COLUMNS.index("description_hash")
+
 
 # --------------------------------------------------------------------------------------
-# Pipeline
+# Storage backends
 # --------------------------------------------------------------------------------------
-class MySQLStorePipelineBatched:
-    """
-    Buffers items and flushes to MySQL in batches using Twisted's adbapi pool.
-    Default policy keeps the FIRST record (INSERT IGNORE). Set UPSERT_LAST_WINS=1 to update existing rows.
-    Enable in your spider.py:
-        custom_settings = {
-            "ITEM_PIPELINES": {"db_pipeline.MySQLStorePipelineBatched": 300},
-            ...
-        }
-    """
+# Picked with the STORAGE_BACKEND Scrapy setting (or env var): mysql (default) | sqlite | parquet.
+# sqlite and parquet need no server, for dev boxes, tests and offline runs.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mysql")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "listings.sqlite3")
+PARQUET_DIR = os.getenv("PARQUET_DIR", "parquet")
+PARQUET_PARTITION_COLS = ["data_scraping_date", "website_name"]
+
+
+class MySQLBackend:
+    """Default backend: executemany through Twisted's adbapi pool."""
+
+    insert_sql = INSERT_SQL
+    description_sql = DESCRIPTION_INSERT_SQL
 
     def __init__(self, dbpool):
         self.dbpool = dbpool
-        self._buf: List[Tuple[Any, ...]] = []
-        self._last_flush = time.time()
 
     @classmethod
-    def from_crawler(cls, crawler):
+    def from_settings(cls, settings):
         dbparams = dict(
             host=MYSQL_HOST,
             port=MYSQL_PORT,
@@ -116,9 +223,251 @@ class MySQLStorePipelineBatched:
         )
         return cls(pool)
 
+    def write(self, batch: List[Tuple[Any, ...]], descriptions: Dict[str, str]):
+        return self.dbpool.runInteraction(self._insert_many, batch, descriptions)
+
+    def close(self):
+        self.dbpool.close()
+
+    def _insert_many(self, tx, batch: List[Tuple[Any, ...]], descriptions: Dict[str, str]):
+        # Descriptions first, so a stored row never points at a missing description.
+        # Compression runs here, in the pool thread, not in the reactor.
+        if descriptions:
+            tx.executemany(self.description_sql, [(h, _pack_description(t)) for h, t in descriptions.items()])
+        tx.executemany(self.insert_sql, batch)
+
+
+# SQLite: same three write policies, expressed with ON CONFLICT (SQLite >= 3.24).
+# `updated_at` works as in MySQL: set on insert, then moved by the changed-only upsert only when the
+# content hash differs (local time, like last_seen).
+_SQ_NOW = "datetime('now', 'localtime')"
+_sq_cols_sql = ", ".join(f'"{c}"' for c in ROW_COLUMNS + ["updated_at"])
+_sq_placeholders = ", ".join(["?"] * len(ROW_COLUMNS) + [_SQ_NOW])
+_sq_insert_head = f'INSERT INTO "{TABLE_NAME}" ({_sq_cols_sql}) VALUES ({_sq_placeholders})'
+
+if UPSERT_CHANGED_ONLY:
+    # SET expressions all see the pre-update row, so assignment order doesn't matter here
+    _sq_set = ", ".join(
+        f'"{c}"=CASE WHEN "content_hash" IS excluded."content_hash" THEN "{c}" ELSE excluded."{c}" END'
+        for c in _changed_cols
+    )
+    SQLITE_INSERT_SQL = (
+        f'{_sq_insert_head} ON CONFLICT("list_id") DO UPDATE SET {_sq_set}, '
+        f'"updated_at"=CASE WHEN "content_hash" IS NOT excluded."content_hash" THEN {_SQ_NOW} ELSE "updated_at" END, '
+        f'"content_hash"=excluded."content_hash", "last_seen"=excluded."last_seen"'
+    )
+elif UPSERT_LAST_WINS:
+    _sq_set = ", ".join(f'"{c}"=excluded."{c}"' for c in _update_cols)
+    SQLITE_INSERT_SQL = f'{_sq_insert_head} ON CONFLICT("list_id") DO UPDATE SET {_sq_set}'
+else:
+    SQLITE_INSERT_SQL = f'INSERT OR IGNORE INTO "{TABLE_NAME}" ({_sq_cols_sql}) VALUES ({_sq_placeholders})'
+
+SQLITE_DESCRIPTION_INSERT_SQL = (
+    f'INSERT OR IGNORE INTO "{DESCRIPTION_TABLE}" ("description_hash", "body") VALUES (?, ?)'
+)
+
+_sq_other_cols = [c for c in COLUMNS if c != "list_id"] + ["content_hash", "last_seen", "updated_at"]
+SQLITE_CREATE_SQL = [
+    f'CREATE TABLE IF NOT EXISTS "{DESCRIPTION_TABLE}" ("description_hash" TEXT PRIMARY KEY, "body" BLOB)',
+    f'CREATE TABLE IF NOT EXISTS "{TABLE_NAME}" ("list_id" TEXT PRIMARY KEY, '
+    + ", ".join(f'"{c}"' for c in _sq_other_cols) + ")",
+    f'CREATE INDEX IF NOT EXISTS "{TABLE_NAME}__push_pending" ON "{TABLE_NAME}" '
+    f'("push_eligible", "api_update_status", "list_id")',
+    f'CREATE INDEX IF NOT EXISTS "{TABLE_NAME}__scraping_date" ON "{TABLE_NAME}" ("data_scraping_date")',
+]
+
+
+def _sqlite_open(conn):
+    # WAL lets readers (sheet sync, ad-hoc queries) run while the spider writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+
+class SQLiteBackend(MySQLBackend):
+    """Local file backend; one transaction per flushed batch."""
+
+    insert_sql = SQLITE_INSERT_SQL
+    description_sql = SQLITE_DESCRIPTION_INSERT_SQL
+
+    @classmethod
+    def from_settings(cls, settings):
+        path = settings.get("SQLITE_PATH", SQLITE_PATH)
+        pool = adbapi.ConnectionPool(
+            "sqlite3",
+            path,
+            check_same_thread=False,
+            cp_min=1,
+            cp_max=1,  # SQLite has a single writer anyway
+            cp_openfun=_sqlite_open,
+        )
+        backend = cls(pool)
+        backend.dbpool.runInteraction(backend._create_table)
+        return backend
+
+    def _create_table(self, tx):
+        for sql in SQLITE_CREATE_SQL:
+            tx.execute(sql)
+        # files created before `updated_at` existed
+        tx.execute(f'PRAGMA table_info("{TABLE_NAME}")')
+        if "updated_at" not in {row[1] for row in tx.fetchall()}:
+            tx.execute(f'ALTER TABLE "{TABLE_NAME}" ADD COLUMN "updated_at"')
+
+
+# Parquet column types; everything not listed here is stored as a string
+_PARQUET_FLOAT_COLS = {"price", "built_up_size", "built_up_price", "lat", "lng", "parking", "bath"}
+_PARQUET_INT_COLS = {"new_project", "auction", "below_market_value", "urgent", "api_update_status",
+                     "push_eligible", "push_reasons"}
+
+
+def _to_float(v: Any) -> Any:
+    try:
+        return None if v is None else float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(v: Any) -> Any:
+    try:
+        return None if v is None else int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+class ParquetBackend:
+    """
+    Append-only Parquet dataset for analytics, hive-partitioned by data_scraping_date / website_name.
+    One ParquetWriter stays open per partition for the whole run, so each flush adds a row group to
+    that partition's file instead of a new small file; the files are finalized in close().
+    Re-scraped listings are not merged, dedupe by list_id when reading.
+    Description texts go to a separate <PARQUET_DIR>/listing-description dataset keyed by hash.
+    Needs pyarrow (pip install pyarrow).
+    """
+
+    def __init__(self, root: str, description_root: str):
+        self.root = root
+        self.description_root = description_root
+        self._writers = {}   # partition dir -> open ParquetWriter
+        self._lock = threading.Lock()
+        self._run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+    @classmethod
+    def from_settings(cls, settings):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=parquet needs pyarrow: pip install pyarrow")
+        base = settings.get("PARQUET_DIR", PARQUET_DIR)
+        return cls(os.path.join(base, TABLE_NAME), os.path.join(base, DESCRIPTION_TABLE))
+
+    def write(self, batch: List[Tuple[Any, ...]], descriptions: Dict[str, str]):
+        return threads.deferToThread(self._write_dataset, batch, descriptions)
+
+    def close(self):
+        with self._lock:
+            writers, self._writers = self._writers, {}
+        for writer in writers.values():
+            writer.close()
+
+    def _append(self, directory: str, table):
+        """Add `table` as a row group to this run's file in `directory`, opening it on first use."""
+        import pyarrow.parquet as pq
+
+        writer = self._writers.get(directory)
+        if writer is None:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{self._run_id}.parquet")
+            writer = self._writers[directory] = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+
+    def _write_dataset(self, batch: List[Tuple[Any, ...]], descriptions: Dict[str, str]):
+        import pyarrow as pa
+
+        arrays, names = [], []
+        for i, col in enumerate(ROW_COLUMNS):
+            if col in PARQUET_PARTITION_COLS:
+                continue   # encoded in the directory names
+            values = [row[i] for row in batch]
+            if col in _PARQUET_FLOAT_COLS:
+                arrays.append(pa.array([_to_float(v) for v in values], type=pa.float64()))
+            elif col in _PARQUET_INT_COLS:
+                arrays.append(pa.array([_to_int(v) for v in values], type=pa.int64()))
+            else:
+                arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+            names.append(col)
+        table = pa.Table.from_arrays(arrays, names=names)
+
+        # Rows of this batch per partition (a batch usually has one or two)
+        key_idx = [ROW_COLUMNS.index(c) for c in PARQUET_PARTITION_COLS]
+        partitions = {}
+        for n, row in enumerate(batch):
+            key = tuple("__HIVE_DEFAULT_PARTITION__" if row[i] is None else str(row[i]) for i in key_idx)
+            partitions.setdefault(key, []).append(n)
+
+        with self._lock:
+            if descriptions:
+                self._append(self.description_root, pa.Table.from_arrays(
+                    [pa.array(list(descriptions.keys()), type=pa.string()),
+                     pa.array(list(descriptions.values()), type=pa.string())],
+                    names=["description_hash", "description"],
+                ))
+            for key, rows in partitions.items():
+                directory = os.path.join(self.root, *(f"{c}={v}" for c, v in zip(PARQUET_PARTITION_COLS, key)))
+                self._append(directory, table.take(pa.array(rows, type=pa.int64())))
+
+
+BACKENDS = {
+    "mysql": MySQLBackend,
+    "sqlite": SQLiteBackend,
+    "parquet": ParquetBackend,
+}
+
+
+def open_backend(name: str, settings):
+    try:
+        backend_cls = BACKENDS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; expected one of {sorted(BACKENDS)}")
+    return backend_cls.from_settings(settings)
+
+
+# --------------------------------------------------------------------------------------
+# Pipeline
+# --------------------------------------------------------------------------------------
+class MySQLStorePipelineBatched:
+    """
+    Buffers items and flushes them in batches to the configured storage backend (MySQL by default).
+    Default policy keeps the FIRST record (INSERT IGNORE). Set UPSERT_LAST_WINS=1 to update existing rows,
+    or UPSERT_CHANGED_ONLY=1 to update them only when their content hash changed.
+    Enable in your spider.py:
+        custom_settings = {
+            "ITEM_PIPELINES": {"db_pipeline.MySQLStorePipelineBatched": 300},
+            "STORAGE_BACKEND": "sqlite",  # optional, also read from the env; default "mysql"
+            ...
+        }
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._buf: List[Tuple[Any, ...]] = []
+        self._desc_buf: Dict[str, str] = {}   # description_hash -> text, pending write
+        self._desc_stored = set()              # hashes already written during this crawl
+        self._pending = set()                  # flush deferreds not finished yet
+        self._last_flush = time.time()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        name = crawler.settings.get("STORAGE_BACKEND", STORAGE_BACKEND)
+        logging.info(f"[DB] Storage backend: {name}")
+        return cls(open_backend(name, crawler.settings))
+
     # Scrapy calls this for every yielded item
     def process_item(self, item, spider):
-        self._buf.append(_row_from_item(item))
+        row = _build_row(item)
+        self._buf.append(row)
+
+        desc_hash = row[_desc_idx]
+        if desc_hash is not None and desc_hash not in self._desc_stored:
+            self._desc_buf[desc_hash] = item.get("description")
 
         # Count-based flush
         if len(self._buf) >= BATCH_SIZE:
@@ -132,25 +481,169 @@ class MySQLStorePipelineBatched:
 
     # Called when spider closes
     def close_spider(self, spider):
+        # Close the backend only after every flush still running, not just the last one: Parquet
+        # would otherwise finalize its files while a worker thread is still appending to them.
         if self._buf:
-            return self._flush_async()
+            self._flush_async()
+        d = defer.DeferredList(list(self._pending))
+        d.addBoth(lambda _: self.backend.close())
+        return d
 
     # ------------------ internals ------------------
-    def _drain(self) -> List[Tuple[Any, ...]]:
+    def _drain(self) -> Tuple[List[Tuple[Any, ...]], Dict[str, str]]:
         batch, self._buf = self._buf, []
+        descriptions, self._desc_buf = self._desc_buf, {}
         self._last_flush = time.time()
-        return batch
+        return batch, descriptions
 
     def _flush_async(self):
-        batch = self._drain()
+        batch, descriptions = self._drain()
         n = len(batch)
-        logging.info(f"[DB] Flushing batch: {n} rows")
-        d = self.dbpool.runInteraction(self._insert_many, batch)
+        logging.info(f"[DB] Flushing batch: {n} rows, {len(descriptions)} new descriptions")
+        d = self.backend.write(batch, descriptions)
         d.addCallbacks(
-            lambda _: logging.info(f"[DB] Batch OK: {n} rows"),
+            lambda _: self._batch_ok(n, descriptions),
             lambda err: logging.error(f"[DB] Batch FAILED ({n} rows): {err}"),
         )
+        self._pending.add(d)
+        d.addBoth(self._flush_done, d)
         return d
 
-    def _insert_many(self, tx, batch: List[Tuple[Any, ...]]):
-        tx.executemany(INSERT_SQL, batch)
+    def _flush_done(self, result, d):
+        self._pending.discard(d)
+        return result
+
+    def _batch_ok(self, n: int, descriptions: Dict[str, str]):
+        self._desc_stored.update(descriptions)
+        logging.info(f"[DB] Batch OK: {n} rows")
+
+
+# --------------------------------------------------------------------------------------
+# Bulk backfill (archives, historical exports, parser-fix re-runs)
+# --------------------------------------------------------------------------------------
+# Items are written to a TSV staging file in ROW_COLUMNS order, loaded with LOAD DATA LOCAL
+# INFILE into a temporary copy of the table, then merged with one INSERT ... SELECT using the
+# same IGNORE / UPSERT_LAST_WINS / UPSERT_CHANGED_ONLY policy as the pipeline.
+# Needs local_infile=ON on the MySQL server.
+BULK_CHUNK_ROWS = 200_000
+
+STAGE_TABLE = f"{TABLE_NAME}__stage"
+
+_row_cols_sql = ", ".join(f"`{c}`" for c in ROW_COLUMNS)
+_t = f"`{TABLE_NAME}`"
+# Target columns are qualified: unqualified names are ambiguous next to the staging table
+_merge_update_sql = ", ".join(f"{_t}.`{c}`=VALUES(`{c}`)" for c in _update_cols)
+_merge_changed_sql = ", ".join(
+    f"{_t}.`{c}`=IF({_t}.`content_hash` <=> VALUES(`content_hash`), {_t}.`{c}`, VALUES(`{c}`))"
+    for c in _changed_cols
+)
+_merge_select = f"{_t} ({_row_cols_sql}) SELECT {_row_cols_sql} FROM `{STAGE_TABLE}`"
+
+if UPSERT_CHANGED_ONLY:
+    MERGE_SQL = (
+        f"INSERT INTO {_merge_select} ON DUPLICATE KEY UPDATE {_merge_changed_sql}, "
+        f"{_t}.`updated_at`=IF({_t}.`content_hash` <=> VALUES(`content_hash`), {_t}.`updated_at`, NOW()), "
+        f"{_t}.`content_hash`=VALUES(`content_hash`), {_t}.`last_seen`=VALUES(`last_seen`)"
+    )
+elif UPSERT_LAST_WINS:
+    MERGE_SQL = f"INSERT INTO {_merge_select} ON DUPLICATE KEY UPDATE {_merge_update_sql}"
+else:
+    MERGE_SQL = f"INSERT IGNORE INTO {_merge_select}"
+
+# Duplicates inside one staging file: keep the first row for INSERT IGNORE, the last one otherwise
+_load_dupes = "IGNORE" if not (UPSERT_LAST_WINS or UPSERT_CHANGED_ONLY) else "REPLACE"
+LOAD_SQL = (
+    f"LOAD DATA LOCAL INFILE %s {_load_dupes} INTO TABLE `{STAGE_TABLE}` "
+    f"CHARACTER SET utf8mb4 ({_row_cols_sql})"
+)
+
+
+def _tsv_field(v: Any) -> str:
+    # LOAD DATA defaults: tab-separated, newline-terminated, backslash escapes, \N for NULL
+    if v is None:
+        return "\\N"
+    s = str(v)
+    return (
+        s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+        .replace("\r", "\\r").replace("\0", "\\0")
+    )
+
+
+def _write_stage_file(rows: List[Tuple[Any, ...]]) -> str:
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", newline="\n", suffix=".tsv", prefix="stage_", delete=False
+    ) as fh:
+        for row in rows:
+            fh.write("\t".join(_tsv_field(v) for v in row))
+            fh.write("\n")
+        return fh.name
+
+
+def _load_chunk(connection, rows: List[Tuple[Any, ...]], descriptions: Dict[str, str]) -> None:
+    path = _write_stage_file(rows)
+    try:
+        with connection.cursor() as cur:
+            if descriptions:
+                cur.executemany(
+                    DESCRIPTION_INSERT_SQL, [(h, _pack_description(t)) for h, t in descriptions.items()]
+                )
+            cur.execute(f"DELETE FROM `{STAGE_TABLE}`")
+            cur.execute(LOAD_SQL, (path,))
+            cur.execute(MERGE_SQL)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        os.remove(path)
+
+
+def bulk_load(items: Iterable[dict], chunk_rows: int = BULK_CHUNK_ROWS) -> int:
+    """
+    Load scraped items straight into TABLE_NAME, chunk_rows at a time.
+    Each chunk is one LOAD DATA + one merge statement in its own transaction. Returns rows loaded.
+    """
+    connection = pymysql.connect(
+        host=MYSQL_HOST,
+        port=MYSQL_PORT,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database=MYSQL_DB,
+        charset=MYSQL_CHARSET,
+        local_infile=True,
+        autocommit=False,
+    )
+    total = 0
+    try:
+        with connection.cursor() as cur:
+            cur.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS `{STAGE_TABLE}` LIKE `{TABLE_NAME}`")
+
+        chunk: List[Tuple[Any, ...]] = []
+        descriptions: Dict[str, str] = {}
+        for item in items:
+            row = _build_row(item)
+            chunk.append(row)
+            if row[_desc_idx] is not None:
+                descriptions[row[_desc_idx]] = item.get("description")
+            if len(chunk) >= chunk_rows:
+                _load_chunk(connection, chunk, descriptions)
+                total += len(chunk)
+                logging.info(f"[DB] Bulk loaded {total} rows into {TABLE_NAME}")
+                chunk, descriptions = [], {}
+        if chunk:
+            _load_chunk(connection, chunk, descriptions)
+            total += len(chunk)
+            logging.info(f"[DB] Bulk loaded {total} rows into {TABLE_NAME}")
+    finally:
+        connection.close()
+    return total
+
+
+def iter_jsonl_items(paths: Iterable[str]):
+    """Yield items from Scrapy JSON Lines feeds (scrapy crawl ... -o items.jsonl)."""
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
@@ -0,0 +1,14 @@
+import sys
+import logging
+from dotenv import load_dotenv
+
+def main():
+    # Usage: python run_bulk_load.py items.jsonl [more.jsonl ...]
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    from db_pipeline import bulk_load, iter_jsonl_items, TABLE_NAME
+    total = bulk_load(iter_jsonl_items(sys.argv[1:]))
+    logging.info(f"Bulk load finished: {total} rows into {TABLE_NAME}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # importing the requests library 
 import re
+from datetime import datetime
 from urllib.parse import urlparse
 from parsel import Selector
 
@@ -81,9 +82,9 @@ def clean_bedrooms(bed_rooms):
 
 def clean_posted_date(posted_date):
     try:
-        # Use regex to extract the date part (matches the format "15 Sep 2025")
+        # Use regex to extract the date part (matches the format "15 Sep 2025") -> "2025-09-15"
         match = re.search(r'\d{1,2} \w{3} \d{4}', posted_date)
-        return match.group(0) if match else None
+        return datetime.strptime(match.group(0), "%d %b %Y").date().isoformat() if match else None
     except Exception as e:
         return None
 
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The jobs are plain scripts run from their own directories, not packages
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for d in ("api_end_point_data_push", "google_sheet_update"):
+    sys.path.insert(0, os.path.join(ROOT, d))
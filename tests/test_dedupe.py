@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from dedupe import METERS_PER_DEGREE, ClusterIndex, distance_m
+
+LAT, LNG = 3.1390, 101.6869
+
+
+def offset(meters_north=0.0, meters_east=0.0):
+    """A point about the given distance from (LAT, LNG)."""
+    return (LAT + meters_north / METERS_PER_DEGREE,
+            LNG + meters_east / (METERS_PER_DEGREE * math.cos(math.radians(LAT))))
+
+
+def index_with_canonical():
+    idx = ClusterIndex(radius_m=50.0, price_tol=0.05, size_tol=0.05)
+    idx.add("a", LAT, LNG, 500_000, 1000, 3)
+    return idx
+
+
+def test_distance_m():
+    assert distance_m(LAT, LNG, LAT, LNG) == 0
+    assert distance_m(0, 0, 1, 0) == pytest.approx(111_195, rel=1e-3)
+    lat, lng = offset(meters_east=30)
+    assert distance_m(LAT, LNG, lat, lng) == pytest.approx(30, rel=1e-2)
+
+
+@pytest.mark.parametrize("north, east, price, size, bedrooms, expected", [
+    (10, 10, 510_000, 1020, 3, "a"),     # same unit, listed on another portal
+    (0, 0, 500_000, 1000, 3, "a"),
+    (0, 49, 500_000, 1000, 3, "a"),      # just inside the radius, across a cell edge
+    (0, 60, 500_000, 1000, 3, None),     # outside the radius
+    (10, 10, 500_000, 1000, 2, None),    # other bedroom count
+    (10, 10, 560_000, 1000, 3, None),    # price 12% off
+    (10, 10, 500_000, 1100, 3, None),    # size 10% off
+    (10, 10, None, 1000, 3, None),       # price on request can't be matched
+    (10, 10, 500_000, 0, 3, None),
+])
+def test_match(north, east, price, size, bedrooms, expected):
+    lat, lng = offset(north, east)
+    assert index_with_canonical().match(lat, lng, price, size, bedrooms) == expected
+
+
+def test_nearest_canonical_wins():
+    idx = index_with_canonical()
+    idx.add("b", *offset(meters_north=40), 500_000, 1000, 3)
+    assert idx.match(*offset(meters_north=35), 500_000, 1000, 3) == "b"
+    assert idx.match(*offset(meters_north=5), 500_000, 1000, 3) == "a"
+
+
+def test_remove_and_contains():
+    idx = index_with_canonical()
+    assert "a" in idx and idx.size == 1
+    idx.remove("a")
+    idx.remove("never-added")
+    assert "a" not in idx and idx.size == 0
+    assert idx.match(LAT, LNG, 500_000, 1000, 3) is None
+    assert idx._cells == {}
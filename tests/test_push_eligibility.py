@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+
+from push_eligibility import PUSH_REASON_BITS, RULE_COLUMNS, push_reasons, reasons_mask, to_float_or_none
+
+VALID = {
+    "name": "Residensi Harmoni",
+    "url": "https://www.iproperty.com.my/property/123",
+    "area": "Cheras",
+    "state": "Selangor",
+    "bed_rooms": "3",
+    "built_up_size": "1000",
+    "lat": "3.1",
+    "lng": "101.7",
+}
+
+
+def test_valid_row_is_eligible():
+    assert push_reasons(VALID) == 0
+    assert set(VALID) == set(RULE_COLUMNS)
+
+
+@pytest.mark.parametrize("changes, failed", [
+    ({"name": "  "}, ["property_name"]),
+    ({"url": None}, ["listing_url"]),
+    ({"url": "www.iproperty.com.my/property/123"}, ["listing_url_format"]),
+    ({"area": ""}, ["area"]),
+    ({"state": None}, ["state"]),
+    ({"bed_rooms": "studio"}, ["no_of_bedroom"]),
+    ({"bed_rooms": "6"}, ["no_of_bedroom"]),
+    ({"bed_rooms": "0"}, ["no_of_bedroom"]),
+    ({"built_up_size": "n/a"}, ["size"]),
+    ({"lat": ""}, ["latitude"]),
+    ({"lat": "91"}, ["latitude_range"]),
+    ({"lng": None}, ["longitude"]),
+    ({"lng": "-181"}, ["longitude_range"]),
+    ({"name": "", "url": "", "lat": None}, ["property_name", "listing_url", "latitude"]),
+])
+def test_failed_checks(changes, failed):
+    assert push_reasons(dict(VALID, **changes)) == reasons_mask(failed)
+
+
+@pytest.mark.parametrize("bed_rooms", ["1", "5", "3+1", "100", " 2 "])
+def test_bedrooms_accepted(bed_rooms):
+    assert push_reasons(dict(VALID, bed_rooms=bed_rooms)) == 0
+
+
+@pytest.mark.parametrize("bed_rooms", ["4+2", "101", ""])
+def test_bedrooms_rejected(bed_rooms):
+    assert push_reasons(dict(VALID, bed_rooms=bed_rooms)) == PUSH_REASON_BITS["no_of_bedroom"]
+
+
+@pytest.mark.parametrize("state, cleaned_ok", [
+    ("Selangor", True),
+    ("WP", False),
+    ("W.P.", False),
+    ("Wilayah Persekutuan", False),
+    ("WP Kuala Lumpur", True),
+    ("Kuala Lumpur, W.P.", True),
+])
+def test_state_cleaning_only_for_cleaned_sources(state, cleaned_ok):
+    row = dict(VALID, state=state)
+    assert push_reasons(row) == 0
+    assert push_reasons(row, state_cleaned=True) == (0 if cleaned_ok else PUSH_REASON_BITS["state"])
+
+
+def test_stored_column_types():
+    # what MySQL hands --recheck-eligibility: Decimal coordinates and sizes, int bedrooms
+    row = dict(VALID, lat=Decimal("3.1"), lng=Decimal("101.7"), built_up_size=Decimal("850.00"), bed_rooms=3)
+    assert push_reasons(row) == 0
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), ("  ", None), ("abc", None), ("1.5", 1.5), (" 2 ", 2.0), (Decimal("3.25"), 3.25), (4, 4.0),
+])
+def test_to_float_or_none(value, expected):
+    assert to_float_or_none(value) == expected
+
+
+def test_reason_bits_are_distinct():
+    bits = list(PUSH_REASON_BITS.values())
+    assert len(set(bits)) == len(bits)
+    assert all(b & (b - 1) == 0 for b in bits)
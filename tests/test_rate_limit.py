@@ -0,0 +1,88 @@
+import email.utils
+import time
+
+import pytest
+
+from rate_limit import CircuitBreaker, TokenBucket, backoff_delay, classify_status, parse_retry_after
+
+
+@pytest.mark.parametrize("status, kind", [
+    (200, "sent"), (201, "sent"), (204, "sent"),
+    (400, "rejected"), (422, "rejected"),
+    (401, "fatal"), (403, "fatal"), (404, "fatal"),
+    (408, "retry"), (409, "retry"), (413, "retry"), (429, "retry"),
+    (500, "retry"), (502, "retry"), (503, "retry"),
+])
+def test_classify_status(status, kind):
+    assert classify_status(status) == kind
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), ("soon", None), ("5", 5.0), (" 1.5 ", 1.5), ("-3", 0.0),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(email.utils.formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert parse_retry_after(email.utils.formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(1, 10):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= min(8.0, 2 ** (attempt - 1))
+
+
+def test_token_bucket_aimd():
+    bucket = TokenBucket(rate=4, burst=2, min_rate=1, max_rate=4.3, step=0.1, cut_interval=60)
+    bucket.on_success()
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(4.2)
+    bucket.on_success()
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(4.3)      # capped at max_rate
+    bucket.on_throttle(factor=0.5)
+    assert bucket.rate == pytest.approx(2.15)
+    bucket.on_throttle(factor=0.5)                # same cut_interval: one signal
+    assert bucket.rate == pytest.approx(2.15)
+
+
+def test_token_bucket_min_rate_and_pause():
+    bucket = TokenBucket(rate=2, min_rate=1.5, cut_interval=0)
+    bucket.on_throttle(retry_after=30, factor=0.5)
+    assert bucket.rate == 1.5
+    assert bucket._paused_until > time.monotonic() + 25
+
+
+def test_token_bucket_burst_is_immediate():
+    bucket = TokenBucket(rate=1, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.5
+
+
+def test_breaker_opens_at_threshold():
+    breaker = CircuitBreaker(threshold=3, cooldown=60, max_trips=3)
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.trips == 1 and not breaker.aborted
+    assert breaker.record_failure() is False      # already open
+    breaker.record_success()
+    assert breaker.failures == 0
+
+
+def test_breaker_aborts_after_max_trips():
+    breaker = CircuitBreaker(threshold=2, cooldown=0, max_trips=1)
+    assert [breaker.record_failure() for _ in range(3)] == [False, True, True]
+    assert breaker.aborted
+    assert breaker.wait_until_closed() is False
+    breaker.reset()
+    assert not breaker.aborted and breaker.wait_until_closed() is True
+
+
+def test_breaker_abort():
+    breaker = CircuitBreaker()
+    breaker.abort()
+    assert breaker.wait_until_closed() is False
+    assert breaker.record_failure() is False
@@ -0,0 +1,83 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google.oauth2")
+pytest.importorskip("pymysql")
+pytest.importorskip("dotenv")
+
+from pymysql.constants import FIELD_TYPE  # noqa: E402
+
+import google_sheet_update as g  # noqa: E402
+
+
+def tab_write(name, last_row, new=(), updates=()):
+    w = g.TabWrite(name, "t", False, last_row, 0, None, None)
+    w.new = [(lid, seq, values, None) for seq, (lid, values) in enumerate(new, start=1)]
+    w.updates = [(row_num, lid, values, None) for row_num, lid, values in updates]
+    return w
+
+
+def test_col_index_to_letter():
+    assert [g.col_index_to_letter(i) for i in (0, 25, 26, 51, 701, 702)] == ["A", "Z", "AA", "AZ", "ZZ", "AAA"]
+
+
+def test_chunk_writes_respects_max_bytes():
+    rows = [(f"id{i}", [f"id{i}", "x" * 50]) for i in range(10)]
+    w = tab_write("tab", 1, new=rows)
+    row_bytes = len(json.dumps(rows[0][1])) + 1
+    chunks = g.chunk_writes([w], max_bytes=3 * row_bytes)
+    assert [len(c) for c in chunks] == [3, 3, 3, 1]
+    # every row once, in order, below last_row
+    assert [row[0] for c in chunks for _, row in c] == list(range(2, 12))
+
+
+def test_chunk_writes_oversized_row_gets_own_chunk():
+    w = tab_write("tab", 1, new=[("a", ["a" * 100]), ("b", ["b"])])
+    assert [len(c) for c in g.chunk_writes([w], max_bytes=10)] == [1, 1]
+
+
+def test_chunk_ranges_merges_consecutive_rows_per_tab():
+    a = tab_write("alpha", 10, new=[("n1", ["n1", 1]), ("n2", ["n2", 2, "x"])], updates=[(3, "u1", ["u1", 0])])
+    b = tab_write("b'tab", 1, new=[("m1", ["m1"])])
+    (chunk,) = g.chunk_writes([a, b], max_bytes=10_000)
+    data = g.chunk_ranges(chunk)
+    assert [d["range"] for d in data] == ["'alpha'!A3:B3", "'alpha'!A11:C12", "'b''tab'!A2:A2"]
+    assert data[1]["values"] == [["n1", 1], ["n2", 2, "x"]]
+
+
+def test_projection_resolves_headers_once():
+    columns = ["list_id", "ingest_seq", "data_scraping_date", "name", "Price", "description_hash"]
+    headers = ["List ID", "Name", "price", "Description", "Market Value", "Agent", "name"]
+    p = g.Projection("iproperty-new-listing", headers, columns)
+    assert p.select == ["t.`list_id`", "t.`ingest_seq`", "t.`data_scraping_date`", "t.`name`", "t.`Price`",
+                        "CONVERT(UNCOMPRESS(d.`body`) USING utf8mb4)", "r.`market_value`"]
+    assert p.positions == [0, 3, 4, 5, 6, None, 3]
+    assert p.unmatched == ["Agent"]
+    assert len(p.joins) == 2 and "'iproperty-new-listing'" in p.joins[1]
+
+
+def test_projection_without_joined_headers():
+    p = g.Projection("t", ["list_id", "data_scraping_date"], ["list_id", "ingest_seq", "data_scraping_date"])
+    assert p.joins == [] and p.positions == [0, 2]
+
+
+def test_projection_row_values_by_column_type():
+    p = g.Projection("t", ["list_id", "price", "data_scraping_date", "updated_at", "missing"],
+                     ["list_id", "ingest_seq", "data_scraping_date", "price", "updated_at"])
+    description = [("list_id", FIELD_TYPE.VAR_STRING), ("ingest_seq", FIELD_TYPE.LONGLONG),
+                   ("data_scraping_date", FIELD_TYPE.DATE), ("price", FIELD_TYPE.NEWDECIMAL),
+                   ("updated_at", FIELD_TYPE.DATETIME)]
+    p.compile(description)
+    row = ("L1", 7, date(2025, 9, 1), Decimal("1250000.50"), datetime(2025, 9, 1, 8, 30))
+    assert p.row_values(row) == ["L1", 1250000.5, "2025-09-01", "2025-09-01 08:30:00", ""]
+    assert p.row_values(("L2", 8, None, None, None)) == ["L2", "", "", "", ""]
+
+
+def test_projection_without_description_falls_back_to_normalize_value():
+    p = g.Projection("t", ["list_id", "price"], ["list_id", "ingest_seq", "data_scraping_date", "price"])
+    p.compile(None)
+    assert p.row_values(("L1", 1, None, Decimal("2.5"))) == ["L1", 2.5]